@@ -0,0 +1,103 @@
+"""대화 기록 메모리 벤치마크 (tracemalloc).
+
+에이전트 N명(기본 3)이 1,000턴 대화를 나눌 때 대화 기록이 차지하는 메모리를 비교합니다.
+
+    copies      에이전트마다 역할을 바꾼 {"role", "content"} dict 목록 + 항목별 dict transcript
+                (3인 이상이면 "[이름] " 접두어를 붙인 본문 사본까지) — 예전 방식
+    transcript  MultiAgentDialogue의 Transcript + 에이전트별 TranscriptView
+
+응답 본문 문자열은 측정 전에 미리 만들어 두므로 결과는 기록 구조 자체의 비용입니다.
+transcript 쪽은 실제 대화 엔진을 provider 대신 미리 정한 응답을 돌려주는 에이전트로 돌리며,
+매 턴 요청처럼 memory 전체를 한 번씩 펼칩니다 (peak에 반영).
+
+    python benchmarks/bench_memory.py --turns 1000 --agents 3
+"""
+import argparse
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_core.dialogue import LLMAgent, MultiAgentDialogue  # noqa: E402
+
+WORDS = "prompt model token latency stream cache agent dialogue summary context window budget".split()
+
+
+class ScriptedAgent(LLMAgent):
+    """provider를 부르지 않고 정해진 응답을 돌려주는 에이전트. 요청처럼 memory를 펼쳐 봅니다."""
+
+    def __init__(self, name: str, responses):
+        super().__init__(name, f"You are {name}.", "mock-model", "OpenAI", "sk-mock")
+        self.responses = responses
+
+    def get_response(self, max_tokens=None, prompt=None) -> str:
+        messages = list(self.memory)
+        assert messages[0]["role"] == "system"
+        return next(self.responses)
+
+
+def make_responses(turns: int, words: int) -> list:
+    rng = random.Random(0)
+    return [" ".join(rng.choice(WORDS) for _ in range(words)) for _ in range(turns)]
+
+
+def run_copies(names, responses):
+    """예전 방식: 턴마다 transcript dict 하나 + 에이전트마다 역할 dict 하나씩 추가."""
+    label = len(names) > 2
+    history = [{"turn": 0, "speaker": "user", "message": "Let's begin."}]
+    memories = {name: [{"role": "system", "content": f"You are {name}."},
+                       {"role": "user", "content": "Let's begin."}] for name in names}
+    for turn, response in enumerate(responses, start=1):
+        speaker = names[(turn - 1) % len(names)]
+        history.append({"turn": turn, "speaker": speaker, "message": response})
+        for name, memory in memories.items():
+            if name == speaker:
+                memory.append({"role": "assistant", "content": response})
+            else:
+                memory.append({"role": "user", "content": f"[{speaker}] {response}" if label else response})
+    return history, memories
+
+
+def run_transcript(names, responses):
+    """현재 방식: 실제 대화 엔진 (라운드 로빈)."""
+    shared = iter(responses)
+    dialogue = MultiAgentDialogue([ScriptedAgent(name, shared) for name in names])
+    for _ in dialogue.run("Let's begin.", len(responses)):
+        pass
+    return dialogue
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    result = fn(*args)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dialogue history memory (tracemalloc)")
+    parser.add_argument("--turns", type=int, default=1000)
+    parser.add_argument("--agents", type=int, default=3)
+    parser.add_argument("--words", type=int, default=60, help="응답 하나의 단어 수")
+    args = parser.parse_args()
+
+    names = [f"Agent {i + 1}" for i in range(args.agents)]
+    responses = make_responses(args.turns, args.words)
+    text_bytes = sum(sys.getsizeof(response) for response in responses)
+    print(f"{args.turns:,} turns, {args.agents} agents, response text {text_bytes / 1024:,.0f} KiB (not counted)")
+
+    copies, copies_current, copies_peak = measure(run_copies, names, responses)
+    dialogue, current, peak = measure(run_transcript, names, responses)
+    assert len(dialogue.conversation_history) == len(copies[0])
+
+    print(f"{'layout':<12}{'retained KiB':>14}{'peak KiB':>12}{'bytes/turn':>12}")
+    for layout, retained, top in (("copies", copies_current, copies_peak), ("transcript", current, peak)):
+        print(f"{layout:<12}{retained / 1024:>14,.0f}{top / 1024:>12,.0f}{retained / args.turns:>12,.0f}")
+    print(f"retained: {copies_current / max(current, 1):.1f}x smaller")
+
+
+if __name__ == "__main__":
+    main()
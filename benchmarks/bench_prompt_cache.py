@@ -0,0 +1,78 @@
+"""프롬프트 캐싱 벤치마크: 긴 시스템 프롬프트로 여러 턴 대화할 때 cache_control 표시 유무를 비교합니다.
+
+로컬 mock provider(benchmarks/mock_provider.py)가 Anthropic 방식의 캐시 usage 필드를 흉내 내고,
+캐시에서 읽지 못한 prompt 토큰만큼 prefill 시간을 씁니다. 실제 completion 경로
+(build_completion_params → litellm)를 그대로 통과합니다.
+
+    python benchmarks/bench_prompt_cache.py [--turns 10] [--system-tokens 4000]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_provider import MockConfig, start_mock_provider  # noqa: E402
+
+
+def run_chat(turns: int, system_prompt: str, prompt_cache: bool):
+    """턴마다 (TTFT, prompt 토큰, 캐시 읽기, 캐시 쓰기)를 반환합니다."""
+    from llm_core.completion_cache import chunk_text
+    from llm_core.prompt_caching import cache_usage
+    from llm_core.provider_clients import build_completion_params, completion
+
+    messages = [{"role": "system", "content": system_prompt}]
+    samples = []
+    for turn in range(turns):
+        messages.append({"role": "user", "content": f"Question {turn}: tell me more about the plan."})
+        params = build_completion_params("OpenAI (Default)", "gpt-4o", messages, "mock-key",
+                                         max_tokens=32, stream=True, prompt_cache=prompt_cache,
+                                         stream_options={"include_usage": True})
+        started = time.perf_counter()
+        ttft = None
+        parts = []
+        usage = None
+        for chunk in completion(**params):
+            usage = getattr(chunk, "usage", None) or usage
+            text = chunk_text(chunk)
+            if text:
+                ttft = ttft if ttft is not None else time.perf_counter() - started
+                parts.append(text)
+        messages.append({"role": "assistant", "content": "".join(parts)})
+        samples.append((ttft, getattr(usage, "prompt_tokens", 0) or 0) + cache_usage(usage))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--system-tokens", type=int, default=4000, help="approximate system prompt length")
+    parser.add_argument("--prefill-tokens-per-second", type=float, default=20000.0)
+    args = parser.parse_args()
+
+    config = MockConfig(response_tokens=32, prefill_tokens_per_second=args.prefill_tokens_per_second)
+    server, base_url, _ = start_mock_provider(config=config)
+    os.environ["OPENAI_BASE_URL"] = os.environ["OPENAI_API_BASE"] = base_url
+    # mock은 글자 4개를 토큰 하나로 셈
+    system_prompt = "You are a meticulous planning assistant. " * (args.system_tokens * 4 // 41)
+    try:
+        results = {
+            "uncached": run_chat(args.turns, system_prompt, prompt_cache=False),
+            "cached": run_chat(args.turns, system_prompt, prompt_cache=True),
+        }
+    finally:
+        server.shutdown()
+
+    print(f"{'mode':<10}{'median TTFT (ms)':>18}{'prompt tok':>12}{'cache read':>12}{'cache write':>13}")
+    for mode, samples in results.items():
+        print(f"{mode:<10}{statistics.median(s[0] for s in samples) * 1000:>18.1f}"
+              f"{sum(s[1] for s in samples):>12,}{sum(s[2] for s in samples):>12,}{sum(s[3] for s in samples):>13,}")
+    uncached = statistics.median(s[0] for s in results["uncached"])
+    cached = statistics.median(s[0] for s in results["cached"])
+    print(f"TTFT saved per turn: {(uncached - cached) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""커넥션 재사용 벤치마크: 후속 턴의 time-to-first-token을 새 클라이언트와 풀링된 클라이언트로 비교합니다.
+
+로컬 TLS mock provider(benchmarks/mock_provider.py)를 대상으로 합니다.
+
+    python benchmarks/bench_provider_client.py [--requests 20] [--no-tls]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_provider import MockConfig, start_mock_provider
+
+REQUEST_BODY = {
+    "model": "mock-model",
+    "messages": [{"role": "user", "content": "Hello"}],
+    "max_tokens": 16,
+    "stream": True,
+}
+
+
+def time_to_first_token(client, base_url: str) -> float:
+    started = time.perf_counter()
+    with client.stream("POST", f"{base_url}/chat/completions", json=REQUEST_BODY,
+                       headers={"Authorization": "Bearer mock-key"}) as response:
+        chunks = response.iter_bytes()
+        next(chunks)
+        elapsed = time.perf_counter() - started
+        for _ in chunks:
+            pass
+    return elapsed
+
+
+def run_fresh(base_url: str, count: int):
+    import httpx
+    samples = []
+    for _ in range(count):
+        with httpx.Client() as client:
+            samples.append(time_to_first_token(client, base_url))
+    return samples
+
+
+def run_pooled(base_url: str, count: int):
+    from llm_core.provider_clients import close_clients, get_http_client
+    client = get_http_client("OpenAI (Default)", "mock-key")
+    # 첫 요청은 연결 수립 비용을 포함하므로 warm-up으로 제외
+    time_to_first_token(client, base_url)
+    samples = [time_to_first_token(client, base_url) for _ in range(count)]
+    close_clients()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--no-tls", action="store_true")
+    args = parser.parse_args()
+
+    server, base_url, certfile = start_mock_provider(tls=not args.no_tls, config=MockConfig(response_tokens=16))
+    if certfile:
+        os.environ["SSL_CERT_FILE"] = certfile
+    try:
+        fresh = run_fresh(base_url, args.requests)
+        pooled = run_pooled(base_url, args.requests)
+    finally:
+        server.shutdown()
+
+    print(f"{'client':<10}{'median TTFT (ms)':>18}{'p95 TTFT (ms)':>16}")
+    for name, samples in (("fresh", fresh), ("pooled", pooled)):
+        p95 = sorted(samples)[max(0, int(len(samples) * 0.95) - 1)]
+        print(f"{name:<10}{statistics.median(samples) * 1000:>18.2f}{p95 * 1000:>16.2f}")
+    print(f"connection setup saved per turn: {(statistics.median(fresh) - statistics.median(pooled)) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
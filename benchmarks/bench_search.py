@@ -0,0 +1,64 @@
+"""전문 검색 인덱스 질의 지연 벤치마크.
+
+합성 채팅 메시지 N개(기본 100k)를 임시 인덱스에 넣고, 자주/드물게 나오는 단어와
+여러 단어 질의의 검색 지연(첫 페이지 20개 + 전체 개수)을 측정합니다.
+
+    python benchmarks/bench_search.py --messages 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_core.search_index import SearchIndex  # noqa: E402
+
+WORDS = ("prompt model token latency stream cache agent dialogue summary context window budget "
+         "프롬프트 모델 토큰 대화 요약 응답 시스템 캐시 스트리밍 에이전트").split()
+QUERIES = ["prompt", "프롬프트", "latency budget", "스트리밍 응답", "zebra", "agent dialogue summary"]
+
+
+def build_index(path: str, messages: int, per_chat: int = 50) -> SearchIndex:
+    rng = random.Random(0)
+    index = SearchIndex(path)
+    for chat in range(messages // per_chat):
+        filename = f"chat_{chat:06d}.json"
+        rows = []
+        for position in range(per_chat):
+            body = " ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 60)))
+            if rng.random() < 0.001:
+                body += " zebra"
+            rows.append((position, filename, body, "user" if position % 2 == 0 else "assistant"))
+        index.index_document("chat", filename, "1", rows)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search index query latency")
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        started = time.perf_counter()
+        index = build_index(os.path.join(directory, "search.sqlite3"), args.messages)
+        print(f"indexed {args.messages:,} messages in {time.perf_counter() - started:.1f}s")
+
+        print(f"{'query':<26}{'matches':>10}{'p50 ms':>10}{'p95 ms':>10}")
+        for query in QUERIES:
+            samples = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                total, _ = index.search(query, limit=20)
+                samples.append((time.perf_counter() - started) * 1000)
+            samples.sort()
+            p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+            print(f"{query:<26}{total:>10,}{statistics.median(samples):>10.1f}{p95:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""페이지별 cold-start import 시간 벤치마크.
+
+각 페이지의 최상위 import 문만 새 파이썬 프로세스에서 `-X importtime`으로 실행해
+누적 import 시간을 재고, 저장된 기준값보다 threshold 이상 느려지면 실패(exit 1)합니다.
+litellm, pandas 같은 무거운 모듈이 페이지 로드 시점에 import되거나, 기준값에 없는 페이지가 있어도 실패합니다.
+
+    python benchmarks/bench_startup.py                 # 측정 후 기준값과 비교
+    python benchmarks/bench_startup.py --update-baseline
+"""
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = ["Home.py", "pages/1_Chat.py", "pages/2_Prompts.py", "pages/3_Test_System_Prompt.py",
+         "pages/4_Chat.py", "pages/5_Settings.py", "pages/6_Telemetry.py"]
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "results", "startup_baseline.json")
+
+# 첫 completion 전에는 import되면 안 되는 모듈, 그리고 표/차트를 그릴 때만 필요한 모듈
+LAZY_MODULES = ("litellm", "openai", "tiktoken", "tokenizers", "huggingface_hub", "pandas", "altair", "pyarrow")
+
+
+def page_imports(page: str) -> str:
+    """페이지 파일의 최상위 import 문만 모아 실행 가능한 코드로 만듭니다."""
+    with open(os.path.join(ROOT, page), "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=page)
+    imports = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return "\n".join(ast.unparse(node) for node in imports)
+
+
+def measure(page: str):
+    """새 프로세스에서 페이지 import를 실행하고 (누적 import 시간 ms, 최상위 모듈 목록)을 반환합니다."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", page_imports(page)],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{page}: imports failed\n{result.stderr[-2000:]}")
+
+    total_us = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # 헤더 줄
+        modules.add(name.strip().split(".")[0])
+        if not name.startswith("  "):
+            # 들여쓰기 없는 줄이 최상위 import (누적 시간에 하위 import 포함)
+            total_us += int(cumulative)
+    return total_us / 1000, modules
+
+
+def run(pages, repeat: int):
+    results = {}
+    for page in pages:
+        samples, modules = [], set()
+        for _ in range(repeat):
+            elapsed, modules = measure(page)
+            samples.append(elapsed)
+        results[page] = {
+            "median_ms": statistics.median(samples),
+            "min_ms": min(samples),
+            "eager_heavy_modules": sorted(m for m in modules if m in LAZY_MODULES),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import time per Streamlit page")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown vs. baseline (0.25 = 25%%)")
+    parser.add_argument("--slack-ms", type=float, default=50.0, help="absolute slack added to the threshold")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--pages", nargs="*", default=PAGES)
+    args = parser.parse_args()
+
+    results = run(args.pages, args.repeat)
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    failed = False
+    print(f"{'page':<34}{'median ms':>11}{'baseline':>11}  status")
+    for page, result in results.items():
+        base = baseline.get(page, {}).get("median_ms")
+        status = "ok"
+        if result["eager_heavy_modules"]:
+            status = f"FAIL: imports {', '.join(result['eager_heavy_modules'])} at load"
+            failed = True
+        elif base is None and baseline and not args.update_baseline:
+            status = "FAIL: no baseline entry (run with --update-baseline)"
+            failed = True
+        elif base is not None and result["median_ms"] > base * (1 + args.threshold) + args.slack_ms:
+            status = f"FAIL: +{result['median_ms'] - base:.0f} ms"
+            failed = True
+        base_text = f"{base:.1f}" if base is not None else "-"
+        print(f"{page:<34}{result['median_ms']:>11.1f}{base_text:>11}  {status}")
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"baseline written to {os.path.relpath(BASELINE_PATH, ROOT)}")
+    elif not baseline:
+        print("no baseline yet; run with --update-baseline to record one")
+
+    sys.exit(1 if failed and not args.update_baseline else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""스트리밍 렌더링 벤치마크: 4k 토큰 응답을 그릴 때 render 호출 수와 전송 바이트를 비교합니다.
+
+    python benchmarks/bench_stream_render.py [--tokens 4000] [--tokens-per-second 60]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stream_renderer import StreamRenderer
+
+
+class CountingContainer:
+    def __init__(self):
+        self.render_calls = 0
+        self.bytes_pushed = 0
+
+    def markdown(self, text):
+        self.render_calls += 1
+        self.bytes_pushed += len(text.encode("utf-8"))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def synthetic_tokens(count):
+    words = ["stream", "token", "render", "markdown", "latency", "의", "응답", "\n\n- item", "`code`", "."]
+    return [(" " if i % 7 else "") + words[i % len(words)] for i in range(count)]
+
+
+def run_naive(tokens):
+    container = CountingContainer()
+    full_response = ""
+    for content in tokens:
+        full_response += content
+        container.markdown(full_response)
+    return container
+
+
+def run_throttled(tokens, tokens_per_second, interval):
+    container = CountingContainer()
+    clock = FakeClock()
+    renderer = StreamRenderer(container, interval=interval, clock=clock)
+    for content in tokens:
+        clock.now += 1.0 / tokens_per_second
+        renderer.write(content)
+    renderer.close()
+    return container
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=4000)
+    parser.add_argument("--tokens-per-second", type=float, default=60.0)
+    parser.add_argument("--interval", type=float, default=0.05)
+    args = parser.parse_args()
+
+    tokens = synthetic_tokens(args.tokens)
+    naive = run_naive(tokens)
+    throttled = run_throttled(tokens, args.tokens_per_second, args.interval)
+
+    print(f"{'renderer':<12}{'render calls':>14}{'bytes pushed':>16}")
+    print(f"{'naive':<12}{naive.render_calls:>14,}{naive.bytes_pushed:>16,}")
+    print(f"{'throttled':<12}{throttled.render_calls:>14,}{throttled.bytes_pushed:>16,}")
+    print(f"reduction: {naive.render_calls / throttled.render_calls:.1f}x calls, "
+          f"{naive.bytes_pushed / throttled.bytes_pushed:.1f}x bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""로컬 OpenAI 호환 mock provider 서버.
+
+실제 API 키 없이 completion 경로를 벤치마크하기 위한 서버입니다. HTTP/1.1 keep-alive를
+지원하며, 선택적으로 자체 서명 인증서로 TLS를 켤 수 있습니다.
+
+메시지에 cache_control 표시가 있으면 Anthropic 프롬프트 캐싱을 흉내 냅니다. 표시된
+prefix를 서버 메모리에 기록해 두고, 다음 요청에서 같은 prefix가 오면 usage에
+cache_read_input_tokens / cache_creation_input_tokens(와 prompt_tokens_details.cached_tokens)를
+채웁니다. --prefill-tokens-per-second를 주면 캐시에서 읽지 못한 prompt 토큰만큼 첫 토큰이 늦어집니다.
+
+응답 본문은 기본적으로 "tok0 tok1 ..."이며, --replay로 녹화된 응답을 순서대로 돌려줄 수 있습니다
+(JSONL의 content/message/response 필드, completion 응답 JSON, 또는 chat_history/*.json의
+assistant 메시지). --error-rate / --disconnect-rate로 오류 응답(기본 429)과 스트림 중간 끊김을
+섞을 수 있고, --seed를 주면 같은 순서로 재현됩니다.
+
+    python benchmarks/mock_provider.py --port 8765 [--tls] [--latency 0.2] [--tokens-per-second 50]
+    python benchmarks/mock_provider.py --replay chat_history/ --error-rate 0.05 --seed 1
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import random
+import re
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+import socket
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+
+class MockConfig:
+    def __init__(self, latency: float = 0.0, tokens_per_second: float = 0.0, response_tokens: int = 32,
+                 prefill_tokens_per_second: float = 0.0, cache_ttl: float = 300.0,
+                 responses: Optional[List[str]] = None, error_rate: float = 0.0, error_status: int = 429,
+                 disconnect_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.prefill_tokens_per_second = prefill_tokens_per_second
+        self.cache_ttl = cache_ttl
+        # 녹화된 응답 (요청마다 다음 것을 돌려주고 끝나면 처음부터 반복). 없으면 합성 응답
+        self.responses = responses or []
+        self.error_rate = error_rate
+        self.error_status = error_status
+        # 스트리밍 응답을 절반쯤 보내고 연결을 끊는 비율
+        self.disconnect_rate = disconnect_rate
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self._response_index = itertools.count()
+        # 프롬프트 캐시: prefix 해시 -> 만료 시각
+        self.prompt_cache = {}
+        self.prompt_cache_lock = threading.Lock()
+
+
+def _message_text(message: dict) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return "".join(str(block.get("text", "")) for block in content if isinstance(block, dict))
+    return str(content)
+
+
+def _has_cache_control(message: dict) -> bool:
+    content = message.get("content")
+    return isinstance(content, list) and any(isinstance(block, dict) and "cache_control" in block for block in content)
+
+
+def message_tokens(message: dict) -> int:
+    return len(_message_text(message)) // 4 + 4
+
+
+def _recorded_texts(record) -> List[str]:
+    """JSON 값 하나에서 재생할 응답 본문을 꺼냅니다."""
+    if isinstance(record, list):
+        return [text for item in record for text in _recorded_texts(item)]
+    if not isinstance(record, dict):
+        return []
+    if "messages" in record:  # chat_history 파일
+        return _recorded_texts(record["messages"])
+    if "choices" in record:  # completion 응답
+        return [choice["message"]["content"] for choice in record["choices"] if choice.get("message")]
+    if "role" in record:  # 채팅 메시지
+        return [str(record.get("content") or "")] if record["role"] == "assistant" else []
+    if "speaker" in record:  # 대화 transcript 항목
+        return [str(record.get("message") or "")] if record["speaker"] != "user" else []
+    text = record.get("content") or record.get("response") or record.get("message")
+    return [str(text)] if text else []
+
+
+def load_recording(path: str) -> List[str]:
+    """녹화 파일(JSONL/JSON) 또는 그런 파일이 든 디렉토리에서 응답 본문 목록을 읽습니다."""
+    if os.path.isdir(path):
+        paths = sorted(os.path.join(path, name) for name in os.listdir(path)
+                       if name.endswith((".json", ".jsonl")) and not name.startswith("."))
+    else:
+        paths = [path]
+    texts = []
+    for file_path in paths:
+        with open(file_path, "r", encoding="utf-8") as f:
+            if file_path.endswith(".jsonl"):
+                records = [json.loads(line) for line in f if line.strip()]
+            else:
+                records = [json.load(f)]
+        texts.extend(text for record in records for text in _recorded_texts(record) if text)
+    return texts
+
+
+class MockProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    config = MockConfig()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def response_tokens(self, request: dict):
+        if self.config.responses:
+            # 녹화된 응답은 단어(+뒤 공백) 단위를 토큰으로 보고 max_tokens에서 자름
+            text = self.config.responses[next(self.config._response_index) % len(self.config.responses)]
+            tokens = re.findall(r"\S+\s*|\s+", text)
+            return tokens[:int(request["max_tokens"])] if request.get("max_tokens") else tokens
+        count = min(int(request.get("max_tokens") or self.config.response_tokens), self.config.response_tokens)
+        return [f"tok{i} " for i in range(count)]
+
+    def _roll(self, rate: float) -> bool:
+        if not rate:
+            return False
+        with self.config.rng_lock:
+            return self.config.rng.random() < rate
+
+    def _send_error(self) -> None:
+        status = self.config.error_status
+        body = json.dumps({"error": {"message": f"injected error {status}", "type": "mock_error",
+                                     "code": status}}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 429:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/") in ("/health", "/v1/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "mock-model", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+        request = self._read_json()
+        if self._roll(self.config.error_rate):
+            if self.config.latency:
+                time.sleep(self.config.latency)
+            self._send_error()
+            return
+        tokens = self.response_tokens(request)
+        usage = self.prompt_usage(request)
+        if self.config.latency:
+            time.sleep(self.config.latency)
+        if self.config.prefill_tokens_per_second:
+            uncached = usage["prompt_tokens"] - usage.get("cache_read_input_tokens", 0)
+            time.sleep(uncached / self.config.prefill_tokens_per_second)
+        if request.get("stream"):
+            self._stream(request, tokens, usage)
+        else:
+            if self.config.tokens_per_second:
+                time.sleep(len(tokens) / self.config.tokens_per_second)
+            self._send_json(200, self.completion_payload(request, "".join(tokens), usage, len(tokens)))
+
+    def prompt_usage(self, request: dict) -> dict:
+        """prompt 토큰 수와, cache_control이 있으면 Anthropic 방식의 캐시 읽기/쓰기 토큰 수."""
+        messages = request.get("messages", [])
+        usage = {"prompt_tokens": sum(message_tokens(m) for m in messages)}
+        if not any(_has_cache_control(m) for m in messages):
+            return usage
+
+        # 메시지 경계마다 prefix 해시를 만들고, 캐시에 있는 가장 긴 prefix를 읽은 것으로 봄
+        digest = hashlib.sha256()
+        prefixes, breakpoints = [], []
+        position = 0
+        for message in messages:
+            digest.update(json.dumps([message.get("role"), _message_text(message)]).encode("utf-8"))
+            position += message_tokens(message)
+            prefixes.append((digest.hexdigest(), position))
+            if _has_cache_control(message):
+                breakpoints.append(len(prefixes) - 1)
+
+        now = time.monotonic()
+        cache = self.config.prompt_cache
+        with self.config.prompt_cache_lock:
+            read = max((tokens for key, tokens in prefixes[:breakpoints[-1] + 1] if cache.get(key, 0) > now),
+                       default=0)
+            for index in breakpoints:
+                cache[prefixes[index][0]] = now + self.config.cache_ttl
+        usage["cache_read_input_tokens"] = read
+        usage["cache_creation_input_tokens"] = max(prefixes[breakpoints[-1]][1] - read, 0)
+        usage["prompt_tokens_details"] = {"cached_tokens": read}
+        return usage
+
+    def completion_payload(self, request: dict, text: str, usage: dict, completion_tokens: int) -> dict:
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock-model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop",
+            }],
+            "usage": dict(usage, completion_tokens=completion_tokens,
+                          total_tokens=usage["prompt_tokens"] + completion_tokens),
+        }
+
+    def _stream(self, request: dict, tokens, usage: dict) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        disconnect_at = len(tokens) // 2 if self._roll(self.config.disconnect_rate) else None
+        for index, token in enumerate(tokens):
+            if index == disconnect_at:
+                # 종료 chunk 없이 연결을 끊음 (클라이언트는 불완전한 응답을 받음)
+                self.close_connection = True
+                self.connection.shutdown(socket.SHUT_RDWR)
+                return
+            if self.config.tokens_per_second:
+                time.sleep(1.0 / self.config.tokens_per_second)
+            self._write_event({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": request.get("model", "mock-model"),
+                "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+            })
+        self._write_event({
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": request.get("model", "mock-model"),
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        })
+        if (request.get("stream_options") or {}).get("include_usage"):
+            self._write_event({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": request.get("model", "mock-model"),
+                "choices": [],
+                "usage": dict(usage, completion_tokens=len(tokens),
+                              total_tokens=usage["prompt_tokens"] + len(tokens)),
+            })
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _write_event(self, payload: dict) -> None:
+        self._write_chunk(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+def make_self_signed_cert(directory: str):
+    """openssl CLI로 localhost용 자체 서명 인증서를 만듭니다."""
+    certfile = os.path.join(directory, "cert.pem")
+    keyfile = os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1",
+         "-keyout", keyfile, "-out", certfile],
+        check=True, capture_output=True,
+    )
+    return certfile, keyfile
+
+
+def start_mock_provider(port: int = 0, tls: bool = False, config: MockConfig = None,
+                        handler_class=MockProviderHandler):
+    """백그라운드 스레드에서 mock 서버를 시작하고 (server, base_url, certfile)을 반환합니다."""
+    handler = type("ConfiguredMockHandler", (handler_class,), {"config": config or MockConfig()})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    certfile = None
+    scheme = "http"
+    if tls:
+        certfile, keyfile = make_self_signed_cert(tempfile.mkdtemp(prefix="mock_provider_"))
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certfile, keyfile)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        scheme = "https"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"{scheme}://localhost:{server.server_address[1]}/v1", certfile
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible mock provider")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--tls", action="store_true")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--response-tokens", type=int, default=32)
+    parser.add_argument("--prefill-tokens-per-second", type=float, default=0.0,
+                        help="uncached prompt tokens processed per second before the first token")
+    parser.add_argument("--replay", default=None, metavar="PATH",
+                        help="replay recorded responses from a JSONL/JSON file or a directory such as chat_history/")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with an error")
+    parser.add_argument("--error-status", type=int, default=429)
+    parser.add_argument("--disconnect-rate", type=float, default=0.0,
+                        help="fraction of streamed responses cut off halfway")
+    parser.add_argument("--seed", type=int, default=None, help="seed for reproducible error injection")
+    args = parser.parse_args()
+
+    config = MockConfig(args.latency, args.tokens_per_second, args.response_tokens, args.prefill_tokens_per_second,
+                        responses=load_recording(args.replay) if args.replay else None,
+                        error_rate=args.error_rate, error_status=args.error_status,
+                        disconnect_rate=args.disconnect_rate, seed=args.seed)
+    server, base_url, _ = start_mock_provider(args.port, args.tls, config)
+    print(f"Mock provider listening on {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""엔드투엔드 벤치마크 모음.
+
+로컬 mock provider(benchmarks/mock_provider.py)를 프로세스 안에서 띄우고, 임시 작업 디렉토리에
+현실적인 크기의 데이터(채팅 기록, 시스템 프롬프트)를 만든 뒤 다음을 측정합니다.
+
+    chat_turn            Chat 페이지(AppTest)에서 메시지를 보내고 응답이 그려질 때까지
+    stream_render        StreamRenderer로 긴 응답을 그릴 때 토큰당 CPU 시간과 render 호출 수
+    dialogue_throughput  두 에이전트 대화의 초당 턴 수와 첫 토큰까지 시간 (스트리밍 on/off)
+    history_listing      채팅 기록 목록 첫 페이지 조회 (인덱스 재구성 / cold / warm)
+    prompt_loading       시스템 프롬프트 목록 로드 (cold / warm)
+
+결과는 benchmarks/results/suite/<시각>.json에 git 커밋, 설정과 함께 저장되고, 직전 실행
+(없으면 suite_baseline.json, 또는 --compare로 지정한 파일)과 비교한 변화율을 출력합니다.
+
+    python benchmarks/run_suite.py [--quick] [--only chat_turn dialogue_throughput]
+    python benchmarks/run_suite.py --replay chat_history/ --error-rate 0.02 --seed 1
+    python benchmarks/run_suite.py --update-baseline
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, "results", "suite")
+BASELINE_PATH = os.path.join(BENCH_DIR, "results", "suite_baseline.json")
+sys.path.insert(0, ROOT)
+
+from mock_provider import MockConfig, load_recording, start_mock_provider  # noqa: E402
+
+WORDS = ("prompt model token latency stream cache agent dialogue summary context window budget "
+         "프롬프트 모델 토큰 대화 요약 응답 시스템 캐시 스트리밍 에이전트").split()
+# (전체 실행, --quick) 데이터 크기
+SIZES = {
+    "chat_turns": (10, 3),
+    "stream_tokens": (4000, 1000),
+    "dialogue_turns": (10, 4),
+    "histories": (2000, 200),
+    "history_messages": (20, 20),
+    "prompts": (500, 50),
+}
+
+
+def percentile(samples, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def timed(fn) -> float:
+    """fn()을 실행하고 걸린 시간(ms)을 반환합니다."""
+    started = time.perf_counter()
+    fn()
+    return (time.perf_counter() - started) * 1000
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def bench_chat_turn(size) -> dict:
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, "pages", "1_Chat.py"), default_timeout=120).run()
+    samples = []
+    for turn in range(size("chat_turns")):
+        samples.append(timed(lambda: at.chat_input[0].set_value(f"Question {turn}: what should we try next?").run()))
+        if at.exception:
+            raise RuntimeError(f"chat page failed: {at.exception[0].value}")
+    # 첫 턴은 litellm import와 연결 수립이 포함되므로 따로 기록
+    return {"first_turn_ms": samples[0], "turn_p50_ms": statistics.median(samples[1:] or samples),
+            "turn_p95_ms": percentile(samples[1:] or samples, 0.95)}
+
+
+def bench_stream_render(size) -> dict:
+    from bench_stream_render import CountingContainer, FakeClock, synthetic_tokens
+    from stream_renderer import StreamRenderer
+
+    tokens = synthetic_tokens(size("stream_tokens"))
+    container, clock = CountingContainer(), FakeClock()
+    renderer = StreamRenderer(container, clock=clock)
+    started = time.process_time()
+    for token in tokens:
+        clock.now += 1 / 60  # 60 tok/s로 도착
+        renderer.write(token)
+    renderer.close()
+    cpu = time.process_time() - started
+    return {"cpu_us_per_token": cpu / len(tokens) * 1e6, "render_calls": container.render_calls,
+            "bytes_pushed": container.bytes_pushed}
+
+
+def bench_dialogue_throughput(size) -> dict:
+    from llm_core.dialogue import LLMAgent, LLMDialogue
+
+    results = {}
+    turns = size("dialogue_turns")
+    for stream in (False, True):
+        dialogue = LLMDialogue(
+            LLMAgent("Agent 1", "You are a helpful assistant.", "gpt-4o", "OpenAI (Default)", "mock-key"),
+            LLMAgent("Agent 2", "You are a curious assistant.", "gpt-4o", "OpenAI (Default)", "mock-key"),
+            stream=stream,
+        )
+        started = time.perf_counter()
+        first_delta = None
+        for event in dialogue.run("Hello! Let's start a conversation.", turns):
+            # 비스트리밍 모드는 첫 턴이 끝나야 출력이 생김
+            if event.kind in ("delta", "turn_end") and first_delta is None:
+                first_delta = time.perf_counter() - started
+        elapsed = time.perf_counter() - started
+        mode = "stream" if stream else "blocking"
+        results[f"{mode}_turns_per_s"] = turns / elapsed
+        results[f"{mode}_first_output_ms"] = first_delta * 1000
+        results[f"{mode}_errors"] = sum(len(agent.errors) for agent in dialogue.agents)
+    return results
+
+
+def bench_history_listing(size) -> dict:
+    from llm_core import history_store
+
+    rng = random.Random(0)
+    directory = "chat_history"
+    for index in range(size("histories")):
+        messages = [{"role": "user" if i % 2 == 0 else "assistant", "content": sentence(rng, rng.randint(10, 80))}
+                    for i in range(size("history_messages"))]
+        history_store.save_chat_history(messages, f"chat_{index:06d}.json", directory)
+
+    # 인덱스가 없는 기존 디렉토리 (JSON 파일에서 다시 만듦)
+    os.remove(history_store.index_path(directory))
+    rebuild = timed(lambda: history_store.ChatHistoryIndex(directory).list(limit=50))
+    # 새 프로세스가 기존 인덱스를 여는 경우
+    cold = timed(lambda: history_store.ChatHistoryIndex(directory).list(limit=50))
+    index = history_store.ChatHistoryIndex(directory)
+    index.list(limit=50)
+    warm = [timed(lambda: (index.count(), index.list(limit=50, offset=100))) for _ in range(50)]
+    return {"rebuild_ms": rebuild, "cold_list_ms": cold, "warm_list_p50_ms": statistics.median(warm)}
+
+
+def bench_prompt_loading(size) -> dict:
+    from llm_core.prompt_store import SystemPromptStore, save_system_prompt
+
+    rng = random.Random(0)
+    for index in range(size("prompts")):
+        body = "\n\n".join(sentence(rng, rng.randint(40, 120)) for _ in range(rng.randint(5, 30)))
+        save_system_prompt(f"prompt_{index:04d}", body, description=sentence(rng, 8))
+
+    cold = timed(lambda: SystemPromptStore().refresh())
+    store = SystemPromptStore()
+    store.refresh()
+    warm = [timed(store.refresh) for _ in range(50)]
+    return {"cold_ms": cold, "warm_p50_ms": statistics.median(warm)}
+
+
+BENCHMARKS = {
+    "chat_turn": bench_chat_turn,
+    "stream_render": bench_stream_render,
+    "dialogue_throughput": bench_dialogue_throughput,
+    "history_listing": bench_history_listing,
+    "prompt_loading": bench_prompt_loading,
+}
+
+
+def git_commit() -> str:
+    result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    return result.stdout.strip() or "unknown"
+
+
+def previous_run(exclude: str = None):
+    """가장 최근에 저장된 실행 결과 경로. 없으면 기준값 파일(있으면)."""
+    runs = sorted(path for path in glob.glob(os.path.join(RESULTS_DIR, "*.json")) if path != exclude)
+    if runs:
+        return runs[-1]
+    return BASELINE_PATH if os.path.exists(BASELINE_PATH) else None
+
+
+def higher_is_better(metric: str) -> bool:
+    return metric.endswith("_per_s")
+
+
+def print_comparison(results: dict, previous: dict, threshold: float) -> int:
+    """이전 실행과 비교한 표를 출력하고, threshold보다 나빠진 지표 수를 반환합니다."""
+    regressions = 0
+    print(f"{'benchmark.metric':<48}{'now':>12}{'before':>12}{'change':>10}")
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            before = previous.get(name, {}).get(metric)
+            change_text, flag = "", ""
+            if isinstance(before, (int, float)) and before:
+                change = (value - before) / before
+                change_text = f"{change:+.0%}"
+                worse = -change if higher_is_better(metric) else change
+                if worse > threshold and not metric.endswith(("_calls", "_pushed", "_errors")):
+                    flag = "  slower"
+                    regressions += 1
+            before_text = f"{before:,.2f}" if isinstance(before, (int, float)) else "-"
+            print(f"{name + '.' + metric:<48}{value:>12,.2f}{before_text:>12}{change_text:>10}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark suite against the local mock provider")
+    parser.add_argument("--only", nargs="*", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--quick", action="store_true", help="smaller data sizes for a fast check")
+    parser.add_argument("--latency", type=float, default=0.05, help="mock seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--response-tokens", type=int, default=64)
+    parser.add_argument("--replay", default=None, metavar="PATH", help="replay recorded responses (see mock_provider.py)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compare", default=None, metavar="FILE", help="result file to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="flag metrics that got worse by more than this")
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    column = 1 if args.quick else 0
+
+    def size(name: str) -> int:
+        return SIZES[name][column]
+
+    config = MockConfig(args.latency, args.tokens_per_second, args.response_tokens,
+                        responses=load_recording(args.replay) if args.replay else None,
+                        error_rate=args.error_rate, seed=args.seed)
+    server, base_url, _ = start_mock_provider(config=config)
+    os.environ.update({"OPENAI_API_KEY": "mock-key", "OPENAI_BASE_URL": base_url, "OPENAI_API_BASE": base_url})
+
+    # 상대 경로(chat_history/, system_prompts/, .cache/)는 모두 임시 디렉토리 아래에 만들어짐
+    previous_cwd = os.getcwd()
+    work_dir = tempfile.mkdtemp(prefix="llm_bench_")
+    os.chdir(work_dir)
+    results = {}
+    try:
+        for name in args.only:
+            started = time.perf_counter()
+            results[name] = BENCHMARKS[name](size)
+            print(f"{name} done in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    finally:
+        os.chdir(previous_cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+        server.shutdown()
+
+    record = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "quick": args.quick,
+        "mock": {"latency": args.latency, "tokens_per_second": args.tokens_per_second,
+                 "response_tokens": args.response_tokens, "replay": args.replay,
+                 "error_rate": args.error_rate, "seed": args.seed},
+        "results": results,
+    }
+    saved_path = None
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        saved_path = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{record['commit']}.json")
+        with open(saved_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2, ensure_ascii=False)
+
+    compare_path = args.compare or previous_run(exclude=saved_path)
+    previous = {}
+    if compare_path:
+        with open(compare_path, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        if previous.get("quick") != args.quick or previous.get("mock") != record["mock"]:
+            print(f"note: {os.path.relpath(compare_path, ROOT)} used different settings "
+                  f"(quick={previous.get('quick')}, mock={previous.get('mock')})")
+        print(f"comparing with {os.path.relpath(compare_path, ROOT)} (commit {previous.get('commit', '?')})")
+    print_comparison(results, previous.get("results", {}), args.threshold)
+
+    if saved_path:
+        print(f"results written to {os.path.relpath(saved_path, ROOT)}")
+    if args.update_baseline:
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2, ensure_ascii=False)
+        print(f"baseline written to {os.path.relpath(BASELINE_PATH, ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
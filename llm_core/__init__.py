@@ -0,0 +1,16 @@
+"""Streamlit 없이 쓸 수 있는 코어 패키지.
+
+에이전트/대화 엔진, completion 파라미터 구성, 프롬프트·채팅 저장소를 담고 있습니다.
+litellm 같은 무거운 모듈은 첫 completion 호출 때 불러오므로 import가 가볍습니다.
+
+    python -m llm_core dialogue --prompts a.md b.md --turns 20
+"""
+from .config import providers, provider_models
+from .dialogue import LLMAgent, LLMDialogue, MultiAgentDialogue, run_dialogues
+from .schedulers import ModeratorScheduler, PanelScheduler, RoundRobinScheduler
+from .provider_clients import build_completion_params, completion, acompletion
+from .prompt_store import get_system_prompt_store, parse_system_prompt
+from .prompt_library import get_prompt_library
+from .job_queue import get_job_queue
+from .settings import ChatSettings, get_config_service
+from .history_store import get_chat_history_index, load_chat_history, save_chat_history
@@ -0,0 +1,146 @@
+"""llm_core 명령줄 도구.
+
+    python -m llm_core dialogue --prompts a.md b.md --turns 20
+    python -m llm_core batch dataset.jsonl --prompts a.md b.md --output results.jsonl
+"""
+import argparse
+import json
+import os
+import sys
+from typing import List
+
+from .config import providers, provider_models
+
+
+def load_dotenv() -> None:
+    """.env가 있으면 환경 변수로 읽습니다 (python-dotenv가 없으면 무시)."""
+    try:
+        import dotenv
+    except ImportError:
+        return
+    dotenv.load_dotenv()
+
+
+def resolve_system_prompt(value: str) -> str:
+    """마크다운 파일 경로나 system_prompts에 저장된 프롬프트 이름을 프롬프트 본문으로 바꿉니다."""
+    from .prompt_store import get_system_prompt_store, parse_system_prompt
+
+    if os.path.isfile(value):
+        with open(value, "r", encoding="utf-8") as f:
+            return parse_system_prompt(f.read())[0]
+    store = get_system_prompt_store()
+    store.refresh()
+    prompt = store.get(value)
+    if prompt is None:
+        raise SystemExit(f"System prompt not found: {value}")
+    return prompt["content"]
+
+
+def add_agent_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--prompts", nargs=2, required=True, metavar=("AGENT1", "AGENT2"),
+                        help="system prompt .md files or names saved in system_prompts/")
+    parser.add_argument("--names", nargs=2, default=["Agent 1", "Agent 2"], metavar=("NAME1", "NAME2"))
+    parser.add_argument("--provider", default="OpenAI (Default)", choices=list(providers))
+    parser.add_argument("--model", default=None, help="defaults to the provider's first model")
+    parser.add_argument("--temperature", type=float, default=0.7)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--stream", action="store_true",
+                        help="stream each turn and send the next agent's request as soon as a turn ends")
+    parser.add_argument("--stop-similarity", type=float, default=None, metavar="RATIO",
+                        help="stop when a reply's word 3-gram overlap with a recent reply reaches RATIO (e.g. 0.8)")
+    parser.add_argument("--token-budget", type=int, default=None, help="stop once both agents used this many tokens")
+    parser.add_argument("--deadline", type=float, default=None, metavar="SECONDS",
+                        help="stop starting new turns after this many seconds")
+
+
+def make_dialogue_factory(args):
+    from .dialogue import LLMAgent, LLMDialogue
+    from .stop_conditions import build_stop_conditions
+
+    system_prompts: List[str] = [resolve_system_prompt(p) for p in args.prompts]
+    model = args.model or provider_models[args.provider][0]
+    api_key = os.getenv(providers[args.provider])
+    if not api_key:
+        raise SystemExit(f"{providers[args.provider]} is not set")
+
+    stop_conditions = build_stop_conditions(args.stop_similarity, args.token_budget, args.deadline)
+
+    def make_dialogue():
+        return LLMDialogue(
+            LLMAgent(args.names[0], system_prompts[0], model, args.provider, api_key, temperature=args.temperature),
+            LLMAgent(args.names[1], system_prompts[1], model, args.provider, api_key, temperature=args.temperature),
+            stop_conditions=stop_conditions, stream=args.stream,
+        )
+
+    return make_dialogue
+
+
+def run_dialogue(args) -> None:
+    from .history_store import save_chat_history
+
+    dialogue = make_dialogue_factory(args)()
+    if args.json:
+        conversation = dialogue.conduct_dialogue(args.message, args.turns)
+        print(json.dumps(conversation, ensure_ascii=False, indent=2))
+    else:
+        # 턴을 받는 대로 출력 (--stream이면 토큰 단위로)
+        print(f"[0] user: {args.message}\n")
+        for event in dialogue.run(args.message, args.turns):
+            if event.kind == "turn_start":
+                print(f"[{event.turn}] {event.speaker}: ", end="", flush=True)
+            elif event.kind == "delta":
+                print(event.text, end="", flush=True)
+            elif event.kind == "turn_end":
+                print("\n")
+        conversation = dialogue.conversation_history.to_list()
+    if dialogue.stop_reason:
+        print(f"Stopped early ({dialogue.stop_reason})", file=sys.stderr)
+    if args.save:
+        print(f"Conversation saved to {save_chat_history(conversation)}", file=sys.stderr)
+
+
+def run_batch_command(args) -> None:
+    from .batch_eval import export_parquet, load_dataset, results_frame, run_batch, summarize
+
+    make_dialogue = make_dialogue_factory(args)
+
+    def report_progress(record, finished, total):
+        status = "error" if record["error"] else "ok"
+        print(f"[{finished}/{total}] {record['id']} {status} {record['latency']:.1f}s", file=sys.stderr, flush=True)
+
+    rows = load_dataset(args.dataset)
+    run_batch(rows, make_dialogue, args.output, args.turns, args.workers, report_progress)
+    print(json.dumps(summarize(results_frame(args.output)), indent=2))
+    if args.parquet:
+        print(f"Parquet written to {export_parquet(args.output)}", file=sys.stderr)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m llm_core", description="Headless LLM dialogue tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    dialogue_parser = subparsers.add_parser("dialogue", help="run one agent-to-agent dialogue")
+    add_agent_arguments(dialogue_parser)
+    dialogue_parser.add_argument("--message", default="Hello! Let's start a conversation.", help="initial message")
+    dialogue_parser.add_argument("--json", action="store_true", help="print the conversation as JSON")
+    dialogue_parser.add_argument("--save", action="store_true", help="save the conversation to chat_history/")
+    dialogue_parser.set_defaults(func=run_dialogue)
+
+    batch_parser = subparsers.add_parser("batch", help="run a dialogue for every row of a JSONL/CSV dataset")
+    batch_parser.add_argument("dataset", help="JSONL or CSV file with a message/initial_message/input/prompt column")
+    add_agent_arguments(batch_parser)
+    batch_parser.add_argument("--workers", type=int, default=4)
+    batch_parser.add_argument("--output", default="batch_results.jsonl", help="results JSONL (also the resume checkpoint)")
+    batch_parser.add_argument("--parquet", action="store_true", help="also write a Parquet copy of the results")
+    batch_parser.set_defaults(func=run_batch_command)
+    return parser
+
+
+def main(argv=None) -> None:
+    args = build_parser().parse_args(argv)
+    load_dotenv()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
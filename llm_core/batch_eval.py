@@ -0,0 +1,204 @@
+"""시스템 프롬프트 배치 평가 파이프라인.
+
+JSONL/CSV 데이터셋의 각 행(첫 메시지)으로 두 에이전트 대화를 실행하고, 결과를 JSONL로
+한 줄씩 기록합니다. 출력 파일이 곧 체크포인트라서 중단된 실행은 같은 명령으로 이어서
+돌릴 수 있습니다.
+
+    python -m llm_core batch dataset.jsonl --prompts a.md b.md --model gpt-4o-mini --output results.jsonl
+"""
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+DATASET_MESSAGE_FIELDS = ("message", "initial_message", "input", "prompt")
+LATENCY_PERCENTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+def _row_message(row: Dict) -> Optional[str]:
+    for field in DATASET_MESSAGE_FIELDS:
+        value = row.get(field)
+        # 비어 있지 않은 문자열만 메시지로 씀 (NaN, None, 숫자 등은 건너뜀)
+        if isinstance(value, str) and value.strip():
+            return value
+    return None
+
+
+def load_dataset(source, filename: Optional[str] = None) -> List[Dict]:
+    """JSONL 또는 CSV 데이터셋을 [{"id", "message"}] 목록으로 읽습니다.
+
+    source는 파일 경로나 파일 객체(예: st.file_uploader 결과)이며, 메시지 컬럼은
+    message / initial_message / input / prompt 중 하나입니다.
+    """
+    filename = filename or getattr(source, "name", None) or str(source)
+    if filename.lower().endswith(".csv"):
+        import pandas as pd
+        # 모든 칸을 문자열로 읽음 (빈 칸은 NaN 대신 "", 숫자 id가 1.0이 되지 않음)
+        records = pd.read_csv(source, dtype=str, keep_default_na=False).to_dict(orient="records")
+    else:
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, "r", encoding="utf-8") as f:
+                text = f.read()
+        else:
+            text = source.read()
+            if isinstance(text, bytes):
+                text = text.decode("utf-8")
+        records = [json.loads(line) for line in io.StringIO(text) if line.strip()]
+
+    rows = []
+    for index, record in enumerate(records):
+        message = _row_message(record)
+        if message is None:
+            continue
+        row_id = record.get("id")
+        rows.append({"id": str(index if row_id is None or row_id == "" else row_id), "message": message})
+    return rows
+
+
+def read_results(output_path: str) -> List[Dict]:
+    """출력 JSONL을 읽습니다. 같은 id가 여러 번 있으면 마지막 기록을 사용합니다."""
+    if not os.path.exists(output_path):
+        return []
+    latest = {}
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # 크래시로 잘린 마지막 줄
+            latest[record["id"]] = record
+    return list(latest.values())
+
+
+def completed_ids(output_path: str) -> Set[str]:
+    """오류 없이 끝난 행의 id. 오류가 난 행은 재개 시 다시 실행합니다."""
+    return {record["id"] for record in read_results(output_path) if not record.get("error")}
+
+
+class RowCancelled(Exception):
+    """should_cancel()이 참이 되어 행 실행을 중간에 멈출 때 던집니다."""
+
+
+def run_row(row: Dict, make_dialogue: Callable, max_turns: int,
+            should_cancel: Optional[Callable[[], bool]] = None) -> Optional[Dict]:
+    """데이터셋 한 행에 대해 대화를 실행하고 결과 레코드를 반환합니다.
+
+    should_cancel()이 참이면 요청을 보내기 전(시작 전, 턴 사이)에 멈추고 None을 반환합니다.
+    기록하지 않으므로 재개할 때 다시 실행됩니다.
+    """
+    def on_turn(entry: Dict) -> None:
+        if should_cancel():
+            raise RowCancelled(row["id"])
+
+    if should_cancel and should_cancel():
+        return None
+    dialogue = make_dialogue()
+    started = time.perf_counter()
+    try:
+        conversation = dialogue.conduct_dialogue(row["message"], max_turns, on_turn if should_cancel else None)
+        error = next((e for agent in dialogue.agents for e in agent.errors), None)
+    except RowCancelled:
+        return None
+    except Exception as e:
+        conversation, error = dialogue.conversation_history.to_list(), str(e)
+    agents = dialogue.all_agents
+    return {
+        "id": row["id"],
+        "message": row["message"],
+        "conversation": conversation,
+        "turns": len(conversation) - 1,
+        "latency": time.perf_counter() - started,
+        "prompt_tokens": sum(agent.usage["prompt_tokens"] for agent in agents),
+        "completion_tokens": sum(agent.usage["completion_tokens"] for agent in agents),
+        "cache_read_tokens": sum(agent.usage["cache_read_tokens"] for agent in agents),
+        "cache_write_tokens": sum(agent.usage["cache_write_tokens"] for agent in agents),
+        "error": error,
+        "stop_reason": dialogue.stop_reason,
+        "finished_at": datetime.now().isoformat(),
+    }
+
+
+def run_batch(rows: Iterable[Dict], make_dialogue: Callable, output_path: str, max_turns: int = 5,
+              max_workers: int = 4, on_result: Optional[Callable[[Dict, int, int], None]] = None,
+              should_cancel: Optional[Callable[[], bool]] = None) -> int:
+    """아직 끝나지 않은 행들을 제한된 worker pool로 실행하고, 끝나는 대로 JSONL에 추가합니다.
+
+    on_result(record, finished, total)은 각 행이 끝날 때마다 호출됩니다. 실행한 행 수를 반환합니다.
+    should_cancel()이 참이 되면 실행 중인 행은 다음 요청 전에 멈추고 남은 행은 시작하지 않습니다.
+    on_result가 예외를 던져도(작업 취소 등) 아직 시작하지 않은 행은 실행하지 않습니다.
+    """
+    done = completed_ids(output_path)
+    pending = [row for row in rows if row["id"] not in done]
+    if os.path.dirname(output_path):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    write_lock = threading.Lock()
+    finished = 0
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch-eval")
+    try:
+        with open(output_path, "a", encoding="utf-8") as out:
+            futures = [executor.submit(run_row, row, make_dialogue, max_turns, should_cancel) for row in pending]
+            for future in as_completed(futures):
+                record = future.result()
+                if record is None:
+                    continue  # 취소로 멈춘 행
+                with write_lock:
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    out.flush()
+                    os.fsync(out.fileno())
+                finished += 1
+                if on_result:
+                    on_result(record, finished, len(pending))
+    finally:
+        # 정상 종료면 모든 행이 이미 끝났고, 예외로 빠져나오면 대기 중인 행을 버리고 기다리지 않음
+        executor.shutdown(wait=False, cancel_futures=True)
+    return finished
+
+
+def results_frame(output_path: str):
+    """결과를 conversation 컬럼을 JSON 문자열로 바꾼 pandas DataFrame으로 반환합니다."""
+    import pandas as pd
+    records = read_results(output_path)
+    df = pd.DataFrame(records, columns=[
+        "id", "message", "conversation", "turns", "latency",
+        "prompt_tokens", "completion_tokens", "cache_read_tokens", "cache_write_tokens",
+        "error", "stop_reason", "finished_at",
+    ])
+    # 프롬프트 캐시 컬럼이 생기기 전에 기록된 행은 0
+    df[["cache_read_tokens", "cache_write_tokens"]] = df[["cache_read_tokens", "cache_write_tokens"]].fillna(0).astype(int)
+    df["conversation"] = df["conversation"].map(lambda c: json.dumps(c, ensure_ascii=False))
+    return df
+
+
+def export_parquet(output_path: str, parquet_path: Optional[str] = None) -> str:
+    """JSONL 결과를 Parquet으로 저장하고 경로를 반환합니다."""
+    parquet_path = parquet_path or os.path.splitext(output_path)[0] + ".parquet"
+    results_frame(output_path).to_parquet(parquet_path, index=False)
+    return parquet_path
+
+
+def summarize(df) -> Dict:
+    """행별 지연 시간/토큰 사용량의 집계 리포트를 반환합니다."""
+    report = {
+        "rows": int(len(df)),
+        "errors": int(df["error"].notna().sum()) if len(df) else 0,
+        "total_prompt_tokens": int(df["prompt_tokens"].sum()) if len(df) else 0,
+        "total_completion_tokens": int(df["completion_tokens"].sum()) if len(df) else 0,
+        "total_cache_read_tokens": int(df["cache_read_tokens"].sum()) if len(df) else 0,
+        "total_cache_write_tokens": int(df["cache_write_tokens"].sum()) if len(df) else 0,
+    }
+    # prompt 토큰 중 provider 프롬프트 캐시에서 읽은 비율
+    report["cache_hit_ratio"] = (report["total_cache_read_tokens"] / report["total_prompt_tokens"]
+                                 if report["total_prompt_tokens"] else 0.0)
+    if "stop_reason" in df:
+        report["stopped_early"] = int(df["stop_reason"].notna().sum())
+    if len(df):
+        report["latency_mean"] = float(df["latency"].mean())
+        for q in LATENCY_PERCENTILES:
+            report[f"latency_p{int(q * 100)}"] = float(df["latency"].quantile(q))
+            report[f"tokens_p{int(q * 100)}"] = float((df["prompt_tokens"] + df["completion_tokens"]).quantile(q))
+    return report
@@ -0,0 +1,239 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterator, List, Optional
+
+# 캐시 키에서 제외할 파라미터 (요청 결과와 무관하거나 비밀 값)
+EXCLUDED_KEYS = {"api_key", "stream", "client"}
+
+
+def make_cache_key(params: Dict) -> str:
+    """api_key 등을 제외한 요청 파라미터의 정규화된 해시를 반환합니다."""
+    canonical = {k: v for k, v in params.items() if k not in EXCLUDED_KEYS}
+    payload = json.dumps(canonical, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(params: Dict) -> bool:
+    """결정적인 요청(temperature 0)만 캐시합니다."""
+    return params.get("temperature") == 0 and params.get("n", 1) == 1
+
+
+def chunk_text(chunk) -> Optional[str]:
+    try:
+        return chunk.choices[0].delta.content
+    except (AttributeError, IndexError):
+        delta = getattr(chunk, "delta", None)
+        return getattr(delta, "text", None)
+
+
+def _response_text(response) -> Optional[str]:
+    """캐시할 본문 텍스트. 본문이 텍스트가 아닌 응답(tool call 등)은 None이며 캐시하지 않습니다."""
+    try:
+        content = response.choices[0].message.content
+    except (AttributeError, IndexError):
+        content = getattr(response, "content", None)
+    return content if isinstance(content, str) else None
+
+
+def _is_tool_call_chunk(chunk) -> bool:
+    try:
+        delta = chunk.choices[0].delta
+    except (AttributeError, IndexError):
+        return False
+    return bool(getattr(delta, "tool_calls", None) or getattr(delta, "function_call", None))
+
+
+def replay_chunk(text: str):
+    """캐시된 텍스트를 스트리밍 chunk 형태(OpenAI/Anthropic 접근 방식 모두)로 감쌉니다."""
+    return SimpleNamespace(
+        choices=[SimpleNamespace(delta=SimpleNamespace(content=text), finish_reason=None)],
+        delta=SimpleNamespace(text=text),
+        cached=True,
+    )
+
+
+def replay_response(text: str):
+    """캐시된 텍스트를 non-streaming 응답 형태로 감쌉니다."""
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=text, role="assistant"), finish_reason="stop")],
+        content=text,
+        cached=True,
+    )
+
+
+class CompletionCache:
+    """메모리 LRU + 디스크(SQLite) 2단계 completion 응답 캐시."""
+
+    def __init__(self, path: str = os.path.join(".cache", "completions.sqlite3"),
+                 ttl: float = 7 * 24 * 3600, max_memory_entries: int = 256, max_disk_entries: int = 10000):
+        self.path = path
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._schema_ready = False
+
+    @contextmanager
+    def _connect(self):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            if not self._schema_ready:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS completions (
+                        key TEXT PRIMARY KEY,
+                        chunks TEXT NOT NULL,
+                        expires_at REAL NOT NULL,
+                        accessed_at REAL NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_completions_accessed_at ON completions(accessed_at)")
+                self._schema_ready = True
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[List[str]]:
+        """캐시된 chunk 목록을 반환합니다. 없거나 만료되었으면 None."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry[1] > now:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self._memory.pop(key, None)
+
+        with self._connect() as conn:
+            row = conn.execute("SELECT chunks, expires_at FROM completions WHERE key = ?", (key,)).fetchone()
+            if row and row[1] > now:
+                conn.execute("UPDATE completions SET accessed_at = ? WHERE key = ?", (now, key))
+            elif row:
+                conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                row = None
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            chunks = json.loads(row[0])
+            self._remember(key, chunks, row[1])
+            self.hits += 1
+            return chunks
+
+    def set(self, key: str, chunks: List[str]) -> None:
+        """chunk 목록을 두 캐시 계층에 저장하고 초과분을 정리합니다."""
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._remember(key, chunks, expires_at)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?)",
+                (key, json.dumps(chunks, ensure_ascii=False), expires_at, now),
+            )
+            conn.execute("DELETE FROM completions WHERE expires_at <= ?", (now,))
+            conn.execute(
+                "DELETE FROM completions WHERE key IN ("
+                "SELECT key FROM completions ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_entries,),
+            )
+
+    def _remember(self, key: str, chunks: List[str], expires_at: float) -> None:
+        self._memory[key] = (chunks, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self.hits = self.misses = 0
+        with self._connect() as conn:
+            conn.execute("DELETE FROM completions")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "memory_entries": len(self._memory)}
+
+
+_cache: Optional[CompletionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_completion_cache() -> CompletionCache:
+    """프로세스 공용 CompletionCache를 반환합니다."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CompletionCache()
+        return _cache
+
+
+def _record_stream(stream, cache: CompletionCache, key: str) -> Iterator:
+    chunks = []
+    tool_call = False
+    for chunk in stream:
+        text = chunk_text(chunk)
+        if text:
+            chunks.append(text)
+        tool_call = tool_call or _is_tool_call_chunk(chunk)
+        yield chunk
+    # 스트림이 끝까지 소비된 경우에만 저장 (텍스트로 재생할 수 없는 tool call 응답은 제외)
+    if not tool_call:
+        cache.set(key, chunks)
+
+
+def _replay_stream(chunks: List[str]) -> Iterator:
+    for text in chunks:
+        if text:
+            yield replay_chunk(text)
+
+
+def cached_completion(completion_fn: Callable, params: Dict, cache: Optional[CompletionCache] = None):
+    """캐시를 거쳐 completion을 호출합니다. 스트리밍 hit은 저장된 chunk를 재생합니다."""
+    if cache is None or not is_cacheable(params):
+        return completion_fn(**params)
+
+    key = make_cache_key(params)
+    chunks = cache.get(key)
+    if chunks is not None:
+        # filter: 예전 버전이 저장한 None chunk 건너뜀
+        return _replay_stream(chunks) if params.get("stream") else replay_response("".join(filter(None, chunks)))
+
+    if params.get("stream"):
+        return _record_stream(completion_fn(**params), cache, key)
+    response = completion_fn(**params)
+    text = _response_text(response)
+    if text is not None:
+        cache.set(key, [text])
+    return response
+
+
+async def acached_completion(acompletion_fn: Callable, params: Dict, cache: Optional[CompletionCache] = None):
+    """cached_completion의 non-streaming async 버전입니다. SQLite 조회/저장은 스레드에서 실행합니다."""
+    if cache is None or not is_cacheable(params) or params.get("stream"):
+        return await acompletion_fn(**params)
+
+    key = make_cache_key(params)
+    chunks = await asyncio.to_thread(cache.get, key)
+    if chunks is not None:
+        return replay_response("".join(filter(None, chunks)))
+    response = await acompletion_fn(**params)
+    text = _response_text(response)
+    if text is not None:
+        await asyncio.to_thread(cache.set, key, [text])
+    return response
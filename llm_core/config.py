@@ -0,0 +1,14 @@
+# 공통으로 사용할 설정들
+providers = {
+    "OpenAI (Default)": "OPENAI_API_KEY",
+    "OpenAI (Backup)": "OPENAI_API_KEY_BACKUP",
+    "Anthropic": "ANTHROPIC_API_KEY",
+    "Azure": "AZURE_API_KEY",
+}
+
+provider_models = {
+    "OpenAI (Default)": ["gpt-4o", "gpt-4o-mini", "gpt-3.5-turbo"],
+    "OpenAI (Backup)": ["gpt-4o", "gpt-4o-mini", "gpt-3.5-turbo"],
+    "Anthropic": ["claude-3-opus-20240229", "claude-3-sonnet-20240229", "claude-2.1"],
+    "Azure": ["gpt-4", "gpt-3.5-turbo"],
+}
@@ -0,0 +1,119 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 모델별 컨텍스트 윈도우 크기 (provider_models에 있는 모델 기준)
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+    "gpt-3.5-turbo": 16385,
+    "gpt-4": 8192,
+    "claude-3-opus-20240229": 200000,
+    "claude-3-sonnet-20240229": 200000,
+    "claude-2.1": 200000,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# OpenAI cookbook 기준 메시지당/응답 프라이밍 오버헤드
+TOKENS_PER_MESSAGE = 4
+TOKENS_PER_REPLY = 3
+
+
+def get_context_budget(model: str, max_tokens: int, limit: Optional[int] = None) -> int:
+    """응답용 max_tokens를 제외하고 요청에 쓸 수 있는 토큰 예산을 반환합니다."""
+    window = MODEL_CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+    budget = window - max_tokens
+    if limit:
+        budget = min(budget, limit)
+    return max(budget, 0)
+
+
+class TokenCounter:
+    """tiktoken 기반 메시지 토큰 카운터. 메시지 내용별 카운트를 캐시합니다."""
+
+    def __init__(self, max_cache_size: int = 20000):
+        self.max_cache_size = max_cache_size
+        self._cache: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+        self._encodings: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get_encoding(self, model: str):
+        encoding = self._encodings.get(model)
+        if encoding is None:
+            try:
+                import tiktoken
+                try:
+                    encoding = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                # tiktoken이 없거나 인코딩 파일을 받을 수 없으면 길이 기반 추정
+                encoding = False
+            self._encodings[model] = encoding
+        return encoding
+
+    def count_text(self, text: str, model: str = "gpt-4o") -> int:
+        encoding = self._get_encoding(model)
+        name = encoding.name if encoding else "estimate"
+        key = (name, text)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        count = len(encoding.encode(text, disallowed_special=())) if encoding else (len(text) + 3) // 4
+
+        with self._lock:
+            self._cache[key] = count
+            if len(self._cache) > self.max_cache_size:
+                self._cache.popitem(last=False)
+        return count
+
+    def count_message(self, message: Dict, model: str = "gpt-4o") -> int:
+        content = message.get("content") or ""
+        if not isinstance(content, str):
+            content = "".join(part.get("text", "") for part in content if isinstance(part, dict))
+        return TOKENS_PER_MESSAGE + self.count_text(content, model)
+
+    def count_messages(self, messages: List[Dict], model: str = "gpt-4o") -> int:
+        return TOKENS_PER_REPLY + sum(self.count_message(m, model) for m in messages)
+
+
+token_counter = TokenCounter()
+
+
+def fit_messages(messages: List[Dict], model: str, budget: int,
+                 summarizer: Optional[Callable[[List[Dict]], str]] = None) -> Tuple[List[Dict], Dict]:
+    """예산에 맞도록 오래된 턴을 잘라낸 메시지 목록과 토큰 통계를 반환합니다.
+
+    맨 앞의 system 메시지와 마지막 메시지는 항상 유지합니다. summarizer가 주어지면
+    잘려나간 턴들을 요약한 system 메시지를 대신 넣습니다.
+    """
+    counts = [token_counter.count_message(m, model) for m in messages]
+    total = TOKENS_PER_REPLY + sum(counts)
+    stats = {"total_tokens": total, "sent_tokens": total, "saved_tokens": 0, "dropped_messages": 0}
+    if total <= budget or len(messages) <= 2:
+        return messages, stats
+
+    head = 1 if messages[0].get("role") == "system" else 0
+    used = total
+    cut = head
+    # 마지막 메시지는 남겨두고 앞에서부터 제거
+    while cut < len(messages) - 1 and used > budget:
+        used -= counts[cut]
+        cut += 1
+    # 남은 대화가 user 턴으로 시작하도록 질문이 잘린 답변도 함께 제거 (Anthropic은 system 다음 assistant를 거부함)
+    while cut < len(messages) - 1 and messages[cut].get("role") != "user":
+        used -= counts[cut]
+        cut += 1
+
+    kept = messages[:head] + messages[cut:]
+    dropped = messages[head:cut]
+    if summarizer and dropped:
+        summary = {"role": "system", "content": f"Summary of earlier conversation:\n{summarizer(dropped)}"}
+        kept = messages[:head] + [summary] + messages[cut:]
+        used += token_counter.count_message(summary, model)
+
+    stats.update(sent_tokens=used, saved_tokens=total - used, dropped_messages=len(dropped))
+    return kept, stats
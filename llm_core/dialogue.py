@@ -0,0 +1,445 @@
+import asyncio
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .completion_cache import CompletionCache, acached_completion, cached_completion, chunk_text
+from .context_window import fit_messages, get_context_budget, token_counter
+from .key_router import arouted_completion, routed_completion
+from .prompt_caching import cache_usage
+from .provider_clients import acompletion, build_completion_params, completion
+from .schedulers import RoundRobinScheduler, TurnScheduler
+from .stop_conditions import StopCondition
+from .telemetry import ainstrumented_completion, instrumented_completion
+from .transcript import Transcript, TranscriptView
+
+
+class RateLimiter:
+    """provider별 분당 요청 수 제한 (슬라이딩 윈도우)."""
+
+    def __init__(self, requests_per_minute: int, period: float = 60.0):
+        self.requests_per_minute = requests_per_minute
+        self.period = period
+        self._calls = deque()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= self.period:
+                    self._calls.popleft()
+                if len(self._calls) < self.requests_per_minute:
+                    self._calls.append(now)
+                    return
+                await asyncio.sleep(self.period - (now - self._calls[0]))
+
+
+class LLMAgent:
+    def __init__(self, name: str, system_prompt: str, model: str, provider: str, api_key: str,
+                 seed: Optional[int] = None, temperature: float = 0.7, cache: Optional[CompletionCache] = None,
+                 max_tokens: int = 300, top_p: float = 1.0, json_format: bool = False):
+        self.name = name
+        self.system_prompt = system_prompt
+        self.model = model
+        self.provider = provider
+        self.api_key = api_key
+        self.seed = seed
+        self.temperature = temperature
+        self.cache = cache
+        self.max_tokens = max_tokens
+        self.top_p = top_p
+        self.json_format = json_format
+        # 같은 계열의 다른 키들 (비어 있으면 api_key만 사용)
+        self.key_candidates: List[Tuple[str, str]] = []
+        self.context_limit: Optional[int] = None
+        self.last_context_stats: Dict = {}
+        self.usage = {"prompt_tokens": 0, "completion_tokens": 0, "cache_read_tokens": 0, "cache_write_tokens": 0}
+        self.errors: List[str] = []
+        # 대화 엔진에 참여하면 공유 transcript 위의 TranscriptView로 바뀜
+        self.memory: Sequence[Dict] = []
+        self.initialize_memory()
+
+    def initialize_memory(self):
+        """Initialize the conversation memory with system prompt"""
+        self.memory = [{"role": "system", "content": self.system_prompt}]
+
+    def update_memory(self, role: str, content: str):
+        """Add new message to memory (for agents used outside a dialogue engine)"""
+        self.memory.append({"role": role, "content": content})
+
+    def get_completion_params(self, max_tokens: Optional[int] = None, reuse_client: bool = True,
+                              stream: bool = False, prompt: Optional[str] = None) -> Dict:
+        """Build completion params for the current memory, with prompt appended as a one-off user message"""
+        max_tokens = max_tokens or self.max_tokens
+        messages = list(self.memory)
+        if prompt:
+            messages.append({"role": "user", "content": prompt})
+        messages, self.last_context_stats = fit_messages(
+            messages, self.model, get_context_budget(self.model, max_tokens, self.context_limit)
+        )
+        extra = {"seed": self.seed} if self.seed is not None else {}
+        return build_completion_params(
+            self.provider, self.model, messages, self.api_key,
+            temperature=self.temperature, max_tokens=max_tokens, top_p=self.top_p, stream=stream,
+            json_format=self.json_format, reuse_client=reuse_client, **extra
+        )
+
+    def record_usage(self, response) -> None:
+        """Accumulate token usage reported by the provider"""
+        self.add_usage(getattr(response, "usage", None))
+
+    def add_usage(self, usage) -> None:
+        if usage:
+            self.usage["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+            self.usage["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+        # 프롬프트 캐시 토큰은 누적과 함께 마지막 요청 기준으로도 남김 (턴별 표시용)
+        cache_read, cache_write = cache_usage(usage)
+        self.usage["cache_read_tokens"] += cache_read
+        self.usage["cache_write_tokens"] += cache_write
+        self.last_context_stats = dict(self.last_context_stats, cache_read_tokens=cache_read,
+                                       cache_write_tokens=cache_write)
+
+    def stream_response(self, max_tokens: Optional[int] = None) -> Iterator[str]:
+        """Stream the response as text deltas; usage is recorded once the stream ends"""
+        parts: List[str] = []
+        usage = None
+        try:
+            params = self.get_completion_params(max_tokens, stream=True)
+            completion_fn = routed_completion(completion, self.key_candidates) if self.key_candidates else completion
+            completion_fn = instrumented_completion(completion_fn, self.provider, "dialogue")
+            for chunk in cached_completion(completion_fn, params, self.cache):
+                usage = getattr(chunk, "usage", None) or usage
+                content = chunk_text(chunk)
+                if content:
+                    parts.append(content)
+                    yield content
+        except Exception as e:
+            self.errors.append(str(e))
+            yield f"Error generating response: {str(e)}"
+            return
+        if usage:
+            self.add_usage(usage)
+        else:
+            # 스트리밍 응답에 usage가 없는 provider는 토큰 수를 추정
+            self.usage["prompt_tokens"] += token_counter.count_messages(params["messages"], self.model)
+            self.usage["completion_tokens"] += token_counter.count_text("".join(parts), self.model)
+
+    def get_response(self, max_tokens: Optional[int] = None, prompt: Optional[str] = None) -> str:
+        """Generate response using the model and current memory"""
+        try:
+            completion_fn = routed_completion(completion, self.key_candidates) if self.key_candidates else completion
+            completion_fn = instrumented_completion(completion_fn, self.provider, "dialogue")
+            response = cached_completion(completion_fn, self.get_completion_params(max_tokens, prompt=prompt), self.cache)
+            self.record_usage(response)
+            return response.choices[0].message.content
+        except Exception as e:
+            self.errors.append(str(e))
+            return f"Error generating response: {str(e)}"
+
+    async def aget_response(self, max_tokens: Optional[int] = None, rate_limiter: Optional[RateLimiter] = None) -> str:
+        """Async variant of get_response, optionally throttled by a provider rate limiter"""
+        try:
+            if rate_limiter:
+                await rate_limiter.acquire()
+            acompletion_fn = arouted_completion(acompletion, self.key_candidates) if self.key_candidates else acompletion
+            acompletion_fn = ainstrumented_completion(acompletion_fn, self.provider, "dialogue")
+            response = await acached_completion(
+                acompletion_fn, self.get_completion_params(max_tokens, reuse_client=False), self.cache
+            )
+            self.record_usage(response)
+            return response.choices[0].message.content
+        except Exception as e:
+            self.errors.append(str(e))
+            return f"Error generating response: {str(e)}"
+
+
+class PrefetchedStream:
+    """Pulls a token stream on a background thread, so the request is already in flight before it is read"""
+
+    _DONE = object()
+
+    def __init__(self, stream: Iterator[str]):
+        self._queue: "queue.Queue" = queue.Queue()
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._pump, args=(stream,), name="dialogue-prefetch", daemon=True)
+        self._thread.start()
+
+    def _pump(self, stream: Iterator[str]) -> None:
+        try:
+            for item in stream:
+                if self._cancelled.is_set():
+                    stream.close()
+                    break
+                self._queue.put(item)
+        finally:
+            self._queue.put(self._DONE)
+
+    def __iter__(self) -> Iterator[str]:
+        while True:
+            item = self._queue.get()
+            if item is self._DONE:
+                return
+            yield item
+
+    def cancel(self) -> None:
+        """Stop reading the stream (used when nobody will consume the prefetched turn)"""
+        self._cancelled.set()
+
+
+def _deferred(get_response: Callable[[], str]) -> Iterator[str]:
+    """Wrap a non-streaming call as a one-chunk stream that only runs when it is read"""
+    yield get_response()
+
+
+@dataclass
+class DialogueEvent:
+    kind: str  # "turn_start", "delta", "turn_end" or "stop"
+    turn: int
+    speaker: str = ""
+    text: str = ""
+    entry: Optional[Dict] = None
+
+
+class MultiAgentDialogue:
+    """Dialogue between any number of agents over one shared transcript, ordered by a TurnScheduler"""
+
+    def __init__(self, agents: List[LLMAgent], scheduler: Optional[TurnScheduler] = None,
+                 stop_conditions: Optional[List[StopCondition]] = None, stream: bool = False,
+                 history: Optional[List[Dict]] = None):
+        names = [agent.name for agent in agents]
+        if not agents or len(set(names)) != len(names) or "user" in names:
+            raise ValueError("Agent names must be unique and must not be 'user'")
+        self._agents = list(agents)
+        self.scheduler = scheduler or RoundRobinScheduler()
+        self.stop_conditions = list(stop_conditions or [])
+        # stream=True면 턴마다 스트리밍으로 받고, 턴이 끝나자마자 다음 라운드의 요청을 먼저 보냄
+        self.stream = stream
+        # 공유 transcript: 턴마다 항목 하나만 추가되고, 에이전트 memory는 이 저장소 위의 뷰
+        self.conversation_history = Transcript(history or [])
+        self.stop_reason: Optional[str] = None
+        self.started_at: Optional[float] = None
+
+    @property
+    def agents(self) -> List[LLMAgent]:
+        return self._agents
+
+    @property
+    def all_agents(self) -> List[LLMAgent]:
+        """Participants plus scheduler helpers such as a moderator: every agent whose requests use tokens"""
+        return self._agents + self.scheduler.helper_agents()
+
+    def _view_start(self, agent: LLMAgent) -> int:
+        return 0
+
+    def attach(self, agent: LLMAgent) -> None:
+        """Point the agent's memory at this dialogue's transcript (no-op if it already is)"""
+        memory = agent.memory
+        if isinstance(memory, TranscriptView) and memory.transcript is self.conversation_history:
+            return
+        # 3인 이상 대화에서는 다른 참가자의 발화에 "[이름] " 접두어를 붙여 보여줌
+        agent.memory = TranscriptView(self.conversation_history, agent.name, agent.system_prompt,
+                                      self._view_start(agent), label_others=len(self._agents) > 2)
+
+    def _next_turn(self) -> int:
+        return self.conversation_history.turn(-1) + 1 if self.conversation_history else 0
+
+    def _start(self, message: str) -> None:
+        self.started_at = time.monotonic()
+        self.stop_reason = None
+        for agent in self._agents:
+            self.attach(agent)
+        self.scheduler.start(self)
+        self.conversation_history.add(self._next_turn(), "user", message)
+
+    def _check_stop(self, entry: Dict) -> Optional[str]:
+        """Return the first stop condition's reason, if any condition is met after this turn"""
+        for condition in self.stop_conditions:
+            reason = condition.check(self, entry)
+            if reason:
+                return reason
+        return None
+
+    def _next_speakers(self) -> List[LLMAgent]:
+        speakers = self.scheduler.next_speakers(self)
+        if not speakers:
+            raise ValueError(f"{type(self.scheduler).__name__} chose no speaker")
+        return speakers
+
+    def _request(self, speakers: List[LLMAgent]) -> List[Tuple[LLMAgent, Iterator[str]]]:
+        """Start the speakers' requests; panel rounds and streamed turns run on background threads"""
+        if not self.stream and len(speakers) == 1:
+            return [(speakers[0], _deferred(speakers[0].get_response))]
+        return [
+            (agent, PrefetchedStream(agent.stream_response() if self.stream else _deferred(agent.get_response)))
+            for agent in speakers
+        ]
+
+    def run(self, message: str, max_turns: int = 5) -> Iterator[DialogueEvent]:
+        """Run up to max_turns rounds after message, yielding turn_start/delta/turn_end events and a final stop event
+
+        The last turn_end of a round is yielded after the next round's requests were sent,
+        so whatever the caller does with it overlaps with the next responses.
+        """
+        self._start(message)
+        pending = self._request(self._next_speakers()) if max_turns > 0 else []
+        try:
+            for round_index in range(max_turns):
+                turn = self._next_turn()
+                entries = []
+                for position, (agent, stream) in enumerate(pending):
+                    yield DialogueEvent("turn_start", turn, agent.name)
+                    parts = []
+                    for text in stream:
+                        parts.append(text)
+                        yield DialogueEvent("delta", turn, agent.name, text)
+                    entries.append({"turn": turn, "speaker": agent.name, "message": "".join(parts)})
+                    if position < len(pending) - 1:
+                        yield DialogueEvent("turn_end", turn, agent.name, entry=entries[-1])
+
+                # 라운드의 답은 모두 받은 뒤에 transcript에 추가 (패널은 모두 같은 메시지에 답함)
+                for entry in entries:
+                    self.conversation_history.append(entry)
+                    self.stop_reason = self.stop_reason or self._check_stop(entry)
+                pending = []
+                if not self.stop_reason and round_index + 1 < max_turns:
+                    pending = self._request(self._next_speakers())
+                yield DialogueEvent("turn_end", turn, entries[-1]["speaker"], entry=entries[-1])
+                if not pending:
+                    break
+            if self.stop_reason:
+                yield DialogueEvent("stop", self.conversation_history.turn(-1), text=self.stop_reason)
+        finally:
+            for _, stream in pending:
+                if isinstance(stream, PrefetchedStream):
+                    stream.cancel()
+
+    async def arun(self, message: str, max_turns: int = 5) -> AsyncIterator[DialogueEvent]:
+        """Async iterator over run()'s events; the dialogue runs on a worker thread so the event loop never blocks"""
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+
+        def post(item) -> None:
+            try:
+                loop.call_soon_threadsafe(events.put_nowait, item)
+            except RuntimeError:
+                # 이벤트 루프가 이미 닫힘 (소비하는 쪽이 먼저 끝남)
+                stop.set()
+
+        def pump() -> None:
+            generator = self.run(message, max_turns)
+            try:
+                for event in generator:
+                    if stop.is_set():
+                        break
+                    post(event)
+            except Exception as e:
+                post(e)
+            finally:
+                generator.close()
+                post(None)
+
+        threading.Thread(target=pump, name="dialogue-arun", daemon=True).start()
+        try:
+            while True:
+                item = await events.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+
+    def conduct_dialogue(self, initial_message: str, max_turns: int = 5,
+                         on_turn: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """Conduct the dialogue, calling on_turn with each finished turn"""
+        events = self.run(initial_message, max_turns)
+        try:
+            for event in events:
+                if event.kind == "turn_end" and on_turn:
+                    on_turn(event.entry)
+        finally:
+            events.close()
+        return self.conversation_history.to_list()
+
+    async def aconduct_dialogue(self, initial_message: str, max_turns: int = 5,
+                                rate_limiters: Optional[Dict[str, RateLimiter]] = None,
+                                on_turn: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """Async variant of conduct_dialogue using litellm's acompletion"""
+        rate_limiters = rate_limiters or {}
+        self._start(initial_message)
+
+        for _ in range(max_turns):
+            if self.scheduler.blocking:
+                speakers = await asyncio.to_thread(self._next_speakers)
+            else:
+                speakers = self._next_speakers()
+            turn = self._next_turn()
+            responses = await asyncio.gather(*(
+                agent.aget_response(rate_limiter=rate_limiters.get(agent.provider)) for agent in speakers
+            ))
+            for agent, response in zip(speakers, responses):
+                entry = {"turn": turn, "speaker": agent.name, "message": response}
+                self.conversation_history.append(entry)
+                self.stop_reason = self.stop_reason or self._check_stop(entry)
+                if on_turn:
+                    on_turn(entry)
+            if self.stop_reason:
+                break
+
+        return self.conversation_history.to_list()
+
+
+class LLMDialogue(MultiAgentDialogue):
+    """Two agents taking turns; only agent1 sees the opening message"""
+
+    def __init__(self, agent1: LLMAgent, agent2: LLMAgent, stop_conditions: Optional[List[StopCondition]] = None,
+                 stream: bool = False):
+        super().__init__([agent1, agent2], RoundRobinScheduler(), stop_conditions, stream)
+        self.agent1 = agent1
+        self.agent2 = agent2
+
+    def _view_start(self, agent: LLMAgent) -> int:
+        # agent2는 agent1의 첫 응답부터 봄 (첫 메시지는 agent1에게만 전달)
+        return 1 if agent is self.agent2 else 0
+
+
+@dataclass
+class DialogueResult:
+    index: int
+    dialogue: MultiAgentDialogue
+    conversation: List[Dict]
+    elapsed: float
+
+
+async def run_dialogues(dialogues: List[MultiAgentDialogue], initial_message: str, max_turns: int = 5,
+                        max_concurrency: int = 4,
+                        requests_per_minute: Optional[Dict[str, int]] = None) -> AsyncIterator[DialogueResult]:
+    """독립적인 대화들을 동시에 실행하고, 끝나는 순서대로 결과를 내보냅니다.
+
+    max_concurrency는 동시에 진행되는 대화 수, requests_per_minute는 provider별 분당 요청 수 제한입니다.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    rate_limiters = {
+        provider: RateLimiter(rpm)
+        for provider, rpm in (requests_per_minute or {}).items() if rpm
+    }
+
+    async def run_one(index: int, dialogue: MultiAgentDialogue) -> DialogueResult:
+        async with semaphore:
+            started = time.perf_counter()
+            conversation = await dialogue.aconduct_dialogue(initial_message, max_turns, rate_limiters)
+            return DialogueResult(index, dialogue, conversation, time.perf_counter() - started)
+
+    tasks = [asyncio.create_task(run_one(i, d)) for i, d in enumerate(dialogues)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,100 @@
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from .completion_cache import chunk_text
+from .context_window import token_counter
+
+
+@dataclass
+class FanoutResult:
+    label: str
+    model: str
+    text: str = ""
+    time_to_first_token: Optional[float] = None
+    latency: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost: Optional[float] = None
+    error: Optional[str] = None
+
+    @property
+    def tokens_per_second(self) -> float:
+        # 첫 토큰 이후 생성 구간 기준
+        generation_time = self.latency - (self.time_to_first_token or 0.0)
+        return self.completion_tokens / generation_time if generation_time > 0 else 0.0
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    """litellm 가격표 기준 요청 비용(USD)을 반환합니다. 모르는 모델이면 None."""
+    try:
+        from litellm import cost_per_token
+        prompt_cost, completion_cost = cost_per_token(
+            model=model, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens
+        )
+        return prompt_cost + completion_cost
+    except Exception:
+        return None
+
+
+def _usage_tokens(chunk) -> Tuple[Optional[int], Optional[int]]:
+    usage = getattr(chunk, "usage", None)
+    if not usage:
+        return None, None
+    return getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None)
+
+
+def _run_target(index: int, label: str, params: Dict, completion_fn: Callable, events: "queue.Queue") -> None:
+    model = params["model"]
+    result = FanoutResult(label=label, model=model)
+    parts: List[str] = []
+    prompt_tokens = completion_tokens = None
+    started = time.perf_counter()
+    try:
+        for chunk in completion_fn(**dict(params, stream=True)):
+            usage_prompt_tokens, usage_completion_tokens = _usage_tokens(chunk)
+            prompt_tokens = usage_prompt_tokens or prompt_tokens
+            completion_tokens = usage_completion_tokens or completion_tokens
+            content = chunk_text(chunk)
+            if not content:
+                continue
+            if result.time_to_first_token is None:
+                result.time_to_first_token = time.perf_counter() - started
+            parts.append(content)
+            events.put(("chunk", index, content))
+    except Exception as e:
+        result.error = str(e)
+    result.latency = time.perf_counter() - started
+    result.text = "".join(parts)
+    # provider가 usage를 주지 않으면 tiktoken으로 계산
+    result.prompt_tokens = prompt_tokens or token_counter.count_messages(params["messages"], model)
+    result.completion_tokens = completion_tokens or token_counter.count_text(result.text, model)
+    result.cost = estimate_cost(model, result.prompt_tokens, result.completion_tokens)
+    events.put(("done", index, result))
+
+
+def fan_out(completion_fn: Union[Callable, List[Callable]],
+            targets: List[Tuple[str, Dict]]) -> Iterator[Tuple[str, int, object]]:
+    """같은 메시지를 여러 (provider, model)에 동시에 스트리밍으로 보냅니다.
+
+    completion_fn은 모든 target에 쓸 함수 하나 또는 target별 함수 목록입니다.
+    targets는 (label, completion params) 목록이며, 도착하는 순서대로
+    ("chunk", index, text)와 ("done", index, FanoutResult) 이벤트를 내보냅니다.
+    렌더링은 호출한 스레드(Streamlit 스크립트 스레드)에서 합니다.
+    """
+    events: "queue.Queue" = queue.Queue()
+    completion_fns = completion_fn if isinstance(completion_fn, list) else [completion_fn] * len(targets)
+    executor = ThreadPoolExecutor(max_workers=max(1, len(targets)), thread_name_prefix="fanout")
+    try:
+        for index, (label, params) in enumerate(targets):
+            executor.submit(_run_target, index, label, params, completion_fns[index], events)
+        remaining = len(targets)
+        while remaining:
+            event = events.get()
+            if event[0] == "done":
+                remaining -= 1
+            yield event
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
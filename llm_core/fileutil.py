@@ -0,0 +1,28 @@
+import os
+import tempfile
+
+# mkstemp는 0600으로 만들므로, open()으로 새로 만들 때와 같은 권한을 주기 위해 umask를 한 번 읽어 둠
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def atomic_write_text(path: str, text: str, encoding: str = "utf-8") -> None:
+    """같은 디렉토리의 임시 파일에 쓴 뒤 os.replace로 바꿔, 읽는 쪽이 반쯤 쓰인 파일을 보지 않게 합니다."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding=encoding) as f:
+            try:
+                mode = os.stat(path).st_mode & 0o777
+            except FileNotFoundError:
+                mode = 0o666 & ~_UMASK
+            os.fchmod(f.fileno(), mode)
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+HISTORY_INDEX_DIR = os.path.join(".cache", "history_index")
+# 예전 버전이 채팅 디렉토리 안에 만들던 인덱스 파일 (발견하면 지움)
+_LEGACY_INDEX_FILENAME = ".index.sqlite3"
+
+
+def index_path(directory: str) -> str:
+    """채팅 디렉토리의 인덱스 DB 경로. 사용자 데이터 디렉토리 밖(.cache/)에 디렉토리별로 둡니다."""
+    key = hashlib.sha1(os.path.abspath(directory).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(HISTORY_INDEX_DIR, f"{os.path.basename(os.path.abspath(directory))}-{key}.sqlite3")
+
+
+class ChatHistoryIndex:
+    """chat_history/*.json 파일의 메타데이터 SQLite 인덱스.
+
+    목록/개수/정렬 질의는 인덱스만 읽고 메시지 본문은 역직렬화하지 않습니다.
+    인덱스에 없는 기존 JSON 파일은 디렉토리가 바뀌었을 때 한 번만 가져옵니다.
+    """
+
+    def __init__(self, directory: str = "chat_history", db_path: Optional[str] = None):
+        self.directory = directory
+        self.db_path = db_path or index_path(directory)
+        self._lock = threading.Lock()
+        self._dir_mtime_ns: Optional[int] = None
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _ensure_schema(self, conn: sqlite3.Connection) -> None:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS histories (
+                filename TEXT PRIMARY KEY,
+                saved_at TEXT NOT NULL,
+                message_count INTEGER NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_histories_saved_at ON histories(saved_at)")
+
+    def sync(self) -> None:
+        """디렉토리가 변경된 경우에만 인덱스와 파일 목록을 맞춥니다."""
+        with self._lock:
+            if not os.path.exists(self.directory):
+                os.makedirs(self.directory)
+            dir_mtime_ns = os.stat(self.directory).st_mtime_ns
+            if dir_mtime_ns == self._dir_mtime_ns:
+                return
+
+            if self._dir_mtime_ns is None:
+                os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+                for suffix in ("", "-wal", "-shm", "-journal"):
+                    legacy = os.path.join(self.directory, _LEGACY_INDEX_FILENAME + suffix)
+                    if os.path.exists(legacy):
+                        os.remove(legacy)
+            with self._connect() as conn:
+                self._ensure_schema(conn)
+                indexed = {row[0] for row in conn.execute("SELECT filename FROM histories")}
+                on_disk = {f for f in os.listdir(self.directory) if f.endswith('.json')}
+
+                removed = indexed - on_disk
+                if removed:
+                    conn.executemany("DELETE FROM histories WHERE filename = ?", [(f,) for f in removed])
+
+                rows = []
+                for filename in on_disk - indexed:
+                    try:
+                        with open(os.path.join(self.directory, filename), 'r', encoding='utf-8') as f:
+                            data = json.load(f)
+                        rows.append((filename, data.get("saved_at", "Unknown"), len(data.get("messages", []))))
+                    except Exception:
+                        continue
+                if rows:
+                    conn.executemany("INSERT OR REPLACE INTO histories VALUES (?, ?, ?)", rows)
+
+            # 예전 인덱스 파일을 지워 바뀐 mtime까지 반영
+            self._dir_mtime_ns = os.stat(self.directory).st_mtime_ns
+
+    def add(self, filename: str, saved_at: str, message_count: int) -> None:
+        """저장된 채팅 파일 하나를 인덱스에 기록합니다."""
+        self.sync()
+        with self._lock:
+            with self._connect() as conn:
+                conn.execute("INSERT OR REPLACE INTO histories VALUES (?, ?, ?)", (filename, saved_at, message_count))
+            self._dir_mtime_ns = os.stat(self.directory).st_mtime_ns
+
+    def remove(self, filename: str) -> None:
+        """인덱스에서 채팅 파일 하나를 제거합니다."""
+        self.sync()
+        with self._lock:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM histories WHERE filename = ?", (filename,))
+            self._dir_mtime_ns = os.stat(self.directory).st_mtime_ns
+
+    def count(self) -> int:
+        """저장된 채팅 개수를 반환합니다."""
+        self.sync()
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM histories").fetchone()[0]
+
+    def list(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        """saved_at 내림차순으로 채팅 메타데이터를 반환합니다."""
+        self.sync()
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT filename, saved_at, message_count FROM histories "
+                "ORDER BY saved_at DESC, filename DESC LIMIT ? OFFSET ?",
+                (-1 if limit is None else limit, offset),
+            ).fetchall()
+        return [{
+            "filename": filename,
+            "file_path": os.path.join(self.directory, filename),
+            "saved_at": saved_at,
+            "message_count": message_count,
+        } for filename, saved_at, message_count in rows]
+
+
+_indexes: Dict[str, ChatHistoryIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_chat_history_index(directory: str = "chat_history") -> ChatHistoryIndex:
+    """디렉토리별 프로세스 공용 ChatHistoryIndex를 반환합니다."""
+    key = os.path.abspath(directory)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = ChatHistoryIndex(directory)
+        return index
+
+
+def save_chat_history(messages: List[Dict], filename: Optional[str] = None, directory: str = "chat_history") -> str:
+    """채팅 히스토리를 JSON 파일로 저장하고 인덱스에 기록한 뒤 경로를 반환합니다."""
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    # 파일명이 지정되지 않은 경우 현재 시간으로 생성
+    if not filename:
+        filename = f"chat_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+
+    file_path = os.path.join(directory, filename)
+    saved_at = datetime.now().isoformat()
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            "messages": messages,
+            "saved_at": saved_at,
+        }, f, ensure_ascii=False, indent=2)
+    get_chat_history_index(directory).add(filename, saved_at, len(messages))
+    return file_path
+
+
+def load_chat_history(file_path: str) -> List[Dict]:
+    """저장된 채팅 히스토리의 메시지 목록을 불러옵니다."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f).get("messages", [])
+
+
+def delete_chat_history(file_path: str) -> None:
+    """저장된 채팅 히스토리 파일을 삭제하고 인덱스에서 제거합니다."""
+    os.remove(file_path)
+    get_chat_history_index(os.path.dirname(file_path) or ".").remove(os.path.basename(file_path))
@@ -0,0 +1,270 @@
+"""대화·배치 실행을 Streamlit 스크립트 스레드 밖에서 돌리는 백그라운드 작업 큐.
+
+작업 상태(진행률, 결과, 오류)와 중간 이벤트(끝난 턴 등)는 SQLite에 기록되므로
+어느 페이지에서든 job id로 조회할 수 있고, 브라우저를 닫았다 열어도 결과를 다시 볼 수 있습니다.
+토큰 단위로 바뀌는 진행 중 상태(스트리밍 중인 턴)는 DB에 쓰지 않고 메모리의 live(job_id)로 봅니다.
+동시에 실행되는 작업 수는 워커 스레드 수(max_workers)로 제한됩니다.
+
+    queue = get_job_queue()
+    job_id = queue.submit("dialogue", "A × B", lambda ctx: ...)
+    queue.get(job_id)["status"]   # queued / running / done / failed / cancelled / interrupted
+    queue.events(job_id, after=-1)
+    queue.live(job_id)            # 실행 중인 작업이 ctx.live()로 남긴 최신 상태 (같은 프로세스에서만)
+"""
+import json
+import os
+import queue
+import sqlite3
+import threading
+import traceback
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+JOBS_PATH = os.path.join(".cache", "jobs.sqlite3")
+DEFAULT_MAX_WORKERS = 2
+ACTIVE_STATUSES = ("queued", "running")
+
+
+class JobCancelled(Exception):
+    """취소 요청을 받은 작업이 스스로 멈출 때 던집니다."""
+
+
+class JobContext:
+    """작업 함수에 전달되어 진행률/이벤트를 기록하고 취소 여부를 알려줍니다."""
+
+    def __init__(self, job_queue: "JobQueue", job_id: str):
+        self.job_queue = job_queue
+        self.job_id = job_id
+
+    def progress(self, done: int, total: int, message: str = "") -> None:
+        self.job_queue._update(self.job_id, progress_done=done, progress_total=total, message=message)
+
+    def emit(self, event: Dict) -> None:
+        """중간 결과(끝난 턴 등)를 기록합니다. 폴링하는 쪽은 events(job_id, after=seq)로 받습니다."""
+        self.job_queue._append_event(self.job_id, event)
+
+    def live(self, state: Optional[Dict]) -> None:
+        """자주 바뀌는 진행 중 상태(스트리밍 중인 턴 등)를 메모리에만 남깁니다. None이면 지웁니다."""
+        if state is None:
+            self.job_queue._live.pop(self.job_id, None)
+        else:
+            self.job_queue._live[self.job_id] = state
+
+    @property
+    def cancelled(self) -> bool:
+        return self.job_id in self.job_queue._cancel_requested
+
+    def check_cancelled(self) -> None:
+        if self.cancelled:
+            raise JobCancelled(self.job_id)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    def __init__(self, db_path: str = JOBS_PATH, max_workers: int = DEFAULT_MAX_WORKERS):
+        self.db_path = db_path
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._ready = False
+        self._pending: "queue.Queue[str]" = queue.Queue()
+        self._functions: Dict[str, Callable[[JobContext], Any]] = {}
+        self._cancel_requested = set()
+        self._workers: List[threading.Thread] = []
+        # 이벤트 seq는 작업을 실행하는 스레드만 늘리므로 메모리에 둠
+        self._event_seq: Dict[str, int] = {}
+        self._live: Dict[str, Dict] = {}
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _ensure_ready(self) -> None:
+        if self._ready:
+            return
+        with self._lock:
+            if self._ready:
+                return
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript("""
+                    CREATE TABLE IF NOT EXISTS jobs (
+                        id TEXT PRIMARY KEY,
+                        kind TEXT NOT NULL,
+                        label TEXT NOT NULL,
+                        status TEXT NOT NULL,
+                        owner_pid INTEGER NOT NULL,
+                        progress_done INTEGER NOT NULL DEFAULT 0,
+                        progress_total INTEGER NOT NULL DEFAULT 0,
+                        message TEXT NOT NULL DEFAULT '',
+                        params TEXT NOT NULL DEFAULT '{}',
+                        result TEXT,
+                        error TEXT,
+                        created_at TEXT NOT NULL,
+                        started_at TEXT,
+                        finished_at TEXT
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs(created_at);
+                    CREATE TABLE IF NOT EXISTS job_events (
+                        job_id TEXT NOT NULL,
+                        seq INTEGER NOT NULL,
+                        payload TEXT NOT NULL,
+                        created_at TEXT NOT NULL,
+                        PRIMARY KEY (job_id, seq)
+                    );
+                """)
+                # 실행하던 프로세스가 죽은 작업은 다시 돌릴 수 없으므로 interrupted로 표시
+                stale = conn.execute(
+                    f"SELECT id, owner_pid FROM jobs WHERE status IN {ACTIVE_STATUSES} AND owner_pid != ?",
+                    (os.getpid(),),
+                ).fetchall()
+                for job_id, owner_pid in stale:
+                    if not _pid_alive(owner_pid):
+                        conn.execute("UPDATE jobs SET status = 'interrupted', finished_at = ? WHERE id = ?",
+                                     (datetime.now().isoformat(), job_id))
+            self._ready = True
+
+    def _start_workers(self) -> None:
+        with self._lock:
+            while len(self._workers) < self.max_workers:
+                worker = threading.Thread(target=self._run, name=f"job-worker-{len(self._workers)}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def submit(self, kind: str, label: str, fn: Callable[[JobContext], Any], params: Optional[Dict] = None) -> str:
+        """작업을 큐에 넣고 job id를 반환합니다. fn(ctx)의 반환값은 JSON으로 저장됩니다."""
+        self._ensure_ready()
+        job_id = uuid.uuid4().hex[:12]
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, label, status, owner_pid, params, created_at) VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, kind, label, os.getpid(), json.dumps(params or {}, ensure_ascii=False),
+                 datetime.now().isoformat()),
+            )
+        self._functions[job_id] = fn
+        self._start_workers()
+        self._pending.put(job_id)
+        return job_id
+
+    def cancel(self, job_id: str) -> bool:
+        """대기 중인 작업은 바로 취소하고, 실행 중인 작업에는 취소를 요청합니다 (작업이 check_cancelled에서 멈춤)."""
+        job = self.get(job_id)
+        if not job or job["status"] not in ACTIVE_STATUSES:
+            return False
+        self._cancel_requested.add(job_id)
+        if job["status"] == "queued":
+            self._finish(job_id, "cancelled")
+        return True
+
+    def _run(self) -> None:
+        while True:
+            job_id = self._pending.get()
+            fn = self._functions.pop(job_id, None)
+            if fn is None or job_id in self._cancel_requested:
+                self._cancel_requested.discard(job_id)
+                continue
+            self._update(job_id, status="running", started_at=datetime.now().isoformat())
+            try:
+                result = fn(JobContext(self, job_id))
+            except JobCancelled:
+                self._finish(job_id, "cancelled")
+            except Exception as e:
+                self._finish(job_id, "failed", error=f"{type(e).__name__}: {e}\n{traceback.format_exc(limit=5)}")
+            else:
+                self._finish(job_id, "done", result=result)
+            finally:
+                self._cancel_requested.discard(job_id)
+                self._event_seq.pop(job_id, None)
+                self._live.pop(job_id, None)
+
+    def _update(self, job_id: str, **columns) -> None:
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*columns.values(), job_id))
+
+    def _finish(self, job_id: str, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        self._update(job_id, status=status, finished_at=datetime.now().isoformat(), error=error,
+                     result=json.dumps(result, ensure_ascii=False) if result is not None else None)
+
+    def _append_event(self, job_id: str, event: Dict) -> None:
+        seq = self._event_seq.get(job_id, 0)
+        with self._connect() as conn:
+            conn.execute("INSERT INTO job_events VALUES (?, ?, ?, ?)",
+                         (job_id, seq, json.dumps(event, ensure_ascii=False), datetime.now().isoformat()))
+        self._event_seq[job_id] = seq + 1
+
+    @staticmethod
+    def _row(row) -> Dict:
+        (job_id, kind, label, status, owner_pid, done, total, message, params, result, error,
+         created_at, started_at, finished_at) = row
+        return {
+            "id": job_id, "kind": kind, "label": label, "status": status, "owner_pid": owner_pid,
+            "progress_done": done, "progress_total": total, "message": message,
+            "params": json.loads(params), "result": json.loads(result) if result is not None else None,
+            "error": error, "created_at": created_at, "started_at": started_at, "finished_at": finished_at,
+        }
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        self._ensure_ready()
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row(row) if row else None
+
+    def list(self, limit: int = 20, kinds: Optional[List[str]] = None) -> List[Dict]:
+        """최근 작업을 최신순으로 반환합니다. 결과 본문은 get()으로 따로 읽습니다."""
+        self._ensure_ready()
+        query = "SELECT id, kind, label, status, owner_pid, progress_done, progress_total, message, params, " \
+                "NULL, error, created_at, started_at, finished_at FROM jobs"
+        args: List = []
+        if kinds:
+            query += f" WHERE kind IN ({', '.join('?' for _ in kinds)})"
+            args.extend(kinds)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        with self._connect() as conn:
+            rows = conn.execute(query, (*args, limit)).fetchall()
+        return [self._row(row) for row in rows]
+
+    def live(self, job_id: str) -> Optional[Dict]:
+        """실행 중인 작업의 최신 진행 중 상태. 없거나 다른 프로세스의 작업이면 None."""
+        return self._live.get(job_id)
+
+    def events(self, job_id: str, after: int = -1) -> List[Dict]:
+        """seq가 after보다 큰 이벤트를 순서대로 반환합니다. 각 이벤트에는 "seq"가 붙습니다."""
+        self._ensure_ready()
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT seq, payload FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq", (job_id, after)
+            ).fetchall()
+        return [dict(json.loads(payload), seq=seq) for seq, payload in rows]
+
+
+_queues: Dict[str, JobQueue] = {}
+_queues_lock = threading.Lock()
+
+
+def get_job_queue(db_path: str = JOBS_PATH, max_workers: Optional[int] = None) -> JobQueue:
+    """DB 파일별 프로세스 공용 JobQueue를 반환합니다. 워커 수는 LLM_JOB_WORKERS 환경 변수로 바꿀 수 있습니다."""
+    key = os.path.abspath(db_path)
+    with _queues_lock:
+        job_queue = _queues.get(key)
+        if job_queue is None:
+            if max_workers is None:
+                max_workers = int(os.getenv("LLM_JOB_WORKERS") or DEFAULT_MAX_WORKERS)
+            job_queue = _queues[key] = JobQueue(db_path, max_workers)
+        return job_queue
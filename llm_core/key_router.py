@@ -0,0 +1,255 @@
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from tenacity import AsyncRetrying, Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+from .provider_clients import OPENAI_COMPATIBLE_PROVIDERS, get_sdk_client
+
+MAX_COOLDOWN = 60.0
+
+
+def provider_family(provider: str) -> str:
+    """'OpenAI (Default)', 'OpenAI (Backup)' -> 'OpenAI' 처럼 같은 계열 provider를 묶습니다."""
+    return provider.split(" (")[0]
+
+
+def get_key_candidates(provider: str, api_keys: Dict[str, str]) -> List[Tuple[str, str]]:
+    """선택된 provider와 같은 계열이면서 키가 설정된 (provider, key) 목록을 반환합니다."""
+    family = provider_family(provider)
+    return [(p, key) for p, key in api_keys.items() if key and provider_family(p) == family]
+
+
+def error_status(error: Exception) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def is_retryable(error: Exception) -> bool:
+    """429, 5xx, 타임아웃/연결 오류만 다른 키로 재시도합니다."""
+    status = error_status(error)
+    if status is not None:
+        return status in (408, 429) or status >= 500
+    return any(name in type(error).__name__ for name in ("Timeout", "ConnectionError", "APIConnectionError"))
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class KeyHealth:
+    provider: str
+    outstanding: int = 0
+    successes: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    cooldown_until: float = 0.0
+    last_error: str = ""
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.cooldown_until
+
+
+class KeyRouter:
+    """같은 계열의 여러 API 키에 요청을 분산하고, 429/5xx 발생 시 다음 키로 넘깁니다.
+
+    미처리 요청 수가 가장 적은 건강한 키를 고르며, 실패한 키는 지수적으로 늘어나는
+    cooldown 동안 제외됩니다.
+    """
+
+    def __init__(self, wait=None):
+        self.wait = wait or wait_random_exponential(multiplier=0.5, max=8)
+        self._health: Dict[str, KeyHealth] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _health_key(provider: str, api_key: str) -> str:
+        return f"{provider}:{hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12]}"
+
+    def _get_health(self, provider: str, api_key: str) -> KeyHealth:
+        key = self._health_key(provider, api_key)
+        health = self._health.get(key)
+        if health is None:
+            health = self._health[key] = KeyHealth(provider)
+        return health
+
+    def acquire(self, candidates: List[Tuple[str, str]]) -> Tuple[str, str]:
+        """가장 여유 있는 키를 골라 미처리 요청 수를 올리고 반환합니다."""
+        with self._lock:
+            healths = [(candidate, self._get_health(*candidate)) for candidate in candidates]
+            healthy = [item for item in healths if item[1].healthy] or healths
+            candidate, health = min(
+                healthy, key=lambda item: (item[1].outstanding, item[1].consecutive_failures, item[1].cooldown_until)
+            )
+            health.outstanding += 1
+            return candidate
+
+    def release(self, candidate: Tuple[str, str], error: Optional[Exception] = None) -> None:
+        with self._lock:
+            health = self._get_health(*candidate)
+            health.outstanding = max(0, health.outstanding - 1)
+            if error is None:
+                health.successes += 1
+                health.consecutive_failures = 0
+                health.cooldown_until = 0.0
+                return
+            health.failures += 1
+            health.last_error = str(error)[:200]
+            if is_retryable(error):
+                health.consecutive_failures += 1
+                cooldown = _retry_after(error) or min(MAX_COOLDOWN, 2.0 ** health.consecutive_failures)
+                health.cooldown_until = time.monotonic() + cooldown
+
+    def stats(self) -> List[Dict]:
+        with self._lock:
+            now = time.monotonic()
+            return [{
+                "provider": h.provider,
+                "outstanding": h.outstanding,
+                "successes": h.successes,
+                "failures": h.failures,
+                "cooling_down_for": max(0.0, h.cooldown_until - now),
+                "last_error": h.last_error,
+            } for h in self._health.values()]
+
+    def _retrying_kwargs(self, candidates: List[Tuple[str, str]]) -> Dict:
+        return {
+            "stop": stop_after_attempt(max(2, len(candidates) + 1)),
+            "wait": self.wait,
+            "retry": retry_if_exception(is_retryable),
+            "reraise": True,
+        }
+
+    def completion(self, completion_fn: Callable, candidates: List[Tuple[str, str]], params: Dict):
+        """키를 바꿔가며 completion을 호출합니다. 스트리밍은 첫 chunk 전까지만 failover 합니다."""
+        for attempt in Retrying(**self._retrying_kwargs(candidates)):
+            with attempt:
+                candidate = self.acquire(candidates)
+                try:
+                    response = completion_fn(**with_api_key(params, *candidate))
+                    if params.get("stream"):
+                        return self._track_stream(response, candidate)
+                except Exception as e:
+                    self.release(candidate, e)
+                    raise
+                self.release(candidate)
+                return response
+
+    async def acompletion(self, acompletion_fn: Callable, candidates: List[Tuple[str, str]], params: Dict):
+        """completion의 non-streaming async 버전입니다."""
+        async for attempt in AsyncRetrying(**self._retrying_kwargs(candidates)):
+            with attempt:
+                candidate = self.acquire(candidates)
+                try:
+                    response = await acompletion_fn(**with_api_key(params, *candidate, reuse_client=False))
+                except Exception as e:
+                    self.release(candidate, e)
+                    raise
+                self.release(candidate)
+                return response
+
+    def _track_stream(self, stream, candidate: Tuple[str, str]) -> Iterator:
+        iterator = iter(stream)
+        try:
+            first = next(iterator)
+        except StopIteration:
+            self.release(candidate)
+            return iter(())
+        except Exception as e:
+            self.release(candidate, e)
+            raise
+        return TrackedStream(self, candidate, first, iterator)
+
+
+class TrackedStream:
+    """첫 chunk를 받은 스트림. 끝까지 읽거나 오류가 나거나 close()/가비지 컬렉션될 때 키를 한 번만 반환합니다.
+
+    (generator의 finally는 한 번도 읽지 않고 버려지면 실행되지 않으므로 객체로 감쌈)
+    """
+
+    def __init__(self, router: KeyRouter, candidate: Tuple[str, str], first, iterator: Iterator):
+        self._router = router
+        self._candidate = candidate
+        self._first = [first]
+        self._iterator = iterator
+        self._released = False
+
+    def __iter__(self) -> "TrackedStream":
+        return self
+
+    def __next__(self):
+        if self._released:
+            raise StopIteration
+        if self._first:
+            return self._first.pop()
+        try:
+            return next(self._iterator)
+        except StopIteration:
+            self._release()
+            raise
+        except Exception as e:
+            self._release(e)
+            raise
+
+    def _release(self, error: Optional[Exception] = None) -> None:
+        if not self._released:
+            self._released = True
+            self._router.release(self._candidate, error)
+
+    def close(self) -> None:
+        close = getattr(self._iterator, "close", None)
+        try:
+            if close:
+                close()
+        finally:
+            self._release()
+
+    def __del__(self):
+        self._release()
+
+
+def with_api_key(params: Dict, provider: str, api_key: str, reuse_client: bool = True) -> Dict:
+    """같은 계열의 다른 키로 요청을 보내도록 api_key와 SDK 클라이언트를 바꾼 파라미터를 반환합니다."""
+    params = dict(params, api_key=api_key)
+    params.pop("client", None)
+    if reuse_client and provider in OPENAI_COMPATIBLE_PROVIDERS:
+        client = get_sdk_client(provider, api_key)
+        if client is not None:
+            params["client"] = client
+    return params
+
+
+_router: Optional[KeyRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_key_router() -> KeyRouter:
+    """프로세스 공용 KeyRouter를 반환합니다."""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = KeyRouter()
+        return _router
+
+
+def routed_completion(completion_fn: Callable, candidates: List[Tuple[str, str]]) -> Callable:
+    """completion(**params) 형태로 호출할 수 있는, 키 분산이 적용된 함수를 반환합니다."""
+    def call(**params):
+        return get_key_router().completion(completion_fn, candidates, params)
+    return call
+
+
+def arouted_completion(acompletion_fn: Callable, candidates: List[Tuple[str, str]]) -> Callable:
+    async def call(**params):
+        return await get_key_router().acompletion(acompletion_fn, candidates, params)
+    return call
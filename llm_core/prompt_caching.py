@@ -0,0 +1,83 @@
+"""provider 측 프롬프트 캐싱 (Anthropic cache_control).
+
+긴 시스템 프롬프트와 이전 턴은 요청마다 그대로 다시 보내므로, 변하지 않는 앞부분(prefix)
+끝에 cache_control 표시를 붙여 provider가 그 부분을 캐시에서 읽게 합니다. 표시는
+system 메시지 끝, 이전 턴 끝(끝에서 두 번째 메시지), 마지막 메시지 끝에 붙입니다.
+다음 요청은 이번 요청 전체를 prefix로 가지므로 캐시를 읽고, 새로 붙은 부분만 캐시에 씁니다.
+끝에서 두 번째 표시는 마지막 메시지가 한 번만 쓰는 지시문(예: 모더레이터)일 때도
+대화 부분은 캐시가 맞도록 하기 위한 것입니다.
+
+provider가 보고하는 캐시 토큰 수는 cache_usage(usage)로 읽습니다. Anthropic은
+cache_read_input_tokens / cache_creation_input_tokens, OpenAI는 자동 캐싱 결과를
+prompt_tokens_details.cached_tokens로 알려줍니다.
+"""
+from typing import Dict, List, Tuple
+
+from .context_window import token_counter
+
+# cache_control 표시를 이해하는 provider
+PROMPT_CACHE_PROVIDERS = {"Anthropic"}
+# Anthropic은 이보다 짧은 prefix는 캐싱하지 않음 (Haiku 계열은 2048)
+MIN_CACHEABLE_TOKENS = 1024
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def supports_prompt_cache(provider: str) -> bool:
+    return provider in PROMPT_CACHE_PROVIDERS
+
+
+def _with_cache_control(message: Dict) -> Dict:
+    """마지막 content block에 cache_control을 붙인 메시지 사본을 반환합니다."""
+    content = message.get("content") or ""
+    if isinstance(content, str):
+        blocks = [{"type": "text", "text": content}] if content else []
+    else:
+        blocks = [dict(block) for block in content]
+    if not blocks:
+        return message
+    blocks[-1]["cache_control"] = CACHE_CONTROL
+    return dict(message, content=blocks)
+
+
+def cache_breakpoints(messages: List[Dict], model: str, min_tokens: int = MIN_CACHEABLE_TOKENS) -> List[int]:
+    """cache_control을 붙일 메시지 인덱스. prefix가 min_tokens보다 짧은 위치는 제외합니다."""
+    if not messages:
+        return []
+    system_end = 0
+    while system_end < len(messages) and messages[system_end].get("role") == "system":
+        system_end += 1
+    candidates = sorted({index for index in (system_end - 1, len(messages) - 2, len(messages) - 1) if index >= 0})
+
+    breakpoints = []
+    prefix_tokens = 0
+    counted = 0
+    for index in candidates:
+        for message in messages[counted:index + 1]:
+            prefix_tokens += token_counter.count_message(message, model)
+        counted = index + 1
+        if prefix_tokens >= min_tokens:
+            breakpoints.append(index)
+    return breakpoints
+
+
+def mark_cache_breakpoints(messages: List[Dict], model: str, min_tokens: int = MIN_CACHEABLE_TOKENS) -> List[Dict]:
+    """안정적인 prefix 끝에 cache_control을 붙인 메시지 목록을 반환합니다. 원본은 바꾸지 않습니다."""
+    breakpoints = cache_breakpoints(messages, model, min_tokens)
+    if not breakpoints:
+        return messages
+    marked = list(messages)
+    for index in breakpoints:
+        marked[index] = _with_cache_control(marked[index])
+    return marked
+
+
+def cache_usage(usage) -> Tuple[int, int]:
+    """usage에서 (캐시에서 읽은 토큰, 캐시에 쓴 토큰)을 읽습니다. 보고되지 않았으면 0."""
+    if not usage:
+        return 0, 0
+    read = getattr(usage, "cache_read_input_tokens", None)
+    if read is None:
+        details = getattr(usage, "prompt_tokens_details", None)
+        read = getattr(details, "cached_tokens", None)
+    write = getattr(usage, "cache_creation_input_tokens", None)
+    return read or 0, write or 0
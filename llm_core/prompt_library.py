@@ -0,0 +1,153 @@
+"""유저 프롬프트 라이브러리 (SQLite).
+
+prompts.json 전체를 읽고 다시 쓰던 방식 대신, 프롬프트 하나를 저장/삭제할 때
+레코드 하나만 트랜잭션으로 바꿉니다. WAL 모드라 여러 사용자가 동시에 저장해도
+항목이 사라지지 않고, 읽는 쪽은 항상 커밋된 상태만 봅니다.
+기존 prompts.json은 처음 열 때 한 번 가져옵니다 (원본 파일은 그대로 둡니다).
+"""
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+PROMPT_LIBRARY_PATH = "prompts.sqlite3"
+LEGACY_PROMPTS_PATH = "prompts.json"
+
+
+class PromptLibrary:
+    def __init__(self, db_path: str = PROMPT_LIBRARY_PATH, legacy_path: Optional[str] = LEGACY_PROMPTS_PATH):
+        self.db_path = db_path
+        self.legacy_path = legacy_path
+        self._lock = threading.Lock()
+        self._ready = False
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        """쓰기 잠금을 처음부터 잡는 트랜잭션 (다른 프로세스의 쓰기와 직렬화됨)."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _ensure_ready(self) -> None:
+        if self._ready:
+            return
+        with self._lock:
+            if self._ready:
+                return
+            with self._connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+            with self._transaction() as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS prompts (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        name TEXT NOT NULL,
+                        content TEXT NOT NULL,
+                        description TEXT NOT NULL DEFAULT '',
+                        created_at TEXT NOT NULL,
+                        updated_at TEXT NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_prompts_name ON prompts(name)")
+                conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+                self._import_legacy(conn)
+            self._ready = True
+
+    def _import_legacy(self, conn: sqlite3.Connection) -> None:
+        """prompts.json을 한 번만 가져옵니다. 같은 트랜잭션 안에서 확인하므로 여러 프로세스가 동시에 열어도 중복되지 않습니다."""
+        if not self.legacy_path or not os.path.exists(self.legacy_path):
+            return
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_imported'").fetchone():
+            return
+        with open(self.legacy_path, "r", encoding="utf-8") as f:
+            prompts = json.load(f)
+        conn.executemany(
+            "INSERT INTO prompts (name, content, description, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+            [(p.get("name", ""), p.get("content", ""), p.get("description", ""),
+              p.get("created_at", ""), p.get("created_at", "")) for p in prompts],
+        )
+        conn.execute("INSERT INTO meta VALUES ('legacy_imported', ?)", (datetime.now().isoformat(),))
+
+    @staticmethod
+    def _row(row) -> Dict:
+        prompt_id, name, content, description, created_at, updated_at = row
+        return {"id": prompt_id, "name": name, "content": content, "description": description,
+                "created_at": created_at, "updated_at": updated_at}
+
+    def save(self, name: str, content: str, description: str = "", prompt_id: Optional[int] = None) -> int:
+        """프롬프트 하나를 추가하거나(prompt_id 없음) 수정하고 id를 반환합니다."""
+        self._ensure_ready()
+        now = datetime.now().isoformat()
+        with self._transaction() as conn:
+            if prompt_id is None:
+                cursor = conn.execute(
+                    "INSERT INTO prompts (name, content, description, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (name, content, description, now, now),
+                )
+                return cursor.lastrowid
+            cursor = conn.execute(
+                "UPDATE prompts SET name = ?, content = ?, description = ?, updated_at = ? WHERE id = ?",
+                (name, content, description, now, prompt_id),
+            )
+            if cursor.rowcount == 0:
+                raise KeyError(f"Prompt not found: {prompt_id}")
+            return prompt_id
+
+    def delete(self, prompt_id: int) -> bool:
+        """프롬프트 하나를 삭제합니다. 없으면 False."""
+        self._ensure_ready()
+        with self._transaction() as conn:
+            return conn.execute("DELETE FROM prompts WHERE id = ?", (prompt_id,)).rowcount > 0
+
+    def get(self, prompt_id: int) -> Optional[Dict]:
+        self._ensure_ready()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, name, content, description, created_at, updated_at FROM prompts WHERE id = ?", (prompt_id,)
+            ).fetchone()
+        return self._row(row) if row else None
+
+    def count(self) -> int:
+        self._ensure_ready()
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM prompts").fetchone()[0]
+
+    def list(self, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        """저장 순서(id)대로 프롬프트를 반환합니다."""
+        self._ensure_ready()
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, name, content, description, created_at, updated_at FROM prompts "
+                "ORDER BY id LIMIT ? OFFSET ?",
+                (-1 if limit is None else limit, offset),
+            ).fetchall()
+        return [self._row(row) for row in rows]
+
+
+_libraries: Dict[str, PromptLibrary] = {}
+_libraries_lock = threading.Lock()
+
+
+def get_prompt_library(db_path: str = PROMPT_LIBRARY_PATH, legacy_path: Optional[str] = LEGACY_PROMPTS_PATH) -> PromptLibrary:
+    """DB 파일별 프로세스 공용 PromptLibrary를 반환합니다."""
+    key = os.path.abspath(db_path)
+    with _libraries_lock:
+        library = _libraries.get(key)
+        if library is None:
+            library = _libraries[key] = PromptLibrary(db_path, legacy_path)
+        return library
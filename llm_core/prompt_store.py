@@ -0,0 +1,139 @@
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from .fileutil import atomic_write_text
+
+
+def parse_system_prompt(content: str) -> Tuple[str, str]:
+    """frontmatter에서 설명을 추출하고 (본문, 설명)을 반환합니다."""
+    description = ""
+    if content.startswith('---'):
+        try:
+            _, frontmatter, content = content.split('---', 2)
+            for line in frontmatter.strip().split('\n'):
+                if line.startswith('description:'):
+                    description = line.replace('description:', '').strip()
+        except ValueError:
+            pass
+    return content.strip(), description
+
+
+class SystemPromptStore:
+    """system_prompts 디렉토리의 mtime/size 기반 인덱스.
+
+    프로세스 전체에서 공유되며, 변경된 파일만 다시 읽습니다.
+    """
+
+    def __init__(self, directory: str = "system_prompts"):
+        self.directory = directory
+        self._lock = threading.Lock()
+        # filename -> (mtime_ns, size, prompt)
+        self._index: Dict[str, Tuple[int, int, Dict]] = {}
+        self._by_name: Dict[str, Dict] = {}
+        self._prompts: List[Dict] = []
+        self._dirty = False
+        self.errors: List[str] = []
+
+    def refresh(self) -> List[Dict]:
+        """디렉토리를 stat 하여 바뀐 파일만 다시 로드하고 목록을 반환합니다."""
+        with self._lock:
+            if not os.path.exists(self.directory):
+                os.makedirs(self.directory)
+
+            errors = []
+            seen = set()
+            changed = self._dirty
+            self._dirty = False
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if not entry.name.endswith('.md') or not entry.is_file():
+                        continue
+                    seen.add(entry.name)
+                    try:
+                        stat = entry.stat()
+                    except OSError as e:
+                        errors.append(f"Error loading {entry.name}: {str(e)}")
+                        continue
+
+                    cached = self._index.get(entry.name)
+                    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                        continue
+
+                    try:
+                        with open(entry.path, 'r', encoding='utf-8') as f:
+                            content, description = parse_system_prompt(f.read())
+                    except Exception as e:
+                        errors.append(f"Error loading {entry.name}: {str(e)}")
+                        self._index.pop(entry.name, None)
+                        changed = True
+                        continue
+
+                    self._index[entry.name] = (stat.st_mtime_ns, stat.st_size, {
+                        "name": os.path.splitext(entry.name)[0],
+                        "content": content,
+                        "description": description,
+                        "created_at": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                        "file_path": entry.path,
+                    })
+                    changed = True
+
+            for filename in list(self._index):
+                if filename not in seen:
+                    del self._index[filename]
+                    changed = True
+
+            if changed:
+                self._prompts = [self._index[f][2] for f in sorted(self._index)]
+                self._by_name = {p["name"]: p for p in self._prompts}
+            self.errors = errors
+            return list(self._prompts)
+
+    def get(self, name: str) -> Optional[Dict]:
+        """이름으로 프롬프트를 O(1)에 조회합니다. refresh() 이후의 상태를 기준으로 합니다."""
+        return self._by_name.get(name)
+
+    def invalidate(self, file_path: Optional[str] = None) -> None:
+        """저장/삭제 직후 해당 파일(또는 전체)의 인덱스를 무효화합니다."""
+        with self._lock:
+            self._dirty = True
+            if file_path is None:
+                self._index.clear()
+            else:
+                self._index.pop(os.path.basename(file_path), None)
+
+
+_stores: Dict[str, SystemPromptStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_system_prompt_store(directory: str = "system_prompts") -> SystemPromptStore:
+    """디렉토리별 프로세스 공용 SystemPromptStore를 반환합니다."""
+    key = os.path.abspath(directory)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = SystemPromptStore(directory)
+        return store
+
+
+def save_system_prompt(name: str, content: str, description: str = "", directory: str = "system_prompts") -> str:
+    """시스템 프롬프트를 마크다운 파일로 저장하고 경로를 반환합니다."""
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    # 특수문자 제거하고 공백을 언더스코어로 변경하여 파일명 생성
+    safe_name = "".join(c if c.isalnum() or c in ['-', '_'] else '_' for c in name)
+    file_path = os.path.join(directory, f"{safe_name}.md")
+
+    frontmatter = f"---\ndescription: {description}\n---\n\n" if description else ""
+    atomic_write_text(file_path, frontmatter + content)
+    get_system_prompt_store(directory).invalidate(file_path)
+    return file_path
+
+
+def delete_system_prompt(file_path: str) -> None:
+    """시스템 프롬프트 마크다운 파일을 삭제합니다."""
+    os.remove(file_path)
+    get_system_prompt_store(os.path.dirname(file_path) or ".").invalidate(file_path)
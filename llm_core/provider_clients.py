@@ -0,0 +1,150 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from .prompt_caching import mark_cache_breakpoints, supports_prompt_cache
+
+# OpenAI 호환 SDK 클라이언트를 재사용할 수 있는 provider
+OPENAI_COMPATIBLE_PROVIDERS = {"OpenAI (Default)", "OpenAI (Backup)"}
+
+POOL_MAX_CONNECTIONS = 100
+POOL_MAX_KEEPALIVE = 20
+POOL_KEEPALIVE_EXPIRY = 120.0
+REQUEST_TIMEOUT = 600.0
+
+_http_clients: Dict[Tuple[str, str], object] = {}
+_sdk_clients: Dict[Tuple[str, str], object] = {}
+_shared_client = None
+_clients_lock = threading.Lock()
+
+
+def http2_available() -> bool:
+    """httpx의 HTTP/2 지원에 필요한 h2 패키지가 설치되어 있는지 확인합니다."""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _new_http_client():
+    import httpx
+    return httpx.Client(
+        http2=http2_available(),
+        timeout=REQUEST_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=POOL_MAX_KEEPALIVE,
+            keepalive_expiry=POOL_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+def get_http_client(provider: str, api_key: str):
+    """(provider, key)별로 프로세스에서 하나만 만드는 keep-alive httpx 클라이언트를 반환합니다."""
+    key = (provider, api_key or "")
+    with _clients_lock:
+        client = _http_clients.get(key)
+        if client is None or client.is_closed:
+            client = _http_clients[key] = _new_http_client()
+        return client
+
+
+def get_sdk_client(provider: str, api_key: str):
+    """litellm에 client=로 넘길 OpenAI SDK 클라이언트를 반환합니다. 지원하지 않는 provider는 None."""
+    if provider not in OPENAI_COMPATIBLE_PROVIDERS or not api_key:
+        return None
+    key = (provider, api_key)
+    http_client = get_http_client(provider, api_key)
+    with _clients_lock:
+        client = _sdk_clients.get(key)
+        if client is None:
+            import openai
+            client = _sdk_clients[key] = openai.OpenAI(api_key=api_key, http_client=http_client)
+        return client
+
+
+def install_shared_session() -> None:
+    """client=를 받지 않는 provider 경로(Anthropic, Azure)도 litellm 공용 세션으로 연결을 재사용하게 합니다."""
+    global _shared_client
+    with _clients_lock:
+        if _shared_client is not None:
+            return
+        import litellm
+        _shared_client = _new_http_client()
+        if getattr(litellm, "client_session", None) is None:
+            litellm.client_session = _shared_client
+
+
+def close_clients() -> None:
+    """캐시된 모든 클라이언트를 닫습니다."""
+    global _shared_client
+    with _clients_lock:
+        for client in _http_clients.values():
+            client.close()
+        _http_clients.clear()
+        _sdk_clients.clear()
+        if _shared_client is not None:
+            _shared_client.close()
+            _shared_client = None
+
+
+def completion(**params):
+    """litellm.completion을 호출합니다. litellm은 import가 무거우므로 첫 호출 때 불러옵니다."""
+    from litellm import completion as litellm_completion
+    return litellm_completion(**params)
+
+
+async def acompletion(**params):
+    """litellm.acompletion을 호출합니다. litellm은 첫 호출 때 불러옵니다."""
+    from litellm import acompletion as litellm_acompletion
+    return await litellm_acompletion(**params)
+
+
+def build_completion_params(provider: str, model: str, messages: List[Dict], api_key: str,
+                            temperature: float = 0.7, max_tokens: int = 256, top_p: float = 1.0,
+                            stream: bool = False, json_format: bool = False,
+                            reuse_client: bool = True, prompt_cache: Optional[bool] = None, **extra) -> Dict:
+    """provider별 분기를 한 곳에 모아 litellm completion 파라미터를 만듭니다.
+
+    prompt_cache가 None이면 provider가 지원할 때(Anthropic) 시스템 프롬프트와 이전 턴에
+    cache_control 표시를 붙입니다.
+    """
+    if prompt_cache is None:
+        prompt_cache = supports_prompt_cache(provider)
+    if prompt_cache:
+        messages = mark_cache_breakpoints(messages, model)
+    completion_params = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "top_p": top_p,
+        "stream": stream,
+    }
+    completion_params.update(extra)
+
+    if provider in OPENAI_COMPATIBLE_PROVIDERS and api_key:
+        completion_params["api_key"] = api_key
+        if prompt_cache and stream:
+            # 캐시 토큰 수가 담긴 usage를 스트림 마지막 chunk로 받음
+            completion_params["stream_options"] = {"include_usage": True}
+
+    if provider == "Anthropic":
+        completion_params["api_key"] = api_key
+        completion_params["model_name"] = model
+
+    if provider == "Azure":
+        completion_params["api_key"] = api_key
+        completion_params["azure"] = True
+
+    if json_format:
+        completion_params["response_format"] = {"type": "json_object"}
+
+    if reuse_client:
+        client = get_sdk_client(provider, api_key)
+        if client is not None:
+            completion_params["client"] = client
+        else:
+            install_shared_session()
+
+    return completion_params
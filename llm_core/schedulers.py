@@ -0,0 +1,86 @@
+"""MultiAgentDialogue의 발화 순서 정책.
+
+next_speakers(dialogue)가 다음 라운드에 말할 에이전트 목록을 반환합니다. 둘 이상이면
+같은 transcript를 보고 동시에 답하는 패널 라운드가 됩니다.
+
+    RoundRobinScheduler()          에이전트 순서대로 한 명씩
+    ModeratorScheduler(moderator)  모더레이터 에이전트가 다음 발화자를 지목
+    PanelScheduler()               모든 에이전트가 매 라운드 동시에 답함
+"""
+import re
+from typing import TYPE_CHECKING, List, Optional
+
+if TYPE_CHECKING:
+    from .dialogue import LLMAgent, MultiAgentDialogue
+
+MODERATOR_INSTRUCTION = (
+    "You are moderating the discussion above. Decide who should speak next. "
+    "Answer with exactly one name from this list and nothing else: {names}"
+)
+
+
+class TurnScheduler:
+    # next_speakers가 provider를 호출하면 True (async 대화에서는 스레드에서 실행)
+    blocking = False
+
+    def start(self, dialogue: "MultiAgentDialogue") -> None:
+        """대화(또는 이어지는 사용자 메시지)가 시작될 때 호출됩니다."""
+
+    def next_speakers(self, dialogue: "MultiAgentDialogue") -> List["LLMAgent"]:
+        raise NotImplementedError
+
+    def helper_agents(self) -> List["LLMAgent"]:
+        """발화자는 아니지만 provider를 호출하는 에이전트 (토큰 사용량 집계용)."""
+        return []
+
+
+class RoundRobinScheduler(TurnScheduler):
+    """마지막 발화자 다음 에이전트가 말합니다. 사용자 메시지 뒤에는 첫 번째 에이전트부터."""
+
+    def next_speakers(self, dialogue: "MultiAgentDialogue") -> List["LLMAgent"]:
+        agents = dialogue.agents
+        transcript = dialogue.conversation_history
+        last = transcript.speaker(-1) if transcript else None
+        names = [agent.name for agent in agents]
+        index = (names.index(last) + 1) % len(agents) if last in names else 0
+        return [agents[index]]
+
+
+class PanelScheduler(TurnScheduler):
+    """모든 에이전트가 같은 메시지에 동시에 답합니다."""
+
+    def next_speakers(self, dialogue: "MultiAgentDialogue") -> List["LLMAgent"]:
+        return list(dialogue.agents)
+
+
+def pick_agent(reply: str, agents: List["LLMAgent"]) -> Optional["LLMAgent"]:
+    """응답에서 가장 먼저 나온 에이전트 이름을 찾습니다 ("Agent 1"과 "Agent 10"은 긴 이름 우선)."""
+    found = []
+    for agent in agents:
+        match = re.search(re.escape(agent.name.lower()), reply.lower())
+        if match:
+            found.append((match.start(), -len(agent.name), agent))
+    return min(found, key=lambda item: item[:2])[2] if found else None
+
+
+class ModeratorScheduler(TurnScheduler):
+    """모더레이터 에이전트가 transcript를 보고 다음 발화자를 고릅니다. 답을 알아볼 수 없으면 라운드 로빈."""
+
+    blocking = True
+
+    def __init__(self, moderator: "LLMAgent", instruction: str = MODERATOR_INSTRUCTION):
+        self.moderator = moderator
+        self.instruction = instruction
+        self.fallback = RoundRobinScheduler()
+
+    def start(self, dialogue: "MultiAgentDialogue") -> None:
+        dialogue.attach(self.moderator)
+
+    def helper_agents(self) -> List["LLMAgent"]:
+        return [self.moderator]
+
+    def next_speakers(self, dialogue: "MultiAgentDialogue") -> List["LLMAgent"]:
+        names = ", ".join(agent.name for agent in dialogue.agents)
+        reply = self.moderator.get_response(max_tokens=16, prompt=self.instruction.format(names=names))
+        agent = pick_agent(reply, dialogue.agents)
+        return [agent] if agent else self.fallback.next_speakers(dialogue)
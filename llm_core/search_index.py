@@ -0,0 +1,233 @@
+"""시스템 프롬프트·유저 프롬프트·저장된 채팅 메시지의 전문 검색 인덱스 (SQLite FTS5).
+
+원본은 entries 테이블에 두고 FTS5 external-content 테이블이 트리거로 따라가므로,
+문서 하나를 저장/삭제할 때 (kind, ref) 인덱스로 해당 행만 바꿉니다.
+프로세스가 꺼져 있는 동안 바뀐 파일은 reconcile()이 버전(mtime/updated_at)을 비교해 반영합니다.
+
+    kind: "system_prompt" (ref = 프롬프트 이름), "prompt" (ref = 프롬프트 id),
+          "chat" (ref = chat_history 파일명, position = 메시지 순서)
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+SEARCH_INDEX_PATH = os.path.join(".cache", "search.sqlite3")
+SNIPPET_TOKENS = 16
+# 일치하는 행이 이보다 많으면 bm25로 전부 채점하지 않고 최근 색인된 순서로 보여줌
+# (그 정도로 흔한 단어는 IDF가 0에 가까워 순위가 의미 없고, 채점 비용만 행 수에 비례해 커짐)
+RANKED_MATCH_LIMIT = 5000
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """사용자 입력을 FTS5 MATCH 식으로 바꿉니다. 단어마다 접두어 검색("단어"*)을 AND로 묶습니다.
+
+    한국어는 조사가 붙어 저장되므로(예: '프롬프트를') 접두어 검색이어야 '프롬프트'로 찾을 수 있습니다.
+    """
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return None
+    return "{title body} : (" + " ".join(f'"{term}"*' for term in terms) + ")"
+
+
+def _prompt_rows(prompt: Dict) -> List[Tuple[int, str, str, str]]:
+    body = f"{prompt.get('description') or ''}\n{prompt['content']}".strip()
+    return [(0, prompt["name"], body, "")]
+
+
+def _chat_rows(filename: str, messages: List[Dict]) -> List[Tuple[int, str, str, str]]:
+    return [(position, filename, message.get("content") or "", message.get("role", ""))
+            for position, message in enumerate(messages)]
+
+
+class SearchIndex:
+    def __init__(self, db_path: str = SEARCH_INDEX_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._ready = False
+        self.reconciled = False
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _ensure_schema(self) -> None:
+        if self._ready:
+            return
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    id INTEGER PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    ref TEXT NOT NULL,
+                    position INTEGER NOT NULL DEFAULT 0,
+                    title TEXT NOT NULL,
+                    body TEXT NOT NULL,
+                    meta TEXT NOT NULL DEFAULT ''
+                );
+                CREATE INDEX IF NOT EXISTS idx_entries_ref ON entries(kind, ref);
+                CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+                    title, body, kind, content='entries', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                );
+                CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+                    INSERT INTO entries_fts(rowid, title, body, kind) VALUES (new.id, new.title, new.body, new.kind);
+                END;
+                CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+                    INSERT INTO entries_fts(entries_fts, rowid, title, body, kind)
+                    VALUES ('delete', old.id, old.title, old.body, old.kind);
+                END;
+                CREATE TABLE IF NOT EXISTS sources (
+                    kind TEXT NOT NULL,
+                    ref TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    PRIMARY KEY (kind, ref)
+                );
+            """)
+        self._ready = True
+
+    def _delete(self, conn: sqlite3.Connection, kind: str, ref: str) -> None:
+        conn.execute("DELETE FROM entries WHERE kind = ? AND ref = ?", (kind, ref))
+        conn.execute("DELETE FROM sources WHERE kind = ? AND ref = ?", (kind, ref))
+
+    def _replace(self, conn: sqlite3.Connection, kind: str, ref: str, version: str,
+                 rows: Iterable[Tuple[int, str, str, str]]) -> None:
+        conn.execute("DELETE FROM entries WHERE kind = ? AND ref = ?", (kind, ref))
+        conn.executemany(
+            "INSERT INTO entries (kind, ref, position, title, body, meta) VALUES (?, ?, ?, ?, ?, ?)",
+            [(kind, ref, position, title, body, meta) for position, title, body, meta in rows],
+        )
+        conn.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?)", (kind, ref, version))
+
+    def index_document(self, kind: str, ref: str, version: str, rows: Sequence[Tuple[int, str, str, str]]) -> None:
+        """문서 하나의 행들을 (position, title, body, meta) 목록으로 교체합니다."""
+        with self._lock:
+            self._ensure_schema()
+            with self._connect() as conn:
+                self._replace(conn, kind, str(ref), version, rows)
+
+    def remove_document(self, kind: str, ref: str) -> None:
+        with self._lock:
+            self._ensure_schema()
+            with self._connect() as conn:
+                self._delete(conn, kind, str(ref))
+
+    def index_system_prompt(self, prompt: Dict) -> None:
+        """SystemPromptStore의 프롬프트 dict를 색인합니다. 버전은 파일 수정 시각입니다."""
+        self.index_document("system_prompt", prompt["name"], prompt["created_at"], _prompt_rows(prompt))
+
+    def index_prompt(self, prompt: Dict) -> None:
+        """PromptLibrary의 프롬프트 dict를 색인합니다."""
+        self.index_document("prompt", str(prompt["id"]), prompt["updated_at"], _prompt_rows(prompt))
+
+    def index_chat_history(self, file_path: str, messages: List[Dict]) -> None:
+        """저장된 채팅 파일의 메시지를 한 행씩 색인합니다."""
+        filename = os.path.basename(file_path)
+        self.index_document("chat", filename, str(os.stat(file_path).st_mtime_ns), _chat_rows(filename, messages))
+
+    def _versions(self, conn: sqlite3.Connection, kind: str) -> Dict[str, str]:
+        return dict(conn.execute("SELECT ref, version FROM sources WHERE kind = ?", (kind,)))
+
+    def reconcile(self, system_prompts: List[Dict], prompts: List[Dict], chat_directory: str = "chat_history") -> int:
+        """원본과 버전이 다른 문서만 다시 색인하고, 사라진 문서는 지웁니다. 다시 색인한 문서 수를 반환합니다."""
+        with self._lock:
+            self._ensure_schema()
+            changed = 0
+            with self._connect() as conn:
+                documents = {
+                    "system_prompt": {p["name"]: (p["created_at"], p) for p in system_prompts},
+                    "prompt": {str(p["id"]): (p["updated_at"], p) for p in prompts},
+                }
+                for kind, current in documents.items():
+                    indexed = self._versions(conn, kind)
+                    for ref in set(indexed) - set(current):
+                        self._delete(conn, kind, ref)
+                    for ref, (version, prompt) in current.items():
+                        if indexed.get(ref) != version:
+                            self._replace(conn, kind, ref, version, _prompt_rows(prompt))
+                            changed += 1
+
+                # 채팅 파일은 mtime이 바뀐 것만 읽음
+                indexed = self._versions(conn, "chat")
+                on_disk = {}
+                if os.path.isdir(chat_directory):
+                    with os.scandir(chat_directory) as entries:
+                        for entry in entries:
+                            if entry.name.endswith(".json") and entry.is_file():
+                                on_disk[entry.name] = (entry.path, str(entry.stat().st_mtime_ns))
+                for ref in set(indexed) - set(on_disk):
+                    self._delete(conn, "chat", ref)
+                for ref, (path, version) in on_disk.items():
+                    if indexed.get(ref) == version:
+                        continue
+                    try:
+                        with open(path, "r", encoding="utf-8") as f:
+                            messages = json.load(f).get("messages", [])
+                    except Exception:
+                        continue
+                    self._replace(conn, "chat", ref, version, _chat_rows(ref, messages))
+                    changed += 1
+            self.reconciled = True
+            return changed
+
+    def search(self, query: str, kinds: Optional[List[str]] = None, limit: int = 20,
+               offset: int = 0) -> Tuple[int, List[Dict]]:
+        """(전체 결과 수, 결과 페이지)를 반환합니다.
+
+        bm25 순(제목 일치에 가중치)이며, 결과가 RANKED_MATCH_LIMIT개를 넘는 넓은 질의는 최근 색인된 순입니다.
+        """
+        match = build_match_query(query)
+        if match is None:
+            return 0, []
+        # kind는 MATCH로 거르지 않고 값으로 비교 (토크나이저가 system_prompt를 system / prompt로 나눔)
+        where, args = "entries_fts MATCH ?", [match]
+        if kinds:
+            where += f" AND entries_fts.kind IN ({', '.join('?' for _ in kinds)})"
+            args.extend(kinds)
+        with self._lock:
+            self._ensure_schema()
+        with self._connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM entries_fts WHERE {where}", args).fetchone()[0]
+            if total <= RANKED_MATCH_LIMIT:
+                score, order = "bm25(entries_fts, 5.0, 1.0, 0.0)", "score"
+            else:
+                score, order = "0.0", "rowid DESC"
+            # 페이지에 들어갈 행만 entries와 조인
+            rows = conn.execute(
+                f"""SELECT e.kind, e.ref, e.position, e.title, e.meta, m.snippet, m.score
+                    FROM (
+                        SELECT rowid, snippet(entries_fts, 1, '**', '**', '…', {SNIPPET_TOKENS}) AS snippet,
+                               {score} AS score
+                        FROM entries_fts WHERE {where} ORDER BY {order} LIMIT ? OFFSET ?
+                    ) m JOIN entries e ON e.id = m.rowid
+                    ORDER BY m.score, m.rowid DESC""",
+                (*args, limit, offset),
+            ).fetchall()
+        return total, [{
+            "kind": kind, "ref": ref, "position": position, "title": title, "role": meta,
+            "snippet": snippet, "score": -score,
+        } for kind, ref, position, title, meta, snippet, score in rows]
+
+
+_indexes: Dict[str, SearchIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_search_index(db_path: str = SEARCH_INDEX_PATH) -> SearchIndex:
+    """DB 파일별 프로세스 공용 SearchIndex를 반환합니다."""
+    key = os.path.abspath(db_path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = SearchIndex(db_path)
+        return index
@@ -0,0 +1,242 @@
+"""채팅 세션의 append-only JSONL 로그.
+
+세션마다 chat_history/sessions/<session_id>.jsonl 파일 하나에 턴을 한 줄씩 추가합니다.
+디스크 쓰기는 백그라운드 writer 스레드가 처리하므로 렌더링 루프를 막지 않고,
+스트리밍 중인 응답도 일정 간격으로 조각(delta)을 기록해 두어 프로세스가 죽어도
+로그에서 세션을 다시 만들 수 있습니다.
+
+레코드 형식:
+    {"type": "start", "session_id": ..., "created_at": ...}
+    {"type": "message", "seq": 0, "role": "user", "content": ..., "at": ...}   # 페르소나 대화는 "name" 포함
+    {"type": "partial", "seq": 1, "role": "assistant", "delta": ..., "at": ...}
+    {"type": "reset", "at": ...}        # 채팅 초기화/불러오기로 메시지 목록이 바뀜
+"""
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+SESSIONS_DIRECTORY = os.path.join("chat_history", "sessions")
+CHECKPOINT_INTERVAL = 1.0
+
+
+class SessionLogWriter:
+    """큐에 쌓인 레코드를 백그라운드 스레드에서 파일별로 모아 append 하고 fsync 합니다."""
+
+    def __init__(self):
+        self._queue: "queue.Queue[Tuple[str, Dict]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="session-log-writer", daemon=True)
+        self._thread.start()
+        self.write_errors = 0
+
+    def append(self, path: str, record: Dict) -> None:
+        self._queue.put((path, record))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """지금까지 큐에 넣은 레코드가 디스크에 기록될 때까지 기다립니다."""
+        done = threading.Event()
+        self._queue.put(("", {"_flush": done}))
+        return done.wait(timeout)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            # 쌓여 있는 레코드를 한 번에 모아 파일당 한 번만 열고 fsync
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            by_path: Dict[str, List[str]] = {}
+            waiters = []
+            for path, record in batch:
+                if "_flush" in record:
+                    waiters.append(record["_flush"])
+                    continue
+                by_path.setdefault(path, []).append(json.dumps(record, ensure_ascii=False) + "\n")
+            for path, lines in by_path.items():
+                try:
+                    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                    with open(path, "a", encoding="utf-8") as f:
+                        f.writelines(lines)
+                        f.flush()
+                        os.fsync(f.fileno())
+                except OSError:
+                    self.write_errors += 1
+            for waiter in waiters:
+                waiter.set()
+
+
+_writer: Optional[SessionLogWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_session_log_writer() -> SessionLogWriter:
+    """프로세스 공용 writer를 반환합니다. 종료 시 남은 레코드를 기록합니다."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = SessionLogWriter()
+            atexit.register(_writer.flush, 5.0)
+        return _writer
+
+
+class PartialCheckpoint:
+    """스트리밍 중인 응답을 interval초마다 delta 레코드로 기록합니다."""
+
+    def __init__(self, session: "ChatSession", seq: int, role: str, interval: float = CHECKPOINT_INTERVAL,
+                 clock=time.monotonic):
+        self.session = session
+        self.seq = seq
+        self.role = role
+        self.interval = interval
+        self.clock = clock
+        self._pending: List[str] = []
+        self._last_checkpoint = clock()
+
+    def write(self, content: Optional[str]) -> None:
+        if not content:
+            return
+        self._pending.append(content)
+        if self.clock() - self._last_checkpoint >= self.interval:
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        if self._pending:
+            self.session._append({"type": "partial", "seq": self.seq, "role": self.role,
+                                  "delta": "".join(self._pending)})
+            self._pending = []
+        self._last_checkpoint = self.clock()
+
+
+class ChatSession:
+    """Streamlit 세션 하나의 메시지 목록을 로그와 맞춰 둡니다."""
+
+    def __init__(self, session_id: Optional[str] = None, directory: str = SESSIONS_DIRECTORY,
+                 writer: Optional[SessionLogWriter] = None, logged: Optional[List[Dict]] = None):
+        self.session_id = session_id or f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        self.path = os.path.join(directory, f"{self.session_id}.jsonl")
+        self.writer = writer or get_session_log_writer()
+        # 로그에 기록된 메시지 (sync에서 새 메시지/목록 교체를 판단하는 기준)
+        self._logged: List[Dict] = list(logged or [])
+        # 새 세션은 첫 메시지를 기록할 때 파일을 만듭니다 (페이지만 열어 본 세션은 남기지 않음)
+        self._started = logged is not None
+
+    @classmethod
+    def resume(cls, path: str, writer: Optional[SessionLogWriter] = None) -> Tuple["ChatSession", List[Dict]]:
+        """로그에서 세션을 다시 만들고, 같은 파일에 이어서 기록하는 ChatSession과 메시지 목록을 반환합니다."""
+        messages, interrupted = rebuild_session(path)
+        session_id = os.path.splitext(os.path.basename(path))[0]
+        session = cls(session_id, os.path.dirname(path), writer, logged=messages)
+        if interrupted:
+            # 끊긴 응답을 복구한 내용 그대로 확정해 두어야 이후 seq가 맞습니다
+            seq = len(messages) - 1
+            session._append({"type": "message", "seq": seq, "role": messages[seq]["role"],
+                             "content": messages[seq]["content"]})
+        return session, messages
+
+    def _append(self, record: Dict) -> None:
+        if not self._started:
+            self._started = True
+            self._append({"type": "start", "session_id": self.session_id, "created_at": datetime.now().isoformat()})
+        record.setdefault("at", datetime.now().isoformat())
+        self.writer.append(self.path, record)
+
+    def sync(self, messages: List[Dict]) -> None:
+        """마지막 sync 이후 추가된 메시지만 기록합니다. 목록이 교체됐으면 reset 후 전체를 기록합니다."""
+        logged = len(self._logged)
+        if len(messages) < logged or (logged and messages[logged - 1] != self._logged[-1]):
+            self._append({"type": "reset"})
+            self._logged = []
+            logged = 0
+        for seq in range(logged, len(messages)):
+            message = messages[seq]
+            record = {"type": "message", "seq": seq, "role": message["role"], "content": message["content"]}
+            if message.get("name"):
+                record["name"] = message["name"]
+            self._append(record)
+            self._logged.append(dict(message))
+
+    def partial(self, role: str = "assistant", interval: float = CHECKPOINT_INTERVAL) -> PartialCheckpoint:
+        """다음 메시지 자리에 기록될 스트리밍 체크포인트를 만듭니다."""
+        return PartialCheckpoint(self, len(self._logged), role, interval)
+
+
+def rebuild_session(path: str) -> Tuple[List[Dict], bool]:
+    """로그를 재생해 메시지 목록과, 마지막 응답이 스트리밍 도중 끊겼는지 여부를 반환합니다."""
+    messages: List[Dict] = []
+    partials: Dict[int, Dict] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # 기록 도중 끊긴 마지막 줄
+            kind = record.get("type")
+            if kind == "reset":
+                messages, partials = [], {}
+            elif kind == "message":
+                seq = record["seq"]
+                while len(messages) < seq and len(messages) in partials:
+                    messages.append(partials.pop(len(messages)))
+                del messages[seq:]
+                message = {"role": record["role"], "content": record["content"]}
+                if record.get("name"):
+                    message["name"] = record["name"]
+                messages.append(message)
+                partials.pop(record["seq"], None)
+            elif kind == "partial":
+                partial = partials.setdefault(record["seq"], {"role": record["role"], "content": ""})
+                partial["content"] += record["delta"]
+    interrupted = partials.get(len(messages))
+    if interrupted:
+        messages.append(interrupted)
+    return messages, interrupted is not None
+
+
+# file_path -> ((mtime_ns, size), (message_count, interrupted)); 바뀌지 않은 로그는 다시 읽지 않음
+_summaries: Dict[str, Tuple[Tuple[int, int], Tuple[int, bool]]] = {}
+
+
+def _summarize(entry: os.DirEntry) -> Tuple[int, bool]:
+    stat = entry.stat()
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _summaries.get(entry.path)
+    if cached and cached[0] == version:
+        return cached[1]
+    messages, interrupted = rebuild_session(entry.path)
+    summary = (len(messages), interrupted)
+    _summaries[entry.path] = (version, summary)
+    return summary
+
+
+def list_sessions(directory: str = SESSIONS_DIRECTORY, limit: Optional[int] = 20,
+                  exclude: Optional[str] = None) -> List[Dict]:
+    """최근에 기록된 세션을 최신순으로 반환합니다. 최근 limit개 로그 중 바뀐 것만 다시 읽습니다."""
+    try:
+        entries = [entry for entry in os.scandir(directory)
+                   if entry.name.endswith(".jsonl") and entry.name != f"{exclude}.jsonl"]
+    except FileNotFoundError:
+        return []
+    entries.sort(key=lambda entry: entry.stat().st_mtime_ns, reverse=True)
+    sessions = []
+    for entry in entries[:limit]:
+        try:
+            message_count, interrupted = _summarize(entry)
+        except OSError:
+            continue
+        if not message_count:
+            continue
+        sessions.append({
+            "session_id": entry.name[:-len(".jsonl")],
+            "file_path": entry.path,
+            "updated_at": datetime.fromtimestamp(entry.stat().st_mtime).isoformat(),
+            "message_count": message_count,
+            "interrupted": interrupted,
+        })
+    return sessions
@@ -0,0 +1,127 @@
+"""provider API 키와 기본 파라미터를 한 번만 읽어 프로세스에서 공유하는 설정 서비스.
+
+기본 파라미터는 settings.json에 저장되어 재시작 후에도 유지됩니다. 키와 설정은 캐시되며,
+값을 바꾸는 쪽(set_api_key, save_settings)이 캐시를 무효화합니다. 다른 프로세스가
+settings.json을 바꾼 경우에는 파일 mtime이 달라져 다시 읽습니다.
+"""
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass, fields
+from typing import Callable, Dict, Optional
+
+from .config import providers
+from .fileutil import atomic_write_text
+
+SETTINGS_PATH = "settings.json"
+
+
+@dataclass
+class ChatSettings:
+    temperature: float = 0.7
+    top_p: float = 1.0
+    max_tokens: int = 256
+    streaming: bool = True
+    json_format: bool = False
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ChatSettings":
+        """알 수 없는 키는 버리고, 타입이 맞지 않는 값은 기본값으로 둡니다."""
+        values = {}
+        for field in fields(cls):
+            value = data.get(field.name)
+            if value is None:
+                continue
+            if field.type is bool:
+                if isinstance(value, bool):
+                    values[field.name] = value
+                continue
+            try:
+                values[field.name] = field.type(value)
+            except (TypeError, ValueError):
+                continue
+        return cls(**values)
+
+
+class ConfigService:
+    def __init__(self, path: str = SETTINGS_PATH, secret_lookup: Optional[Callable[[str], Optional[str]]] = None):
+        self.path = path
+        self.secret_lookup = secret_lookup
+        self._lock = threading.Lock()
+        self._api_keys: Optional[Dict[str, str]] = None
+        self._settings: Optional[ChatSettings] = None
+        self._settings_mtime_ns: Optional[int] = None
+
+    def api_keys(self) -> Dict[str, str]:
+        """secrets와 환경 변수에서 찾은 provider별 키를 반환합니다 (없는 provider는 빠짐)."""
+        with self._lock:
+            if self._api_keys is None:
+                api_keys = {}
+                for provider, env_var in providers.items():
+                    api_key = (self.secret_lookup(env_var) if self.secret_lookup else None) or os.getenv(env_var)
+                    if api_key:
+                        api_keys[provider] = api_key
+                self._api_keys = api_keys
+            return dict(self._api_keys)
+
+    def api_key(self, provider: str) -> Optional[str]:
+        return self.api_keys().get(provider)
+
+    def set_api_key(self, provider: str, api_key: str) -> None:
+        """입력받은 키를 프로세스 환경 변수에 넣고 키 캐시를 무효화합니다 (디스크에는 쓰지 않음)."""
+        os.environ[providers[provider]] = api_key
+        self.invalidate_api_keys()
+
+    def invalidate_api_keys(self) -> None:
+        with self._lock:
+            self._api_keys = None
+
+    def _file_mtime_ns(self) -> Optional[int]:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def settings(self) -> ChatSettings:
+        """저장된 기본 파라미터를 반환합니다. 파일이 없거나 깨졌으면 기본값입니다."""
+        mtime_ns = self._file_mtime_ns()
+        with self._lock:
+            if self._settings is None or mtime_ns != self._settings_mtime_ns:
+                data = {}
+                if mtime_ns is not None:
+                    try:
+                        with open(self.path, "r", encoding="utf-8") as f:
+                            data = json.load(f).get("chat", {})
+                    except (OSError, ValueError, AttributeError):
+                        data = {}
+                self._settings = ChatSettings.from_dict(data)
+                self._settings_mtime_ns = mtime_ns
+            return self._settings
+
+    def save_settings(self, settings: ChatSettings) -> None:
+        """기본 파라미터를 settings.json에 원자적으로 저장하고 캐시를 갱신합니다."""
+        with self._lock:
+            atomic_write_text(self.path, json.dumps({"chat": asdict(settings)}, ensure_ascii=False, indent=2))
+            self._settings = settings
+            self._settings_mtime_ns = self._file_mtime_ns()
+
+    def invalidate(self) -> None:
+        """키와 설정 캐시를 모두 비워 다음 조회 때 다시 읽게 합니다."""
+        with self._lock:
+            self._api_keys = None
+            self._settings = None
+
+
+_services: Dict[str, ConfigService] = {}
+_services_lock = threading.Lock()
+
+
+def get_config_service(path: str = SETTINGS_PATH,
+                       secret_lookup: Optional[Callable[[str], Optional[str]]] = None) -> ConfigService:
+    """설정 파일별 프로세스 공용 ConfigService를 반환합니다. secret_lookup은 처음 만들 때만 쓰입니다."""
+    key = os.path.abspath(path)
+    with _services_lock:
+        service = _services.get(key)
+        if service is None:
+            service = _services[key] = ConfigService(path, secret_lookup)
+        return service
@@ -0,0 +1,101 @@
+"""에이전트 대화를 max_turns 전에 끝내는 조건들.
+
+매 턴이 끝날 때 LLMDialogue가 check(dialogue, entry)를 호출하고, 하나라도 이유 문자열을
+반환하면 대화를 멈추고 dialogue.stop_reason에 남깁니다. 조건 객체는 상태를 갖지 않으므로
+여러 대화(배치 실행)에서 같은 인스턴스를 함께 써도 됩니다.
+"""
+import re
+import time
+from typing import TYPE_CHECKING, Dict, FrozenSet, List, Optional
+
+if TYPE_CHECKING:
+    from .dialogue import LLMDialogue
+
+
+class StopCondition:
+    def check(self, dialogue: "LLMDialogue", entry: Dict) -> Optional[str]:
+        """방금 끝난 턴(entry) 기준으로 멈춰야 하면 이유를, 아니면 None을 반환합니다."""
+        raise NotImplementedError
+
+
+def ngrams(text: str, n: int = 3) -> FrozenSet:
+    """소문자 단어 n-gram 집합. 단어가 n개보다 적으면 단어 집합을 씁니다."""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < n:
+        return frozenset((word,) for word in words)
+    return frozenset(tuple(words[i:i + n]) for i in range(len(words) - n + 1))
+
+
+def similarity(a: FrozenSet, b: FrozenSet) -> float:
+    """n-gram 집합의 Jaccard 유사도 (0~1)."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class RepetitionStop(StopCondition):
+    """새 응답이 같은 에이전트의 최근 window개 응답 중 하나와 threshold 이상 겹치면 멈춥니다 (반복).
+
+    다른 에이전트와는 비교하지 않습니다 (패널 라운드에서 같은 질문에 비슷하게 답하는 것은 반복이 아님).
+    """
+
+    def __init__(self, threshold: float = 0.8, n: int = 3, window: int = 4):
+        self.threshold = threshold
+        self.n = n
+        self.window = window
+
+    def check(self, dialogue: "LLMDialogue", entry: Dict) -> Optional[str]:
+        current = ngrams(entry["message"], self.n)
+        transcript = dialogue.conversation_history
+        # 방금 추가된 항목을 빼고 뒤에서부터 같은 발화자의 응답 window개만 비교 (다른 항목은 발화자 id만 확인)
+        compared = 0
+        for index in range(len(transcript) - 2, -1, -1):
+            if compared >= self.window:
+                break
+            if transcript.speaker(index) != entry["speaker"]:
+                continue
+            compared += 1
+            score = similarity(current, ngrams(transcript.message(index), self.n))
+            if score >= self.threshold:
+                return f"repetition: turn {entry['turn']} is {score:.0%} similar to turn {transcript.turn(index)}"
+        return None
+
+
+class TokenBudgetStop(StopCondition):
+    """대화에 쓰인 prompt + completion 토큰 합이 max_tokens를 넘으면 멈춥니다 (모더레이터 요청 포함)."""
+
+    def __init__(self, max_tokens: int):
+        self.max_tokens = max_tokens
+
+    def check(self, dialogue: "LLMDialogue", entry: Dict) -> Optional[str]:
+        used = sum(agent.usage["prompt_tokens"] + agent.usage["completion_tokens"] for agent in dialogue.all_agents)
+        if used >= self.max_tokens:
+            return f"token budget: {used:,} / {self.max_tokens:,} tokens used"
+        return None
+
+
+class DeadlineStop(StopCondition):
+    """대화를 시작한 뒤 seconds초가 지나면 멈춥니다. 진행 중인 턴은 끝까지 받습니다."""
+
+    def __init__(self, seconds: float, clock=time.monotonic):
+        self.seconds = seconds
+        self.clock = clock
+
+    def check(self, dialogue: "LLMDialogue", entry: Dict) -> Optional[str]:
+        elapsed = self.clock() - dialogue.started_at
+        if elapsed >= self.seconds:
+            return f"deadline: {elapsed:.1f}s elapsed (limit {self.seconds:g}s)"
+        return None
+
+
+def build_stop_conditions(repetition_threshold: Optional[float] = None, token_budget: Optional[int] = None,
+                          deadline: Optional[float] = None) -> List[StopCondition]:
+    """UI/CLI 옵션에서 조건 목록을 만듭니다. 0이나 None인 옵션은 빠집니다."""
+    conditions: List[StopCondition] = []
+    if repetition_threshold:
+        conditions.append(RepetitionStop(repetition_threshold))
+    if token_budget:
+        conditions.append(TokenBudgetStop(token_budget))
+    if deadline:
+        conditions.append(DeadlineStop(deadline))
+    return conditions
@@ -0,0 +1,406 @@
+"""completion 호출별 지연 시간·토큰 텔레메트리.
+
+모든 completion 호출을 instrumented_completion으로 감싸면 첫 토큰까지 걸린 시간(TTFT),
+토큰 간 지연, 전체 지연, prompt/completion 토큰 수, 프롬프트 캐시 읽기/쓰기 토큰 수,
+오류를 provider/model별로 기록합니다.
+이벤트는 메모리 링 버퍼와 append-only JSONL 로그(크기 기준으로 회전)에 쌓이고, 집계 값은 Prometheus
+텍스트 형식으로 파일이나 로컬 HTTP 엔드포인트(/metrics)로 내보낼 수 있습니다.
+
+    LLM_METRICS_PORT=9464          # 설정하면 http://127.0.0.1:9464/metrics 를 엽니다
+    LLM_METRICS_FILE=llm.prom      # 설정하면 textfile collector용 파일을 갱신합니다
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .completion_cache import chunk_text
+from .context_window import token_counter
+from .fileutil import atomic_write_text
+from .prompt_caching import cache_usage
+
+TELEMETRY_LOG_PATH = os.path.join(".cache", "telemetry.jsonl")
+RING_BUFFER_SIZE = 5000
+# 로그가 이 크기를 넘으면 telemetry.jsonl.1, .2 … 로 밀고 LOG_BACKUPS개만 남김
+LOG_MAX_BYTES = 8 * 1024 * 1024
+LOG_BACKUPS = 2
+# Prometheus 히스토그램 버킷 (초)
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+INTER_TOKEN_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+METRICS_FILE_INTERVAL = 5.0
+
+
+@dataclass
+class CompletionEvent:
+    timestamp: float
+    source: str
+    provider: str
+    model: str
+    stream: bool
+    latency: float
+    time_to_first_token: Optional[float] = None
+    inter_token_latency: Optional[float] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    error: Optional[str] = None
+
+
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+class Telemetry:
+    """completion 이벤트를 링 버퍼·JSONL 로그에 기록하고 Prometheus 지표로 집계합니다."""
+
+    def __init__(self, log_path: Optional[str] = TELEMETRY_LOG_PATH, capacity: int = RING_BUFFER_SIZE,
+                 metrics_file: Optional[str] = None, log_max_bytes: int = LOG_MAX_BYTES,
+                 log_backups: int = LOG_BACKUPS):
+        self.log_path = log_path
+        self.log_max_bytes = log_max_bytes
+        self.log_backups = log_backups
+        self.metrics_file = metrics_file
+        self._events: "deque[CompletionEvent]" = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._requests: Dict[Tuple[str, str, str, str], int] = {}
+        self._tokens: Dict[Tuple[str, str, str], int] = {}
+        self._latency: Dict[Tuple[str, str], _Histogram] = {}
+        self._ttft: Dict[Tuple[str, str], _Histogram] = {}
+        self._inter_token: Dict[Tuple[str, str], _Histogram] = {}
+        self._metrics_written_at = 0.0
+        self.log_errors = 0
+        self.server: Optional[ThreadingHTTPServer] = None
+
+    def record(self, event: CompletionEvent) -> None:
+        """이벤트를 기록합니다. 로그 쓰기 실패는 completion 호출을 막지 않습니다."""
+        key = (event.provider, event.model)
+        with self._lock:
+            self._events.append(event)
+            status = "error" if event.error else "ok"
+            request_key = (event.provider, event.model, event.source, status)
+            self._requests[request_key] = self._requests.get(request_key, 0) + 1
+            for kind, count in (("prompt", event.prompt_tokens), ("completion", event.completion_tokens),
+                                ("cache_read", event.cache_read_tokens), ("cache_write", event.cache_write_tokens)):
+                if count or kind in ("prompt", "completion"):
+                    self._tokens[key + (kind,)] = self._tokens.get(key + (kind,), 0) + count
+            self._latency.setdefault(key, _Histogram(LATENCY_BUCKETS)).observe(event.latency)
+            if event.time_to_first_token is not None:
+                self._ttft.setdefault(key, _Histogram(LATENCY_BUCKETS)).observe(event.time_to_first_token)
+            if event.inter_token_latency is not None:
+                self._inter_token.setdefault(key, _Histogram(INTER_TOKEN_BUCKETS)).observe(event.inter_token_latency)
+            if self.log_path:
+                try:
+                    os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+                    with open(self.log_path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(asdict(event), ensure_ascii=False) + "\n")
+                        size = f.tell()
+                    if self.log_max_bytes and size >= self.log_max_bytes:
+                        rotate_log(self.log_path, self.log_backups)
+                except OSError:
+                    self.log_errors += 1
+        if self.metrics_file and time.monotonic() - self._metrics_written_at >= METRICS_FILE_INTERVAL:
+            try:
+                self.write_prometheus(self.metrics_file)
+            except OSError:
+                self.log_errors += 1
+
+    def events(self) -> List[CompletionEvent]:
+        """링 버퍼에 남아 있는 최근 이벤트를 오래된 순서로 반환합니다."""
+        with self._lock:
+            return list(self._events)
+
+    def observe(self, completion_fn: Callable, provider: str, source: str, params: Dict):
+        """completion_fn(**params)를 호출하고 결과를 기록합니다. 스트리밍은 소비가 끝날 때 기록합니다."""
+        started = time.perf_counter()
+        try:
+            response = completion_fn(**params)
+        except Exception as e:
+            self._record_response(None, provider, source, params, started, error=e)
+            raise
+        if params.get("stream"):
+            return self._observe_stream(response, provider, source, params, started)
+        self._record_response(response, provider, source, params, started)
+        return response
+
+    async def aobserve(self, acompletion_fn: Callable, provider: str, source: str, params: Dict):
+        """observe의 non-streaming async 버전입니다."""
+        started = time.perf_counter()
+        try:
+            response = await acompletion_fn(**params)
+        except Exception as e:
+            self._record_response(None, provider, source, params, started, error=e)
+            raise
+        self._record_response(response, provider, source, params, started)
+        return response
+
+    def _record_response(self, response, provider: str, source: str, params: Dict, started: float,
+                         error: Optional[Exception] = None) -> None:
+        latency = time.perf_counter() - started
+        usage = getattr(response, "usage", None)
+        cache_read, cache_write = cache_usage(usage)
+        self.record(CompletionEvent(
+            timestamp=time.time(),
+            source=source,
+            provider=provider,
+            model=params.get("model", ""),
+            stream=bool(params.get("stream")),
+            latency=latency,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            cache_read_tokens=cache_read,
+            cache_write_tokens=cache_write,
+            error=str(error) if error else None,
+        ))
+
+    def _observe_stream(self, stream, provider: str, source: str, params: Dict, started: float) -> Iterator:
+        first_token_at = last_token_at = None
+        parts: List[str] = []
+        prompt_tokens = completion_tokens = None
+        cache_read = cache_write = 0
+        error = None
+        try:
+            for chunk in stream:
+                usage = getattr(chunk, "usage", None)
+                if usage:
+                    prompt_tokens = getattr(usage, "prompt_tokens", None) or prompt_tokens
+                    completion_tokens = getattr(usage, "completion_tokens", None) or completion_tokens
+                    cache_read, cache_write = cache_usage(usage)
+                content = chunk_text(chunk)
+                if content:
+                    last_token_at = time.perf_counter()
+                    if first_token_at is None:
+                        first_token_at = last_token_at
+                    parts.append(content)
+                yield chunk
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            # 중간에 소비를 멈춘 경우(GeneratorExit)도 받은 만큼 기록
+            model = params.get("model", "")
+            text = "".join(parts)
+            completion_tokens = completion_tokens or (token_counter.count_text(text, model) if text else 0)
+            inter_token = None
+            if first_token_at is not None and completion_tokens > 1:
+                inter_token = (last_token_at - first_token_at) / (completion_tokens - 1)
+            self.record(CompletionEvent(
+                timestamp=time.time(),
+                source=source,
+                provider=provider,
+                model=model,
+                stream=True,
+                latency=time.perf_counter() - started,
+                time_to_first_token=first_token_at - started if first_token_at is not None else None,
+                inter_token_latency=inter_token,
+                prompt_tokens=prompt_tokens or token_counter.count_messages(params.get("messages", []), model),
+                completion_tokens=completion_tokens,
+                cache_read_tokens=cache_read,
+                cache_write_tokens=cache_write,
+                error=str(error) if error else None,
+            ))
+
+    def prometheus_text(self) -> str:
+        """누적 지표를 Prometheus 텍스트 형식으로 반환합니다."""
+        lines = [
+            "# HELP llm_requests_total Completion requests by provider, model, source and status.",
+            "# TYPE llm_requests_total counter",
+        ]
+        with self._lock:
+            for (provider, model, source, status), count in sorted(self._requests.items()):
+                lines.append(f"llm_requests_total{_labels(provider=provider, model=model, source=source, status=status)} {count}")
+            lines += [
+                "# HELP llm_tokens_total Prompt, completion and prompt-cache read/write tokens by provider and model.",
+                "# TYPE llm_tokens_total counter",
+            ]
+            for (provider, model, kind), count in sorted(self._tokens.items()):
+                lines.append(f"llm_tokens_total{_labels(provider=provider, model=model, kind=kind)} {count}")
+            for name, help_text, histograms in (
+                ("llm_request_latency_seconds", "Total completion latency.", self._latency),
+                ("llm_time_to_first_token_seconds", "Time to first streamed token.", self._ttft),
+                ("llm_inter_token_latency_seconds", "Mean gap between streamed tokens per request.", self._inter_token),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for (provider, model), histogram in sorted(histograms.items()):
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f"{name}_bucket{_labels(provider=provider, model=model, le=bound)} {count}")
+                    lines.append(f"{name}_bucket{_labels(provider=provider, model=model, le='+Inf')} {histogram.count}")
+                    lines.append(f"{name}_sum{_labels(provider=provider, model=model)} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{_labels(provider=provider, model=model)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """node_exporter textfile collector가 반쯤 쓰인 파일을 읽지 않도록 원자적으로 씁니다."""
+        self._metrics_written_at = time.monotonic()
+        atomic_write_text(path, self.prometheus_text())
+
+    def serve_prometheus(self, port: int = 9464, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """/metrics 엔드포인트를 데몬 스레드로 엽니다. 이미 열려 있으면 기존 서버를 반환합니다."""
+        if self.server is not None:
+            return self.server
+        telemetry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = telemetry.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self.server.serve_forever, name="llm-metrics", daemon=True).start()
+        return self.server
+
+
+_telemetry: Optional[Telemetry] = None
+_telemetry_lock = threading.Lock()
+
+
+def get_telemetry() -> Telemetry:
+    """프로세스에서 공유하는 Telemetry를 반환합니다. LLM_METRICS_PORT/LLM_METRICS_FILE 환경 변수를 따릅니다."""
+    global _telemetry
+    with _telemetry_lock:
+        if _telemetry is None:
+            _telemetry = Telemetry(metrics_file=os.getenv("LLM_METRICS_FILE") or None)
+            port = os.getenv("LLM_METRICS_PORT")
+            if port:
+                try:
+                    _telemetry.serve_prometheus(int(port))
+                except (OSError, ValueError):
+                    # 다른 프로세스가 이미 포트를 쓰고 있으면 파일/대시보드로만 확인
+                    pass
+        return _telemetry
+
+
+def instrumented_completion(completion_fn: Callable, provider: str, source: str = "chat",
+                            telemetry: Optional[Telemetry] = None) -> Callable:
+    """completion(**params) 형태로 호출할 수 있는, 텔레메트리가 기록되는 함수를 반환합니다."""
+    def call(**params):
+        return (telemetry or get_telemetry()).observe(completion_fn, provider, source, params)
+    return call
+
+
+def ainstrumented_completion(acompletion_fn: Callable, provider: str, source: str = "chat",
+                             telemetry: Optional[Telemetry] = None) -> Callable:
+    async def call(**params):
+        return await (telemetry or get_telemetry()).aobserve(acompletion_fn, provider, source, params)
+    return call
+
+
+def rotate_log(log_path: str, backups: int = LOG_BACKUPS) -> None:
+    """log → log.1 → log.2 … 로 밀고, backups개를 넘는 가장 오래된 파일은 버립니다."""
+    if backups <= 0:
+        os.remove(log_path)
+        return
+    for index in range(backups, 0, -1):
+        source = f"{log_path}.{index - 1}" if index > 1 else log_path
+        if os.path.exists(source):
+            os.replace(source, f"{log_path}.{index}")
+
+
+# 로그 파일별 파싱 결과: path -> (inode, 파싱한 바이트 수, 이벤트 목록)
+_parsed_logs: Dict[str, Tuple[int, int, List[Dict]]] = {}
+_parsed_logs_lock = threading.Lock()
+
+
+def _parse_log(path: str) -> List[Dict]:
+    """로그 파일 하나의 이벤트. 같은 파일이면 지난번 이후 추가된 줄만 파싱합니다."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        _parsed_logs.pop(path, None)
+        return []
+    inode, offset, events = _parsed_logs.get(path, (None, 0, []))
+    if inode != stat.st_ino or stat.st_size < offset:
+        # 회전되어 다른 파일이 됨
+        offset, events = 0, []
+    if stat.st_size > offset:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        # 아직 쓰는 중인 마지막 줄은 다음에 읽음
+        data = data[:data.rfind(b"\n") + 1]
+        for line in data.splitlines():
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # 쓰다가 중단된 줄
+        offset += len(data)
+    _parsed_logs[path] = (stat.st_ino, offset, events)
+    return events
+
+
+def read_events(log_path: str = TELEMETRY_LOG_PATH, since: Optional[float] = None,
+                backups: int = LOG_BACKUPS) -> List[Dict]:
+    """회전된 로그까지 오래된 순서로 이벤트를 읽습니다. since(epoch 초) 이후 것만 반환합니다.
+
+    파싱 결과를 파일별로 캐시하므로 대시보드를 다시 그릴 때는 새로 추가된 줄만 파싱하고,
+    마지막 수정 시각이 since 이전인 회전 파일은 열지 않습니다.
+    """
+    events: List[Dict] = []
+    with _parsed_logs_lock:
+        for path in [f"{log_path}.{index}" for index in range(backups, 0, -1)] + [log_path]:
+            if since is not None and path != log_path:
+                try:
+                    if os.stat(path).st_mtime < since:
+                        continue
+                except FileNotFoundError:
+                    continue
+            parsed = _parse_log(path)
+            events.extend(parsed if since is None else (e for e in parsed if e.get("timestamp", 0) >= since))
+    return events
+
+
+def events_frame(events: List[Dict]):
+    """이벤트 목록을 time 컬럼이 있는 pandas DataFrame으로 바꿉니다."""
+    import pandas as pd
+
+    columns = [field for field in CompletionEvent.__dataclass_fields__]
+    df = pd.DataFrame(events, columns=columns)
+    df["time"] = pd.to_datetime(df["timestamp"], unit="s")
+    return df
+
+
+def latency_percentiles(df, metric: str = "latency", freq: str = "5min"):
+    """성공한 요청의 metric을 model·시간 구간별 p50/p95/p99로 집계한 long-format DataFrame을 반환합니다."""
+    import pandas as pd
+
+    ok = df[df["error"].isna() & df[metric].notna()]
+    if ok.empty:
+        return pd.DataFrame(columns=["time", "model", "percentile", "seconds"])
+    grouped = ok.groupby([pd.Grouper(key="time", freq=freq), "model"])[metric]
+    percentiles = grouped.quantile([0.5, 0.95, 0.99]).rename("seconds").reset_index()
+    percentiles = percentiles.rename(columns={"level_2": "percentile"})
+    percentiles["percentile"] = percentiles["percentile"].map({0.5: "p50", 0.95: "p95", 0.99: "p99"})
+    return percentiles
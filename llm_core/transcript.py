@@ -0,0 +1,122 @@
+"""여러 에이전트가 대화 기록 하나를 복사 없이 공유하기 위한 transcript 저장소와 메모리 뷰.
+
+Transcript는 append-only 저장소로, 턴 번호/발화자/본문을 항목별 dict 대신 병렬 배열에
+보관합니다. 발화자 이름은 sys.intern한 뒤 작은 정수 id로 바꿔 array에 넣으므로, 턴당
+고정 비용은 본문 문자열을 제외하면 몇 바이트입니다. 인덱스로 꺼낼 때만
+{"turn", "speaker", "message"} dict를 새로 만듭니다.
+
+각 에이전트의 memory는 그 위의 TranscriptView이며, 자기 발화는 assistant, 다른 참가자의
+발화는 user 역할로 보이도록 매핑합니다. 뷰는 상태를 쌓지 않고 읽을 때마다 메시지 dict를
+만들어 반환하므로, 요청 하나가 끝나면 그 메시지 목록도 함께 사라집니다.
+"""
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, Sequence
+
+SYSTEM_ROLE = sys.intern("system")
+USER_ROLE = sys.intern("user")
+ASSISTANT_ROLE = sys.intern("assistant")
+
+
+class Transcript(Sequence):
+    """append-only 대화 기록. 항목은 (turn, speaker, message) dict로 읽힙니다."""
+
+    __slots__ = ("_turns", "_speaker_ids", "_messages", "_speakers", "_speaker_index")
+
+    def __init__(self, entries: Iterable[Dict] = ()):
+        self._turns = array("l")
+        self._speaker_ids = array("H")
+        self._messages: List[str] = []
+        self._speakers: List[str] = []
+        self._speaker_index: Dict[str, int] = {}
+        for entry in entries:
+            self.append(entry)
+
+    def speaker_id(self, speaker: str) -> int:
+        """발화자 이름의 정수 id (처음 보는 이름이면 intern해서 등록)."""
+        speaker_id = self._speaker_index.get(speaker)
+        if speaker_id is None:
+            speaker_id = len(self._speakers)
+            speaker = sys.intern(speaker)
+            self._speakers.append(speaker)
+            self._speaker_index[speaker] = speaker_id
+        return speaker_id
+
+    def add(self, turn: int, speaker: str, message: str) -> None:
+        self._turns.append(turn)
+        self._speaker_ids.append(self.speaker_id(speaker))
+        self._messages.append(message)
+
+    def append(self, entry: Dict) -> None:
+        self.add(entry["turn"], entry["speaker"], entry["message"])
+
+    def turn(self, index: int) -> int:
+        return self._turns[index]
+
+    def speaker(self, index: int) -> str:
+        return self._speakers[self._speaker_ids[index]]
+
+    def message(self, index: int) -> str:
+        return self._messages[index]
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return {"turn": self._turns[index], "speaker": self.speaker(index), "message": self._messages[index]}
+
+    def to_list(self) -> List[Dict]:
+        """JSON 저장/반환용 dict 목록."""
+        return self[:]
+
+
+class TranscriptView(Sequence):
+    """system 프롬프트 + transcript[start:]를 speaker 기준 역할로 보여주는 읽기 전용 메시지 목록.
+
+    label_others=True면 다른 에이전트의 발화 앞에 "[이름] "을 붙입니다 (3인 이상 대화).
+    """
+
+    __slots__ = ("transcript", "speaker", "system_prompt", "start", "label_others", "_speaker_id")
+
+    def __init__(self, transcript: Transcript, speaker: str, system_prompt: str, start: int = 0,
+                 label_others: bool = False):
+        self.transcript = transcript
+        self.speaker = speaker
+        self.system_prompt = system_prompt
+        self.start = start
+        self.label_others = label_others
+        self._speaker_id = transcript.speaker_id(speaker)
+
+    def _message(self, index: int) -> Dict:
+        transcript = self.transcript
+        speaker_id = transcript._speaker_ids[index]
+        content = transcript._messages[index]
+        if speaker_id == self._speaker_id:
+            return {"role": ASSISTANT_ROLE, "content": content}
+        if self.label_others:
+            speaker = transcript._speakers[speaker_id]
+            if speaker != USER_ROLE:
+                content = f"[{speaker}] {content}"
+        return {"role": USER_ROLE, "content": content}
+
+    def __len__(self) -> int:
+        return 1 + max(len(self.transcript) - self.start, 0)
+
+    def __getitem__(self, index):
+        length = len(self)
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(length))]
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("TranscriptView index out of range")
+        if index == 0:
+            return {"role": SYSTEM_ROLE, "content": self.system_prompt}
+        return self._message(self.start + index - 1)
+
+    def __iter__(self) -> Iterator[Dict]:
+        yield {"role": SYSTEM_ROLE, "content": self.system_prompt}
+        for index in range(self.start, len(self.transcript)):
+            yield self._message(index)
@@ -1,6 +1,6 @@
 import streamlit as st
-from litellm import completion
 from utils import *
+import os
 import json
 from datetime import datetime
 
@@ -27,7 +27,7 @@ if system_prompts:
     selected_system_template = st.sidebar.selectbox("시스템 프롬프트 선택:", system_template_names)
     
     if selected_system_template != "기본 프롬프트...":
-        system_content = next(p['content'] for p in system_prompts if p['name'] == selected_system_template)
+        system_content = get_system_prompt_content(selected_system_template, "You are a helpful assistant.")
     else:
         system_content = "You are a helpful assistant."
 else:
@@ -45,80 +45,149 @@ if available_providers:
 
     # 매개변수 설정
     with st.sidebar.expander("🎮 고급 설정", expanded=False):
-        temperature = st.slider("Temperature:", min_value=0.0, max_value=1.0, value=0.7, step=0.1)
-        max_tokens = st.number_input("최대 토큰 수:", min_value=1, max_value=4096, value=256, step=1)
-        top_p = st.slider("Top P:", min_value=0.0, max_value=1.0, value=1.0, step=0.1)
-        use_json_format = st.checkbox("JSON 형식으로 응답 받기", value=False)
-        use_streaming = st.checkbox("Enable streaming", value=True)
+        defaults = get_chat_settings()
+        temperature = st.slider("Temperature:", min_value=0.0, max_value=1.0, value=defaults.temperature, step=0.1)
+        max_tokens = st.number_input("최대 토큰 수:", min_value=1, max_value=4096, value=defaults.max_tokens, step=1)
+        top_p = st.slider("Top P:", min_value=0.0, max_value=1.0, value=defaults.top_p, step=0.1)
+        use_json_format = st.checkbox("JSON 형식으로 응답 받기", value=defaults.json_format)
+        use_streaming = st.checkbox("Enable streaming", value=defaults.streaming)
+        context_limit = st.number_input("컨텍스트 토큰 한도 (0 = 모델 최대):", min_value=0, value=0, step=256)
+        use_cache = st.checkbox("응답 캐시 사용", value=False, help="temperature가 0인 동일한 요청은 캐시된 응답을 재사용합니다.")
+        if use_cache:
+            st.caption(format_cache_stats(get_completion_cache().stats()))
+        use_key_routing = st.checkbox(
+            "같은 계열의 모든 키로 분산", value=False,
+            help="OpenAI (Default)/(Backup)처럼 설정된 키들에 요청을 나누고, 429/5xx 발생 시 다른 키로 재시도합니다."
+        )
+        if use_key_routing:
+            for health in get_key_router().stats():
+                st.caption(format_key_health(health))
+
+    # 모델 비교 모드: 같은 메시지를 여러 모델에 동시에 보냄
+    with st.sidebar.expander("🔀 모델 비교", expanded=False):
+        model_options = [(provider, model) for provider in available_providers for model in provider_models[provider]]
+        compare_targets = st.multiselect(
+            "비교할 모델:",
+            options=model_options,
+            format_func=lambda x: f"{x[0]} / {x[1]}",
+            help="두 개 이상 선택하면 메시지를 모든 모델에 동시에 보내고 결과를 나란히 보여줍니다."
+        )
+    compare_mode = len(compare_targets) >= 2
 
-    # 채팅 히스토리 표시
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
+    # 채팅 히스토리 표시 (최근 메시지만)
+    render_chat_window(st.session_state.messages)
 
     # 사용자 입력
     if prompt := st.chat_input("메시지를 입력하세요..."):
         # 사용자 메시지 추가
         st.session_state.messages.append({"role": "user", "content": prompt})
+        persist_chat_messages()
         with st.chat_message("user"):
             st.markdown(prompt)
 
+        # 모델 비교 응답
+        if compare_mode:
+            messages = [{"role": "system", "content": system_content}] + to_api_messages(st.session_state.messages)
+            targets = []
+            for provider, model in compare_targets:
+                model_messages, _ = fit_messages(messages, model, get_context_budget(model, max_tokens, context_limit))
+                targets.append((f"{provider} / {model}", build_completion_params(
+                    provider, model, model_messages, api_keys[provider],
+                    temperature=temperature, max_tokens=max_tokens, top_p=top_p,
+                    stream=True, json_format=use_json_format
+                )))
+
+            columns = st.columns(len(targets))
+            renderers = []
+            for column, (label, _) in zip(columns, targets):
+                with column:
+                    st.markdown(f"**{label}**")
+                    renderers.append(StreamRenderer(st.empty()))
+
+            responses = [""] * len(targets)
+            failed = [False] * len(targets)
+            completion_fns = [instrumented_completion(completion, provider, "compare") for provider, _ in compare_targets]
+            for event, index, payload in fan_out(completion_fns, targets):
+                if event == "chunk":
+                    renderers[index].write(payload)
+                    continue
+                responses[index] = renderers[index].close()
+                failed[index] = bool(payload.error)
+                with columns[index]:
+                    if payload.error:
+                        st.error(f"Error: {payload.error}")
+                    st.caption(format_fanout_metrics(payload))
+
+            # 대화는 선택한 순서상 처음으로 성공한 모델의 응답으로 이어감 (실패한 응답은 히스토리에 넣지 않음)
+            succeeded = [response for response, error in zip(responses, failed) if not error and response]
+            if succeeded:
+                st.session_state.messages.append({"role": "assistant", "content": succeeded[0]})
+                persist_chat_messages()
+            else:
+                st.warning("모든 모델이 응답에 실패하여 대화 기록에 응답을 추가하지 않았습니다.")
+
         # AI 응답
-        with st.chat_message("assistant"):
-            # 전체 메시지 히스토리 구성
-            messages = [
-                {"role": "system", "content": system_content}
-            ] + st.session_state.messages
-
-            # completion params 설정
-            completion_params = {
-                "model": selected_model,
-                "messages": messages,
-                "temperature": temperature,
-                "max_tokens": max_tokens,
-                "top_p": top_p,
-                "stream": use_streaming
-            }
-
-            if selected_provider == "Anthropic":
-                completion_params["api_key"] = api_keys[selected_provider]
-                completion_params["model_name"] = selected_model
-
-            if selected_provider == "Azure":
-                completion_params["api_key"] = api_keys[selected_provider]
-                completion_params["azure"] = True
-
-            if use_json_format:
-                completion_params["response_format"] = {"type": "json_object"}
-
-            # 스트리밍 응답 처리
-            response_container = st.empty()
-            full_response = ""
+        else:
+            with st.chat_message("assistant"):
+                # 전체 메시지 히스토리 구성
+                messages = [
+                    {"role": "system", "content": system_content}
+                ] + to_api_messages(st.session_state.messages)
+
+                # 모델 컨텍스트 예산에 맞게 오래된 턴 정리
+                context_budget = get_context_budget(selected_model, max_tokens, context_limit)
+                messages, context_stats = fit_messages(messages, selected_model, context_budget)
+
+                # completion params 설정 (provider별 분기와 커넥션 재사용은 provider_clients에서 처리)
+                completion_params = build_completion_params(
+                    selected_provider, selected_model, messages, api_keys[selected_provider],
+                    temperature=temperature, max_tokens=max_tokens, top_p=top_p,
+                    stream=use_streaming, json_format=use_json_format
+                )
+
+                completion_fn = completion
+                if use_key_routing:
+                    completion_fn = routed_completion(completion, get_key_candidates(selected_provider, api_keys))
+                # 지연 시간·토큰 텔레메트리 기록 (캐시 hit은 provider 호출이 아니므로 제외)
+                completion_fn = instrumented_completion(completion_fn, selected_provider, "chat")
+
+                # 스트리밍 응답 처리
+                response_container = st.empty()
+                full_response = ""
             
-            try:
-                if use_streaming:
-                    for chunk in completion(**completion_params):
-                        if selected_provider == "Anthropic":
-                            content = chunk.delta.text
-                        else:  # OpenAI, Azure
-                            content = chunk.choices[0].delta.content
+                try:
+                    if use_streaming:
+                        renderer = StreamRenderer(response_container)
+                        # 스트리밍 도중 프로세스가 죽어도 받은 부분까지 복구할 수 있도록 주기적으로 기록
+                        checkpoint = get_chat_session().partial()
+                        usage = None
+                        for chunk in cached_completion(completion_fn, completion_params, get_completion_cache() if use_cache else None):
+                            # usage만 담긴 마지막 chunk에는 텍스트가 없음
+                            usage = getattr(chunk, "usage", None) or usage
+                            content = chunk_text(chunk)
                             
-                        if content:
-                            full_response += content
-                            response_container.markdown(full_response)
-                else:
-                    response = completion(**completion_params)
-                    if selected_provider == "Anthropic":
-                        full_response = response.content
+                            renderer.write(content)
+                            checkpoint.write(content)
+                        full_response = renderer.close()
                     else:
-                        full_response = response.choices[0].message.content
-                    response_container.markdown(full_response)
+                        response = cached_completion(completion_fn, completion_params, get_completion_cache() if use_cache else None)
+                        usage = getattr(response, "usage", None)
+                        if selected_provider == "Anthropic":
+                            full_response = response.content
+                        else:
+                            full_response = response.choices[0].message.content
+                        response_container.markdown(full_response)
 
-                # 응답을 채팅 히스토리에 추가
-                st.session_state.messages.append({"role": "assistant", "content": full_response})
+                    # 응답을 채팅 히스토리에 추가
+                    st.session_state.messages.append({"role": "assistant", "content": full_response})
+                    persist_chat_messages()
+                    cache_read_tokens, cache_write_tokens = cache_usage(usage)
+                    st.caption(format_context_stats(dict(
+                        context_stats, cache_read_tokens=cache_read_tokens, cache_write_tokens=cache_write_tokens
+                    )))
                 
-            except Exception as e:
-                st.error(f"Error: {str(e)}")
+                except Exception as e:
+                    st.error(f"Error: {str(e)}")
 
     # 채팅 관리 섹션 (사이드바 하단에 추가)
     st.sidebar.markdown("---")
@@ -133,7 +202,9 @@ if available_providers:
     
     # 저장된 채팅 불러오기
     st.sidebar.markdown("#### 저장된 채팅")
-    histories = list_chat_histories()
+    history_page_size = 50
+    history_offset = select_page(count_chat_histories(), history_page_size, container=st.sidebar)
+    histories = list_chat_histories(limit=history_page_size, offset=history_offset)
     if histories:
         selected_history = st.sidebar.selectbox(
             "저장된 채팅 선택:",
@@ -147,15 +218,14 @@ if available_providers:
                 messages = load_chat_history(selected_history['file_path'])
                 if messages:
                     st.session_state.messages = messages
+                    persist_chat_messages()
+                    reset_chat_window()
                     st.rerun()
         with col2:
             if st.button("삭제"):
-                try:
-                    os.remove(selected_history['file_path'])
+                if delete_chat_history(selected_history['file_path']):
                     st.success("채팅이 삭제되었습니다.")
                     st.rerun()
-                except Exception as e:
-                    st.error(f"삭제 중 오류 발생: {str(e)}")
         with col3:
             # JSON 파일 다운로드 버튼
             try:
@@ -172,18 +242,47 @@ if available_providers:
                 st.error(f"파일 읽기 오류: {str(e)}")
     else:
         st.sidebar.info("저장된 채팅이 없습니다.")
+
+    # 저장된 채팅 메시지 검색
+    chat_query = st.sidebar.text_input("🔍 채팅 검색:", placeholder="메시지 내용으로 검색...")
+    if chat_query:
+        chat_total, chat_results = search_library(chat_query, kinds=["chat"], limit=10)
+        if chat_results:
+            selected_result = st.sidebar.selectbox(
+                f"검색 결과 ({chat_total:,}개 중 상위 {len(chat_results)}개):",
+                options=chat_results,
+                format_func=lambda x: f"{x['ref']} #{x['position'] + 1}: {x['snippet'].replace('**', '')[:40]}"
+            )
+            if st.sidebar.button("검색한 채팅 불러오기"):
+                messages = load_chat_history(os.path.join("chat_history", selected_result['ref']))
+                if messages:
+                    st.session_state.messages = messages
+                    persist_chat_messages()
+                    reset_chat_window()
+                    st.rerun()
+        else:
+            st.sidebar.info("검색 결과가 없습니다.")
+
+    # 저장하지 않은 세션 복구 (턴마다 세션 로그에 기록됨)
+    sessions = list_chat_sessions()
+    if sessions:
+        st.sidebar.markdown("#### 최근 세션 복구")
+        selected_session = st.sidebar.selectbox(
+            "세션 선택:",
+            options=sessions,
+            format_func=lambda x: f"{x['updated_at'][:16]} ({x['message_count']}개의 메시지{', 응답 중단됨' if x['interrupted'] else ''})"
+        )
+        if st.sidebar.button("이어서 대화하기"):
+            if resume_chat_session(selected_session['file_path']):
+                reset_chat_window()
+                st.rerun()
     
     # 현재 채팅 내보내기 (JSON 다운로드)
     if st.session_state.messages:
         st.sidebar.markdown("#### 현재 채팅 내보내기")
-        current_chat_json = json.dumps({
-            "messages": st.session_state.messages,
-            "exported_at": datetime.now().isoformat()
-        }, ensure_ascii=False, indent=2)
-        
         st.sidebar.download_button(
             label="현재 채팅 다운로드",
-            data=current_chat_json,
+            data=get_chat_export_json(st.session_state.messages),
             file_name=f"chat_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
             mime="application/json"
         )
@@ -192,6 +291,8 @@ if available_providers:
     st.sidebar.markdown("---")
     if st.sidebar.button("🗑️ 채팅 초기화"):
         st.session_state.messages = []
+        persist_chat_messages()
+        reset_chat_window()
         st.rerun()
 
 else:
@@ -1,11 +1,44 @@
 import streamlit as st
 from utils import (
-    load_prompts, save_prompt, delete_prompt,
-    load_system_prompts, save_system_prompt, delete_system_prompt
+    load_prompts, count_prompts, save_prompt, delete_prompt,
+    load_system_prompts, save_system_prompt, delete_system_prompt,
+    search_library, reindex_search, select_page
 )
 
+PROMPTS_PER_PAGE = 20
+
 st.title("📝 프롬프트 관리")
 
+# 프롬프트·채팅 검색
+search_kinds = {"system_prompt": "🤖 시스템 프롬프트", "prompt": "✍️ 유저 프롬프트", "chat": "💬 채팅"}
+col1, col2 = st.columns([3, 2])
+with col1:
+    search_query = st.text_input("🔍 검색", placeholder="프롬프트와 저장된 채팅에서 검색...")
+with col2:
+    selected_kinds = st.multiselect("검색 대상", list(search_kinds), default=list(search_kinds), format_func=search_kinds.get)
+
+if search_query:
+    search_page_size = 20
+    search_page = st.session_state.get("search_page", 1)
+    total, results = search_library(search_query, selected_kinds, search_page_size, (search_page - 1) * search_page_size)
+    if total and not results:
+        # 검색어가 바뀌어 현재 페이지가 범위를 벗어난 경우
+        search_page = st.session_state.search_page = 1
+        total, results = search_library(search_query, selected_kinds, search_page_size, 0)
+
+    st.caption(f"검색 결과 {total:,}개")
+    for result in results:
+        location = f" · {result['role']} #{result['position'] + 1}" if result["kind"] == "chat" else ""
+        st.markdown(f"{search_kinds[result['kind']]} **{result['title']}**{location}")
+        st.markdown(f"> {result['snippet']}")
+
+    search_pages = max(1, (total + search_page_size - 1) // search_page_size)
+    if search_pages > 1:
+        st.number_input(f"페이지 (총 {search_pages}페이지):", min_value=1, max_value=search_pages, step=1, key="search_page")
+    if st.button("🔄 검색 인덱스 다시 맞추기", help="다른 프로세스나 직접 추가한 파일이 검색되지 않을 때 사용하세요."):
+        st.success(f"{reindex_search()}개 문서를 다시 색인했습니다.")
+    st.markdown("---")
+
 tab1, tab2 = st.tabs(["🗣️ 시스템 프롬프트", "✍️ 유저 프롬프트"])
 
 with tab1:
@@ -43,7 +76,9 @@ with tab1:
     if not system_prompts:
         st.info("아직 저장된 시스템 프롬프트가 없습니다. system_prompts 폴더에 .md 파일을 추가하세요.")
     else:
-        for prompt in system_prompts:
+        # 현재 페이지의 프롬프트만 위젯을 만듦
+        sys_offset = select_page(len(system_prompts), PROMPTS_PER_PAGE, key="sys_page")
+        for prompt in system_prompts[sys_offset:sys_offset + PROMPTS_PER_PAGE]:
             with st.expander(f"🤖 {prompt['name']}", expanded=False):
                 # 마크다운 내용 표시
                 st.markdown(prompt['content'])
@@ -73,6 +108,34 @@ with tab1:
 
 with tab2:
     st.header("유저 프롬프트")
-    # 기존의 유저 프롬프트 관련 코드를 여기로 이동
-    # ... (기존 코드 유지)   
-                     
\ No newline at end of file
+
+    # 새 유저 프롬프트 추가
+    with st.expander("➕ 새 유저 프롬프트 추가", expanded=False):
+        user_prompt_name = st.text_input("프롬프트 이름", key="user_name")
+        user_prompt_content = st.text_area("프롬프트 내용", height=200, key="user_content")
+        user_prompt_description = st.text_area("설명 (선택사항)", key="user_desc")
+        if st.button("저장", key="save_user"):
+            if user_prompt_name and user_prompt_content:
+                if save_prompt(user_prompt_name, user_prompt_content, user_prompt_description) is not None:
+                    st.success("유저 프롬프트가 저장되었습니다!")
+                    st.rerun()
+            else:
+                st.error("이름과 내용을 모두 입력해주세요")
+
+    # 저장된 유저 프롬프트 목록 (현재 페이지만 불러옴)
+    st.subheader("저장된 유저 프롬프트")
+    user_prompt_count = count_prompts()
+    if not user_prompt_count:
+        st.info("아직 저장된 유저 프롬프트가 없습니다.")
+    else:
+        user_offset = select_page(user_prompt_count, PROMPTS_PER_PAGE, key="user_page")
+        for prompt in load_prompts(limit=PROMPTS_PER_PAGE, offset=user_offset):
+            with st.expander(f"✍️ {prompt['name']}", expanded=False):
+                st.markdown(prompt['content'])
+                if prompt.get('description'):
+                    st.info(f"📝 설명: {prompt['description']}")
+                st.text(f"📅 수정일: {prompt['updated_at']}")
+                if st.button("삭제", key=f"delete_user_{prompt['id']}"):
+                    if delete_prompt(prompt['id']):
+                        st.success("프롬프트가 삭제되었습니다.")
+                        st.rerun()
@@ -1,100 +1,187 @@
 import streamlit as st
+import asyncio
+import io
+import os
+import itertools
+import time
 from datetime import datetime
-from typing import List, Dict
-from litellm import completion
 import json
+from llm_core.dialogue import LLMAgent, LLMDialogue, run_dialogues
+from llm_core.batch_eval import load_dataset, results_frame, run_batch, summarize
+from llm_core import history_store
+from llm_core.job_queue import get_job_queue
+from llm_core.search_index import get_search_index
+from llm_core.stop_conditions import build_stop_conditions
 from utils import (
     get_api_key,
     providers,
     provider_models,
-    get_completion_params,
     load_system_prompts,
-    save_chat_history,
+    get_system_prompt,
+    get_system_prompt_content,
+    get_completion_cache,
+    get_configured_api_keys,
+    get_chat_settings,
+    get_key_candidates,
+    format_cache_stats,
+    format_token_usage,
     load_chat_history,
     list_chat_histories
 )
 
-class LLMAgent:
-    def __init__(self, name: str, system_prompt: str, model: str, provider: str, api_key: str):
-        self.name = name
-        self.system_prompt = system_prompt
-        self.model = model
-        self.provider = provider
-        self.api_key = api_key
-        self.memory: List[Dict] = []
-        self.initialize_memory()
-    
-    def initialize_memory(self):
-        """Initialize the conversation memory with system prompt"""
-        self.memory = [{"role": "system", "content": self.system_prompt}]
-    
-    def update_memory(self, role: str, content: str):
-        """Add new message to memory"""
-        self.memory.append({"role": role, "content": content})
-        
-    def get_response(self, max_tokens: int = 300) -> str:
-        """Generate response using the model and current memory"""
+def show_missing_api_keys(missing_providers):
+    st.sidebar.error(
+        f"Please provide API keys for: {', '.join(missing_providers)}\n\n"
+        "To add API keys:\n"
+        "1. Go to the Home page\n"
+        "2. Click on 'API Key Management'\n"
+        "3. Enter your API keys in the respective provider fields"
+    )
+
+JOB_STATUS_ICONS = {"queued": "⏳", "running": "🔄", "done": "✅", "failed": "❌", "cancelled": "⏹️", "interrupted": "⚠️"}
+
+def save_job_dialogue(conversation):
+    """Save a dialogue from a job thread; errors propagate so the job is marked failed"""
+    # utils.save_chat_history는 오류를 st.error로만 알리는데, 작업 스레드에는 script run context가 없어 사라짐
+    file_path = history_store.save_chat_history(conversation)
+    get_search_index().index_chat_history(file_path, conversation)
+    return file_path
+
+def dialogue_job(dialogue, initial_message, max_turns):
+    """Build a job function that runs one dialogue, publishing the turn in progress and emitting every finished turn"""
+    def run(ctx):
+        ctx.emit({"turn": 0, "speaker": "user", "message": initial_message})
+        ctx.progress(0, max_turns)
+
+        events = dialogue.run(initial_message, max_turns)
         try:
-            completion_params = {
-                "model": self.model,
-                "messages": self.memory,
-                "temperature": 0.7,
-                "max_tokens": max_tokens,
-                "top_p": 1.0,
-                "stream": False
-            }
-
-            if self.provider == "Anthropic":
-                completion_params["api_key"] = self.api_key
-                completion_params["model_name"] = self.model
-
-            if self.provider == "Azure":
-                completion_params["api_key"] = self.api_key
-                completion_params["azure"] = True
-
-            response = completion(**completion_params)
-            return response.choices[0].message.content
-        except Exception as e:
-            return f"Error generating response: {str(e)}"
-
-class LLMDialogue:
-    def __init__(self, agent1: LLMAgent, agent2: LLMAgent):
-        self.agent1 = agent1
-        self.agent2 = agent2
-        self.conversation_history: List[Dict] = []
-        
-    def conduct_dialogue(self, initial_message: str, max_turns: int = 5) -> List[Dict]:
-        """Conduct a dialogue between the two agents"""
-        current_speaker = self.agent1
-        current_listener = self.agent2
-        
-        # Start with initial message
-        self.agent1.update_memory("user", initial_message)
-        self.conversation_history.append({
-            "turn": 0,
-            "speaker": "user",
-            "message": initial_message
-        })
-        
-        for turn in range(max_turns):
-            # Get response from current speaker
-            response = current_speaker.get_response()
-            
-            # Update conversation history
-            self.conversation_history.append({
-                "turn": turn + 1,
-                "speaker": current_speaker.name,
-                "message": response
-            })
-            
-            # Update both agents' memories
-            current_speaker.update_memory("assistant", response)
-            current_listener.update_memory("user", response)
-            
-            # Switch roles
-            current_speaker, current_listener = current_listener, current_speaker
-            
-        return self.conversation_history
+            for event in events:
+                if event.kind == "turn_start":
+                    # 받은 조각 목록을 그대로 공유하고 읽는 쪽에서 합침 (토큰마다 문자열을 다시 만들지 않음)
+                    parts = []
+                    ctx.live({"turn": event.turn, "speaker": event.speaker, "parts": parts, "started_at": time.time()})
+                elif event.kind == "delta":
+                    parts.append(event.text)
+                elif event.kind == "turn_end":
+                    ctx.emit(event.entry)
+                    ctx.progress(event.entry["turn"], max_turns)
+                ctx.check_cancelled()
+        finally:
+            events.close()
+            ctx.live(None)
+
+        conversation = dialogue.conversation_history.to_list()
+        return {"conversation": conversation, "stop_reason": dialogue.stop_reason,
+                "usage": {agent.name: agent.usage for agent in dialogue.all_agents},
+                "saved_to": save_job_dialogue(conversation)}
+    return run
+
+def batch_job(dialogues, labels, initial_message, max_turns, max_concurrency, requests_per_minute):
+    """Build a job function that runs dialogues concurrently and emits each one as it finishes"""
+    async def run_all(ctx):
+        finished = 0
+        ctx.progress(0, len(dialogues))
+        async for result in run_dialogues(dialogues, initial_message, max_turns, max_concurrency, requests_per_minute):
+            finished += 1
+            ctx.emit({"label": labels[result.index], "elapsed": result.elapsed, "conversation": result.conversation,
+                      "stop_reason": result.dialogue.stop_reason, "saved_to": save_job_dialogue(result.conversation)})
+            ctx.progress(finished, len(dialogues))
+            ctx.check_cancelled()
+        return {"dialogues": finished}
+    return lambda ctx: asyncio.run(run_all(ctx))
+
+def render_job(job_id):
+    """Show a job's progress and the turns it has produced so far"""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        st.info("Job not found.")
+        return
+    st.markdown(f"{JOB_STATUS_ICONS.get(job['status'], '')} **{job['label']}** · {job['status']} · `{job_id}`")
+    if job["progress_total"]:
+        st.progress(min(job["progress_done"] / job["progress_total"], 1.0),
+                    text=f"{job['progress_done']} / {job['progress_total']}")
+    if job["status"] in ("queued", "running") and st.button("Cancel Job", key=f"cancel_{job_id}"):
+        get_job_queue().cancel(job_id)
+
+    events = get_job_queue().events(job_id)
+    if job["kind"] == "dialogue":
+        for entry in events:
+            with st.chat_message(entry["speaker"].lower()):
+                st.write(entry["message"])
+        # 아직 끝나지 않은 턴은 지금까지 받은 토큰까지 보여줌 (멈춘 턴은 경과 시간으로 드러남)
+        live = get_job_queue().live(job_id) if job["status"] == "running" else None
+        if live and (not events or events[-1]["turn"] < live["turn"] or events[-1]["speaker"] != live["speaker"]):
+            with st.chat_message(live["speaker"].lower()):
+                text = "".join(live["parts"])
+                st.write(f"{text} ▌" if text else "…")
+                st.caption(f"Turn {live['turn']} · {time.time() - live['started_at']:.0f}s")
+    else:
+        for entry in events:
+            with st.expander(f"{entry['label']} ({entry['elapsed']:.1f}s)"):
+                for turn in entry["conversation"]:
+                    with st.chat_message(turn["speaker"].lower()):
+                        st.write(turn["message"])
+                if entry.get("stop_reason"):
+                    st.caption(f"Stopped early ({entry['stop_reason']})")
+    if job["error"]:
+        st.error(job["error"])
+
+    result = job["result"] or {}
+    for name, usage in (result.get("usage") or {}).items():
+        st.caption(f"{name}: {format_token_usage(usage)}")
+    if result.get("stop_reason"):
+        st.info(f"Stopped early after turn {len(result['conversation']) - 1} ({result['stop_reason']})")
+    if result.get("saved_to"):
+        st.success(f"Conversation saved to {result['saved_to']}")
+    if result.get("conversation"):
+        st.download_button(
+            label="Download Conversation",
+            data=json.dumps(result["conversation"], ensure_ascii=False, indent=2),
+            file_name=f"llm_dialogue_{job_id}.json",
+            mime="application/json",
+            key=f"download_{job_id}"
+        )
+    if result.get("rows") is not None:
+        st.success(f"Batch finished: {result['rows']} rows written to {result['output_path']}")
+
+    # 실행 중인 동안에는 이 부분만 주기적으로 다시 그림 (끝나면 전체를 한 번 다시 실행해 폴링을 멈춤)
+    if job["status"] in ("queued", "running"):
+        st.session_state.polling_job = job_id
+    elif st.session_state.pop("polling_job", None) == job_id:
+        st.rerun()
+
+def render_jobs(selected_job):
+    """List recent background jobs; the selected one is polled while it runs"""
+    jobs = get_job_queue().list(limit=20)
+    if not jobs:
+        st.caption("No background jobs yet.")
+        return
+    job_ids = [job["id"] for job in jobs]
+    labels = {job["id"]: f"{JOB_STATUS_ICONS.get(job['status'], '')} {job['label']} · {job['created_at'][:19]}" for job in jobs}
+    index = job_ids.index(selected_job) if selected_job in job_ids else 0
+    job_id = st.selectbox("Job", job_ids, index=index, format_func=labels.get)
+    st.query_params["job"] = job_id
+    running = next(job for job in jobs if job["id"] == job_id)["status"] in ("queued", "running")
+    st.fragment(render_job, run_every=0.5 if running else None)(job_id)
+
+def load_batch_results(output_path):
+    """Results table, summary and Parquet export of a batch output file, rebuilt only when the file changes"""
+    stat = os.stat(output_path)
+    key = (os.path.abspath(output_path), stat.st_mtime_ns, stat.st_size)
+    cached = st.session_state.get("batch_results")
+    if cached is None or cached[0] != key:
+        results = results_frame(output_path)
+        parquet = io.BytesIO()
+        results.to_parquet(parquet, index=False)
+        cached = st.session_state.batch_results = (key, results.drop(columns=["conversation"]), summarize(results),
+                                                   parquet.getvalue())
+    return cached[1:]
+
+def enable_key_routing(*agents):
+    """Let each agent spread its requests over all configured keys of its provider family"""
+    api_keys = get_configured_api_keys()
+    for agent in agents:
+        agent.key_candidates = get_key_candidates(agent.provider, dict(api_keys, **{agent.provider: agent.api_key}))
 
 def main():
     st.title("🤖 LLM Dialogue System")
@@ -114,7 +201,7 @@ def main():
     if use_saved_prompt1 and system_prompts:
         prompt_names = [p['name'] for p in system_prompts]
         selected_prompt1 = st.sidebar.selectbox("Select System Prompt (Agent 1)", prompt_names)
-        agent1_prompt = next(p['content'] for p in system_prompts if p['name'] == selected_prompt1)
+        agent1_prompt = get_system_prompt_content(selected_prompt1, "You are a helpful assistant.")
     else:
         agent1_prompt = st.sidebar.text_area("Agent 1 System Prompt", "You are a helpful assistant.")
     
@@ -132,7 +219,7 @@ def main():
     if use_saved_prompt2 and system_prompts:
         prompt_names = [p['name'] for p in system_prompts]
         selected_prompt2 = st.sidebar.selectbox("Select System Prompt (Agent 2)", prompt_names)
-        agent2_prompt = next(p['content'] for p in system_prompts if p['name'] == selected_prompt2)
+        agent2_prompt = get_system_prompt_content(selected_prompt2, "You are a curious assistant.")
     else:
         agent2_prompt = st.sidebar.text_area("Agent 2 System Prompt", "You are a curious assistant.")
     
@@ -145,7 +232,46 @@ def main():
     st.sidebar.subheader("Dialogue Configuration")
     initial_message = st.sidebar.text_area("Initial Message", "Hello! Let's start a conversation.")
     max_turns = st.sidebar.number_input("Maximum Turns", min_value=1, max_value=100, value=5)
+    temperature = st.sidebar.slider("Temperature", min_value=0.0, max_value=1.0, value=get_chat_settings().temperature, step=0.1)
+    use_cache = st.sidebar.checkbox("Use response cache", value=False, help="Reuse cached responses for identical requests at temperature 0")
+    cache = get_completion_cache() if use_cache else None
+    use_key_routing = st.sidebar.checkbox(
+        "Spread requests across keys", value=False,
+        help="Balance requests over every configured key of the same provider family and fail over on 429/5xx"
+    )
+    if use_cache:
+        st.sidebar.caption(format_cache_stats(cache.stats()))
+    use_streaming = st.sidebar.checkbox(
+        "Stream turns", value=get_chat_settings().streaming,
+        help="Stream each turn and send the next agent's request as soon as the previous turn ends"
+    )
+
+    with st.sidebar.expander("Stop Conditions", expanded=False):
+        stop_similarity = st.slider(
+            "Stop on repetition (similarity, 0 = off)", min_value=0.0, max_value=1.0, value=0.0, step=0.05,
+            help="Stop when a reply's word 3-gram overlap with one of the last 4 replies reaches this ratio"
+        )
+        token_budget = st.number_input("Token budget (0 = unlimited)", min_value=0, value=0, step=1000)
+        deadline = st.number_input("Deadline in seconds (0 = none)", min_value=0, value=0, step=30)
+    stop_conditions = build_stop_conditions(stop_similarity, token_budget, deadline)
+
+    # Batch configuration
+    with st.sidebar.expander("Batch Run", expanded=False):
+        prompt_names = [p['name'] for p in system_prompts]
+        batch_prompts1 = st.multiselect("Agent 1 System Prompts", prompt_names, key="batch_prompts1")
+        batch_prompts2 = st.multiselect("Agent 2 System Prompts", prompt_names, key="batch_prompts2")
+        batch_seeds = st.number_input("Seeds per Pair", min_value=1, max_value=20, value=1)
+        max_concurrency = st.number_input("Max Concurrent Dialogues", min_value=1, max_value=32, value=4)
+        requests_per_minute = {
+            provider: st.number_input(f"{provider} Requests/min (0 = unlimited)", min_value=0, value=0, key=f"rpm_{provider}")
+            for provider in dict.fromkeys([agent1_provider, agent2_provider])
+        }
+        start_batch = st.button("Start Batch")
     
+    if agent1_name == agent2_name:
+        st.sidebar.error("Agent names must be different.")
+        return
+
     # Start dialogue button
     if st.sidebar.button("Start Dialogue"):
         if not agent1_api_key or not agent2_api_key:
@@ -155,46 +281,117 @@ def main():
             if not agent2_api_key:
                 missing_providers.append(agent2_provider)
                 
-            st.sidebar.error(
-                f"Please provide API keys for: {', '.join(missing_providers)}\n\n"
-                "To add API keys:\n"
-                "1. Go to the Home page\n"
-                "2. Click on 'API Key Management'\n"
-                "3. Enter your API keys in the respective provider fields"
-            )
+            show_missing_api_keys(missing_providers)
             return
             
         # Initialize agents
-        agent1 = LLMAgent(agent1_name, agent1_prompt, agent1_model, agent1_provider, agent1_api_key)
-        agent2 = LLMAgent(agent2_name, agent2_prompt, agent2_model, agent2_provider, agent2_api_key)
-        
-        # Create dialogue system
-        dialogue = LLMDialogue(agent1, agent2)
-        
-        # Conduct dialogue
-        with st.spinner("Conducting dialogue..."):
-            conversation = dialogue.conduct_dialogue(initial_message, max_turns)
-            
-        # Display conversation
-        st.subheader("Conversation")
-        for entry in conversation:
-            with st.chat_message(entry["speaker"].lower()):
-                st.write(entry["message"])
+        agent1 = LLMAgent(agent1_name, agent1_prompt, agent1_model, agent1_provider, agent1_api_key,
+                          temperature=temperature, cache=cache)
+        agent2 = LLMAgent(agent2_name, agent2_prompt, agent2_model, agent2_provider, agent2_api_key,
+                          temperature=temperature, cache=cache)
         
-        # Save conversation history
-        save_path = save_chat_history(conversation)
-        if save_path:
-            st.success(f"Conversation saved to {save_path}")
-            
-        # Export conversation
-        conversation_json = json.dumps(conversation, ensure_ascii=False, indent=2)
-        st.download_button(
-            label="Download Conversation",
-            data=conversation_json,
-            file_name=f"llm_dialogue_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-            mime="application/json"
+        if use_key_routing:
+            enable_key_routing(agent1, agent2)
+
+        # Run the dialogue as a background job so it survives reruns and closed tabs
+        dialogue = LLMDialogue(agent1, agent2, stop_conditions, use_streaming)
+        st.query_params["job"] = get_job_queue().submit(
+            "dialogue", f"{agent1_name} × {agent2_name}", dialogue_job(dialogue, initial_message, max_turns),
+            params={"initial_message": initial_message, "max_turns": max_turns}
         )
 
+    if start_batch:
+        missing_providers = [p for p, key in ((agent1_provider, agent1_api_key), (agent2_provider, agent2_api_key)) if not key]
+        if missing_providers:
+            show_missing_api_keys(missing_providers)
+            return
+
+        # 선택 후 삭제/이름 변경된 프롬프트가 있으면 다른 프롬프트로 대신 돌리지 않고 중단
+        selected_prompts = {name: get_system_prompt(name) for name in set(batch_prompts1) | set(batch_prompts2)}
+        missing_prompts = sorted(name for name, prompt in selected_prompts.items() if prompt is None)
+        if missing_prompts:
+            st.sidebar.error(f"System prompts no longer exist: {', '.join(missing_prompts)}")
+            return
+
+        # 선택이 없으면 위에서 고른 단일 프롬프트를 사용
+        prompts1 = [(name, selected_prompts[name]['content']) for name in batch_prompts1] or [(agent1_name, agent1_prompt)]
+        prompts2 = [(name, selected_prompts[name]['content']) for name in batch_prompts2] or [(agent2_name, agent2_prompt)]
+
+        dialogues, labels = [], []
+        for (name1, prompt1), (name2, prompt2), seed in itertools.product(prompts1, prompts2, range(batch_seeds)):
+            agent1 = LLMAgent(agent1_name, prompt1, agent1_model, agent1_provider, agent1_api_key, seed=seed,
+                              temperature=temperature, cache=cache)
+            agent2 = LLMAgent(agent2_name, prompt2, agent2_model, agent2_provider, agent2_api_key, seed=seed,
+                              temperature=temperature, cache=cache)
+            if use_key_routing:
+                enable_key_routing(agent1, agent2)
+            dialogues.append(LLMDialogue(agent1, agent2, stop_conditions, use_streaming))
+            labels.append(f"{name1} × {name2} (seed {seed})")
+
+        st.query_params["job"] = get_job_queue().submit(
+            "batch", f"Batch: {len(dialogues)} dialogues",
+            batch_job(dialogues, labels, initial_message, max_turns, max_concurrency, requests_per_minute),
+            params={"dialogues": len(dialogues), "max_turns": max_turns}
+        )
+
+    # Batch evaluation over a dataset of opening messages
+    with st.expander("📊 Batch Evaluation", expanded=False):
+        st.caption(
+            "Runs every row of a JSONL/CSV dataset (message / initial_message / input / prompt column) "
+            "with the agents configured in the sidebar. Progress is checkpointed to the output file, "
+            "so re-running with the same output path resumes where it stopped. "
+            "The run continues in the background after this tab is closed; `python -m llm_core batch` runs it without the app."
+        )
+        dataset_file = st.file_uploader("Dataset", type=["jsonl", "csv"])
+        output_path = st.text_input("Output (JSONL)", f"batch_results/{datetime.now().strftime('%Y%m%d')}.jsonl")
+        batch_workers = st.number_input("Workers", min_value=1, max_value=64, value=4)
+        if st.button("Run Batch Evaluation", disabled=dataset_file is None):
+            missing_providers = [p for p, key in ((agent1_provider, agent1_api_key), (agent2_provider, agent2_api_key)) if not key]
+            if missing_providers:
+                show_missing_api_keys(missing_providers)
+                return
+
+            def make_dialogue():
+                agent1 = LLMAgent(agent1_name, agent1_prompt, agent1_model, agent1_provider, agent1_api_key,
+                                  temperature=temperature, cache=cache)
+                agent2 = LLMAgent(agent2_name, agent2_prompt, agent2_model, agent2_provider, agent2_api_key,
+                                  temperature=temperature, cache=cache)
+                if use_key_routing:
+                    enable_key_routing(agent1, agent2)
+                return LLMDialogue(agent1, agent2, stop_conditions, use_streaming)
+
+            rows = load_dataset(dataset_file)
+
+            def run_evaluation(ctx):
+                def on_result(record, finished, total):
+                    ctx.progress(finished, total)
+                    ctx.check_cancelled()
+
+                executed = run_batch(rows, make_dialogue, output_path, max_turns, batch_workers, on_result,
+                                     should_cancel=lambda: ctx.cancelled)
+                ctx.check_cancelled()
+                return {"rows": executed, "output_path": output_path}
+
+            st.query_params["job"] = get_job_queue().submit(
+                "batch_eval", f"Evaluation: {dataset_file.name} ({len(rows)} rows)", run_evaluation,
+                params={"output_path": output_path, "rows": len(rows)}
+            )
+            st.info("Batch evaluation started. Follow its progress under Background Jobs.")
+
+        if os.path.exists(output_path):
+            results, report, parquet = load_batch_results(output_path)
+            cols = st.columns(4)
+            cols[0].metric("Rows", report["rows"])
+            cols[1].metric("Errors", report["errors"])
+            cols[2].metric("Latency p50", f"{report.get('latency_p50', 0):.1f}s")
+            cols[3].metric("Latency p95", f"{report.get('latency_p95', 0):.1f}s")
+            st.json(report, expanded=False)
+            st.dataframe(results, use_container_width=True)
+            st.download_button("Download Parquet", parquet, file_name=os.path.basename(output_path).replace(".jsonl", ".parquet"))
+
+    st.subheader("Background Jobs")
+    render_jobs(st.query_params.get("job"))
+
 if __name__ == "__main__":
     main()
     
\ No newline at end of file
@@ -1,11 +1,15 @@
 import streamlit as st
-from litellm import completion
 from utils import *
 import json
 from datetime import datetime
+from llm_core.dialogue import LLMAgent, MultiAgentDialogue
+from llm_core.schedulers import ModeratorScheduler, PanelScheduler, RoundRobinScheduler
 
 st.title("💬 Chat with Simulated AI")
 
+MODERATOR_PROMPT = "You moderate a discussion between several AI personas and keep it moving."
+TURN_POLICIES = ["라운드 로빈", "모더레이터 지정", "패널 (동시 응답)"]
+
 # 채팅 기록 초기화
 if "messages" not in st.session_state:
     st.session_state.messages = []
@@ -13,6 +17,8 @@ if "messages" not in st.session_state:
 # 대화 초기화 버튼 추가
 if st.button("대화 초기화"):
     st.session_state.messages = []  # 메시지 초기화
+    persist_chat_messages()
+    reset_chat_window()
     st.success("대화가 초기화되었습니다.")  # 사용자에게 알림
 
 # API 키 설정
@@ -24,125 +30,125 @@ with st.sidebar.expander("🔑 API Keys", expanded=False):
         if api_key:
             st.success(f"{provider} API Key is set!")
 
-# 시스템 프롬프트 설정
+# 시스템 프롬프트 목록
 system_prompts = load_system_prompts()
-if system_prompts:
-    st.sidebar.subheader("🤖 시스템 프롬프트")
-    system_template_names = ["기본 프롬프트..."] + [p['name'] for p in system_prompts]
-    selected_system_template_1 = st.sidebar.selectbox("첫 번째 시스템 프롬프트 선택:", system_template_names, key="system_prompt_1")
-    selected_system_template_2 = st.sidebar.text_area("두 번째 시스템 프롬프트 입력:", value="다른 AI에게 전달할 메시지입니다.", key="system_prompt_2")
-
-    if selected_system_template_1 != "기본 프롬프트...":
-        system_content_1 = next(p['content'] for p in system_prompts if p['name'] == selected_system_template_1)
-    else:
-        system_content_1 = "You are a helpful assistant."
-
-    system_content_2 = selected_system_template_2 if selected_system_template_2 else "You are a simulated assistant."
-else:
-    system_content_1 = "You are a helpful assistant."
-    system_content_2 = "You are a simulated assistant."
+system_template_names = ["직접 입력..."] + [p['name'] for p in system_prompts]
 
-# 모델 선택 및 설정
 available_providers = [provider for provider, api_key in api_keys.items() if api_key]
 if available_providers:
-    selected_provider = st.sidebar.selectbox("Select Provider:", available_providers)
-    selected_model = st.sidebar.selectbox(
-        "Select Model:",
-        provider_models[selected_provider],
-        key="model_selector"
+    # 페르소나 설정: 각자 시스템 프롬프트와 provider/모델을 가짐
+    st.sidebar.subheader("🎭 페르소나")
+    num_personas = st.sidebar.number_input("페르소나 수:", min_value=2, max_value=8, value=2, step=1)
+    personas = []
+    for i in range(num_personas):
+        with st.sidebar.expander(f"페르소나 {i + 1}", expanded=num_personas == 2):
+            persona_name = st.text_input("이름:", value=f"AI {i + 1}", key=f"persona_name_{i}")
+            template = st.selectbox("시스템 프롬프트 선택:", system_template_names, key=f"persona_template_{i}")
+            default_prompt = "You are a helpful assistant." if i == 0 else "You are a simulated assistant."
+            if template == "직접 입력...":
+                system_content = st.text_area("시스템 프롬프트 입력:", value=default_prompt, key=f"persona_prompt_{i}")
+            else:
+                system_content = get_system_prompt_content(template, default_prompt)
+            persona_provider = st.selectbox("Provider:", available_providers, key=f"persona_provider_{i}")
+            persona_model = st.selectbox("Model:", provider_models[persona_provider], key=f"persona_model_{i}")
+        personas.append((persona_name.strip() or f"AI {i + 1}", system_content, persona_provider, persona_model))
+
+    turn_policy = st.sidebar.selectbox(
+        "발화 순서:", TURN_POLICIES,
+        help="라운드 로빈: 순서대로 한 명씩 · 모더레이터 지정: 첫 번째 페르소나의 모델이 다음 발화자를 고름 · "
+             "패널: 모든 페르소나가 같은 메시지에 동시에 답함"
     )
 
     # 매개변수 설정
     with st.sidebar.expander("🎮 고급 설정", expanded=False):
-        temperature = st.slider("Temperature:", min_value=0.0, max_value=1.0, value=0.7, step=0.1)
-        max_tokens = st.number_input("최대 토큰 수:", min_value=1, max_value=4096, value=256, step=1)
-        top_p = st.slider("Top P:", min_value=0.0, max_value=1.0, value=1.0, step=0.1)
-        use_json_format = st.checkbox("JSON 형식으로 응답 받기", value=False)
-        use_streaming = st.checkbox("Enable streaming", value=True)
+        defaults = get_chat_settings()
+        temperature = st.slider("Temperature:", min_value=0.0, max_value=1.0, value=defaults.temperature, step=0.1)
+        max_tokens = st.number_input("최대 토큰 수:", min_value=1, max_value=4096, value=defaults.max_tokens, step=1)
+        top_p = st.slider("Top P:", min_value=0.0, max_value=1.0, value=defaults.top_p, step=0.1)
+        use_json_format = st.checkbox("JSON 형식으로 응답 받기", value=defaults.json_format)
+        use_streaming = st.checkbox("Enable streaming", value=defaults.streaming)
+        context_limit = st.number_input("컨텍스트 토큰 한도 (0 = 모델 최대):", min_value=0, value=0, step=256)
+        use_cache = st.checkbox("응답 캐시 사용", value=False, help="temperature가 0인 동일한 요청은 캐시된 응답을 재사용합니다.")
+        if use_cache:
+            st.caption(format_cache_stats(get_completion_cache().stats()))
+        use_key_routing = st.checkbox(
+            "같은 계열의 모든 키로 분산", value=False,
+            help="OpenAI (Default)/(Backup)처럼 설정된 키들에 요청을 나누고, 429/5xx 발생 시 다른 키로 재시도합니다."
+        )
+        if use_key_routing:
+            for health in get_key_router().stats():
+                st.caption(format_key_health(health))
 
-        # 대화 반복 횟수 입력 (사이드바로 이동)
+        # 대화 반복 횟수 입력 (패널은 한 번에 모든 페르소나가 답하는 라운드 수)
         num_iterations = st.number_input("대화 반복 횟수:", min_value=1, max_value=10, value=6, step=1)
 
-    # 채팅 히스토리 표시
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
+    # 채팅 히스토리 표시 (최근 메시지만)
+    render_chat_window(st.session_state.messages)
 
     # 사용자 입력
     if prompt := st.chat_input("메시지를 입력하세요..."):
+        persona_names = [name for name, _, _, _ in personas]
+        if len(set(persona_names)) != len(persona_names) or "user" in persona_names:
+            st.error("페르소나 이름은 서로 달라야 하고 'user'는 쓸 수 없습니다.")
+            st.stop()
+
+        # 지금까지의 대화를 공유 transcript로 넘김 (사람 메시지는 user, 페르소나 메시지는 이름)
+        history = [
+            {"turn": turn, "speaker": message.get("name") or message["role"], "message": message["content"]}
+            for turn, message in enumerate(st.session_state.messages)
+        ]
         st.session_state.messages.append({"role": "user", "content": prompt})
+        persist_chat_messages()
         with st.chat_message("user"):
             st.markdown(prompt)
 
-        # AI 간 대화 반복
-        current_prompt = prompt
-        for i in range(num_iterations):
-            current_system_content = system_content_1 if i % 2 == 0 else system_content_2
-            current_role = "assistant" if i % 2 == 0 else "user"  # 역할 번갈아 설정
-
-            # 메시지 구성
-            # messages = [
-            #     {"role": "system", "content": current_system_content},
-            #     {"role": "user", "content": current_prompt},
-            # ]
-            messages = [{"role": "system", "content": current_system_content}] + st.session_state.messages
-
-            # completion params 설정
-            completion_params = {
-                "model": selected_model,
-                "messages": messages,
-                "temperature": temperature,
-                "max_tokens": max_tokens,
-                "top_p": top_p,
-                "stream": use_streaming
-            }
-
-            if selected_provider == "Anthropic":
-                completion_params["api_key"] = api_keys[selected_provider]
-                completion_params["model_name"] = selected_model
-
-            if selected_provider == "Azure":
-                completion_params["api_key"] = api_keys[selected_provider]
-                completion_params["azure"] = True
-
-            if use_json_format:
-                completion_params["response_format"] = {"type": "json_object"}
-
-            # 스트리밍 응답 처리
-            response_container = st.empty()
-            full_response = ""
-
-            try:
-                if use_streaming:
-                    for chunk in completion(**completion_params):
-                        if selected_provider == "Anthropic":
-                            content = chunk.delta.text
-                        else:
-                            content = chunk.choices[0].delta.content
-
-                        if content:
-                            full_response += content
-                            response_container.markdown(full_response)
-                else:
-                    response = completion(**completion_params)
-                    if selected_provider == "Anthropic":
-                        full_response = response.content
-                    else:
-                        full_response = response.choices[0].message.content
-                    response_container.markdown(full_response)
-
-                # 응답을 채팅 히스토리에 추가
-                if not st.session_state.messages or st.session_state.messages[-1]["content"] != full_response:
-                    st.session_state.messages.append({"role": current_role, "content": full_response})
-                    # current_prompt = full_response  # 다음 AI의 입력으로 설정
-                    with st.chat_message(current_role):
-                        st.markdown(full_response)
-                        
-                    # AI 응답을 다음 입력으로 설정
-                    current_prompt = full_response
-
-            except Exception as e:
-                st.error(f"Error: {str(e)}")
+        cache = get_completion_cache() if use_cache else None
+        agents = []
+        for persona_name, system_content, persona_provider, persona_model in personas:
+            agent = LLMAgent(persona_name, system_content, persona_model, persona_provider, api_keys[persona_provider],
+                             temperature=temperature, cache=cache, max_tokens=max_tokens, top_p=top_p,
+                             json_format=use_json_format)
+            agent.context_limit = context_limit or None
+            if use_key_routing:
+                agent.key_candidates = get_key_candidates(persona_provider, api_keys)
+            agents.append(agent)
+
+        if turn_policy == "모더레이터 지정":
+            _, _, moderator_provider, moderator_model = personas[0]
+            moderator = LLMAgent("Moderator", MODERATOR_PROMPT, moderator_model, moderator_provider,
+                                 api_keys[moderator_provider], temperature=0.0)
+            scheduler = ModeratorScheduler(moderator)
+        elif turn_policy == "패널 (동시 응답)":
+            scheduler = PanelScheduler()
+        else:
+            scheduler = RoundRobinScheduler()
+
+        # AI 간 대화: 페르소나별 턴을 스트리밍으로 그리고, 끝난 턴은 바로 세션 로그에 기록
+        dialogue = MultiAgentDialogue(agents, scheduler, stream=use_streaming, history=history)
+        agents_by_name = {agent.name: agent for agent in agents}
+        try:
+            for event in dialogue.run(prompt, num_iterations):
+                if event.kind == "turn_start":
+                    turn_container = st.chat_message("assistant")
+                    turn_container.caption(event.speaker)
+                    renderer = StreamRenderer(turn_container.empty())
+                    # 스트리밍 도중 프로세스가 죽어도 받은 부분까지 복구할 수 있도록 주기적으로 기록
+                    checkpoint = get_chat_session().partial("assistant")
+                elif event.kind == "delta":
+                    renderer.write(event.text)
+                    checkpoint.write(event.text)
+                elif event.kind == "turn_end":
+                    renderer.close()
+                    st.session_state.messages.append(
+                        {"role": "assistant", "name": event.speaker, "content": event.entry["message"]}
+                    )
+                    persist_chat_messages()
+                    turn_container.caption(format_context_stats(agents_by_name[event.speaker].last_context_stats))
+        except Exception as e:
+            st.error(f"Error: {str(e)}")
+        for agent in agents:
+            if agent.errors:
+                st.error(f"{agent.name}: {agent.errors[-1]}")
 
     # 채팅 히스토리 다운로드 버튼
     if st.button("채팅 히스토리 다운로드 (JSON)"):
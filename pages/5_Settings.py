@@ -19,52 +19,56 @@ with st.expander("API Keys Configuration", expanded=True):
 
 # 기본 설정값
 st.header("🎮 Default Parameters")
+defaults = get_chat_settings()
 with st.form("default_params"):
     col1, col2 = st.columns(2)
     
     with col1:
-        st.session_state.default_temperature = st.slider(
+        temperature = st.slider(
             "Temperature:",
             min_value=0.0,
             max_value=1.0,
-            value=st.session_state.get('default_temperature', 0.7),
+            value=defaults.temperature,
             step=0.1,
             help="Higher values make the output more random, lower values make it more focused and deterministic"
         )
         
-        st.session_state.default_top_p = st.slider(
+        top_p = st.slider(
             "Top P:",
             min_value=0.0,
             max_value=1.0,
-            value=st.session_state.get('default_top_p', 1.0),
+            value=defaults.top_p,
             step=0.1,
             help="Controls diversity via nucleus sampling"
         )
     
     with col2:
-        st.session_state.default_max_tokens = st.number_input(
+        max_tokens = st.number_input(
             "Max Tokens:",
             min_value=1,
             max_value=4096,
-            value=st.session_state.get('default_max_tokens', 256),
+            value=defaults.max_tokens,
             step=1,
             help="Maximum number of tokens to generate"
         )
         
-        st.session_state.default_streaming = st.checkbox(
+        streaming = st.checkbox(
             "Enable Streaming by default",
-            value=st.session_state.get('default_streaming', True),
+            value=defaults.streaming,
             help="Stream the response token by token"
         )
     
-    st.session_state.default_json_format = st.checkbox(
+    json_format = st.checkbox(
         "Use JSON format by default",
-        value=st.session_state.get('default_json_format', False),
+        value=defaults.json_format,
         help="Request responses in JSON format"
     )
     
     if st.form_submit_button("Save Default Settings"):
-        st.success("Default settings saved successfully!")
+        settings = ChatSettings(temperature=temperature, top_p=top_p, max_tokens=int(max_tokens),
+                                streaming=streaming, json_format=json_format)
+        if save_chat_settings(settings):
+            st.success("Default settings saved successfully!")
 
 # 모델 정보 표시
 st.header("📚 Available Models")
@@ -0,0 +1,108 @@
+import streamlit as st
+import time
+from llm_core.telemetry import TELEMETRY_LOG_PATH, events_frame, latency_percentiles, read_events
+from utils import get_telemetry
+
+st.title("📈 Telemetry")
+st.caption(f"completion 호출별 지연 시간과 토큰 사용량 (로그: `{TELEMETRY_LOG_PATH}`)")
+
+time_ranges = {"최근 1시간": 3600, "최근 24시간": 86400, "최근 7일": 7 * 86400, "전체": None}
+buckets = {"1분": "1min", "5분": "5min", "15분": "15min", "1시간": "1h", "1일": "1D"}
+metrics = {
+    "전체 지연 시간": "latency",
+    "첫 토큰까지 (TTFT)": "time_to_first_token",
+    "토큰 간 지연": "inter_token_latency",
+}
+
+# 필터
+col1, col2, col3 = st.columns(3)
+with col1:
+    time_range = st.selectbox("기간", list(time_ranges), index=1)
+with col2:
+    bucket = st.selectbox("집계 구간", list(buckets), index=1)
+with col3:
+    metric_label = st.selectbox("지표", list(metrics))
+metric = metrics[metric_label]
+
+window = time_ranges[time_range]
+events = read_events(since=time.time() - window if window else None)
+if not events:
+    st.info("아직 기록된 completion 호출이 없습니다. Chat 페이지에서 메시지를 보내면 여기에 표시됩니다.")
+    st.stop()
+
+df = events_frame(events)
+models = sorted(df["model"].unique())
+selected_models = st.multiselect("모델", models, default=models)
+df = df[df["model"].isin(selected_models)]
+
+# provider/model별 요약
+st.header("📋 Summary")
+summary = df.groupby(["provider", "model"]).agg(
+    requests=("latency", "size"),
+    errors=("error", lambda errors: errors.notna().sum()),
+    p50=("latency", lambda s: s.quantile(0.5)),
+    p95=("latency", lambda s: s.quantile(0.95)),
+    p99=("latency", lambda s: s.quantile(0.99)),
+    ttft_p50=("time_to_first_token", lambda s: s.quantile(0.5)),
+    prompt_tokens=("prompt_tokens", "sum"),
+    completion_tokens=("completion_tokens", "sum"),
+    cache_read_tokens=("cache_read_tokens", "sum"),
+    cache_write_tokens=("cache_write_tokens", "sum"),
+).reset_index()
+summary["error_rate"] = summary["errors"] / summary["requests"] * 100
+st.dataframe(
+    summary,
+    use_container_width=True,
+    hide_index=True,
+    column_config={
+        "error_rate": st.column_config.NumberColumn("error rate", format="%.1f%%"),
+        "p50": st.column_config.NumberColumn("p50 (s)", format="%.2f"),
+        "p95": st.column_config.NumberColumn("p95 (s)", format="%.2f"),
+        "p99": st.column_config.NumberColumn("p99 (s)", format="%.2f"),
+        "ttft_p50": st.column_config.NumberColumn("TTFT p50 (s)", format="%.2f"),
+    },
+)
+
+# 시간대별 p50/p95/p99
+st.header(f"⏱️ {metric_label} p50 / p95 / p99")
+percentiles = latency_percentiles(df, metric, buckets[bucket])
+if percentiles.empty:
+    st.info("선택한 지표가 기록된 요청이 없습니다. (TTFT와 토큰 간 지연은 스트리밍 요청만 기록됩니다)")
+else:
+    import altair as alt  # 차트를 그릴 때만 로드 (페이지 첫 로드가 느려지지 않도록)
+    chart = alt.Chart(percentiles).mark_line(point=True).encode(
+        x=alt.X("time:T", title="시간"),
+        y=alt.Y("seconds:Q", title="초"),
+        color=alt.Color("model:N", title="모델"),
+        strokeDash=alt.StrokeDash("percentile:N", title="백분위"),
+        tooltip=["time:T", "model:N", "percentile:N", alt.Tooltip("seconds:Q", format=".3f")],
+    )
+    st.altair_chart(chart, use_container_width=True)
+
+# 최근 오류
+errors = df[df["error"].notna()]
+if not errors.empty:
+    st.header("⚠️ Recent Errors")
+    st.dataframe(
+        errors.sort_values("time", ascending=False)[["time", "provider", "model", "source", "error"]].head(50),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+# Prometheus 내보내기
+st.header("📤 Prometheus Export")
+telemetry = get_telemetry()
+st.caption("지표는 이 프로세스가 시작된 뒤의 누적 값입니다. "
+           "`LLM_METRICS_PORT` 또는 `LLM_METRICS_FILE` 환경 변수로 자동 내보내기를 켤 수 있습니다.")
+if telemetry.server is not None:
+    host, port = telemetry.server.server_address[:2]
+    st.success(f"✅ http://{host}:{port}/metrics 에서 수집 중")
+else:
+    port = st.number_input("Port", min_value=1024, max_value=65535, value=9464)
+    if st.button("/metrics 엔드포인트 열기"):
+        try:
+            telemetry.serve_prometheus(int(port))
+            st.rerun()
+        except OSError as e:
+            st.error(f"엔드포인트를 열 수 없습니다: {str(e)}")
+st.download_button("📥 metrics.prom 다운로드", telemetry.prometheus_text(), file_name="metrics.prom", mime="text/plain")
@@ -0,0 +1,53 @@
+import time
+from typing import Callable, List, Optional
+
+
+class StreamRenderer:
+    """스트리밍 chunk를 버퍼에 모아 일정 간격으로만 컨테이너에 다시 그립니다.
+
+    chunk마다 전체 문자열을 markdown으로 다시 보내지 않고, interval초 또는
+    flush_bytes 바이트가 쌓였을 때만 flush 합니다.
+    """
+
+    def __init__(self, container, interval: float = 0.05, flush_bytes: Optional[int] = None,
+                 cursor: str = "▌", clock: Callable[[], float] = time.monotonic):
+        self.container = container
+        self.interval = interval
+        self.flush_bytes = flush_bytes
+        self.cursor = cursor
+        self.clock = clock
+        self.render_calls = 0
+        self.bytes_pushed = 0
+        self._parts: List[str] = []
+        self._pending_bytes = 0
+        self._last_flush = clock()
+
+    @property
+    def text(self) -> str:
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def write(self, content: str) -> None:
+        if not content:
+            return
+        self._parts.append(content)
+        self._pending_bytes += len(content)
+        if self.clock() - self._last_flush >= self.interval or (
+            self.flush_bytes and self._pending_bytes >= self.flush_bytes
+        ):
+            self.flush()
+
+    def flush(self, final: bool = False) -> None:
+        text = self.text
+        rendered = text if final else text + self.cursor
+        self.container.markdown(rendered)
+        self.render_calls += 1
+        self.bytes_pushed += len(rendered.encode("utf-8"))
+        self._pending_bytes = 0
+        self._last_flush = self.clock()
+
+    def close(self) -> str:
+        """남은 내용을 커서 없이 그리고 최종 문자열을 반환합니다."""
+        self.flush(final=True)
+        return self.text
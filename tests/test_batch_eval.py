@@ -0,0 +1,165 @@
+import json
+import threading
+import time
+
+import pytest
+
+from llm_core.batch_eval import load_dataset, read_results, results_frame, run_batch, run_row, summarize
+from llm_core.dialogue import LLMAgent, LLMDialogue
+from llm_core.stop_conditions import StopCondition
+
+
+class ScriptedAgent(LLMAgent):
+    """provider 대신 호출 횟수를 세며 정해진 응답을 돌려주는 에이전트."""
+
+    calls = 0
+    calls_lock = threading.Lock()
+
+    def __init__(self, name, on_call=None):
+        super().__init__(name, f"You are {name}.", "mock-model", "OpenAI", "sk-test")
+        self.on_call = on_call
+
+    def get_response(self, max_tokens=None, prompt=None):
+        with ScriptedAgent.calls_lock:
+            ScriptedAgent.calls += 1
+        if self.on_call:
+            self.on_call()
+        return f"{self.name} reply {len(self.memory)}"
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    ScriptedAgent.calls = 0
+
+
+def make_dialogue(on_call=None):
+    return LLMDialogue(ScriptedAgent("A", on_call), ScriptedAgent("B", on_call))
+
+
+def make_slow_dialogue():
+    return make_dialogue(on_call=lambda: time.sleep(0.02))
+
+
+def test_load_dataset_skips_blank_csv_cells(tmp_path):
+    path = tmp_path / "dataset.csv"
+    path.write_text("id,message,prompt\n1,hello,\n2,,fallback\n,   ,\n4,,\n5,again,\n", encoding="utf-8")
+
+    assert load_dataset(str(path)) == [
+        {"id": "1", "message": "hello"},
+        {"id": "2", "message": "fallback"},
+        {"id": "5", "message": "again"},
+    ]
+
+
+def test_load_dataset_jsonl(tmp_path):
+    path = tmp_path / "dataset.jsonl"
+    path.write_text('{"id": "a", "input": "first"}\n\n{"message": null}\n{"prompt": "third"}\n', encoding="utf-8")
+
+    assert load_dataset(str(path)) == [{"id": "a", "message": "first"}, {"id": "2", "message": "third"}]
+
+
+def test_run_row_records_conversation():
+    record = run_row({"id": "1", "message": "hi"}, make_dialogue, max_turns=3)
+
+    assert record["id"] == "1"
+    assert record["turns"] == 3
+    assert [turn["speaker"] for turn in record["conversation"]] == ["user", "A", "B", "A"]
+    assert record["error"] is None
+
+
+def test_run_row_skips_cancelled_row_before_any_request():
+    assert run_row({"id": "1", "message": "hi"}, make_dialogue, 3, should_cancel=lambda: True) is None
+    assert ScriptedAgent.calls == 0
+
+
+def test_run_row_stops_between_turns_when_cancelled():
+    cancelled = threading.Event()
+    record = run_row({"id": "1", "message": "hi"}, lambda: make_dialogue(on_call=cancelled.set), 10,
+                     should_cancel=cancelled.is_set)
+
+    assert record is None
+    assert ScriptedAgent.calls < 10
+
+
+def test_run_batch_resumes_from_output(tmp_path):
+    output = str(tmp_path / "results.jsonl")
+    rows = [{"id": str(i), "message": f"message {i}"} for i in range(5)]
+
+    assert run_batch(rows[:3], make_dialogue, output, max_turns=1, max_workers=2) == 3
+    assert run_batch(rows, make_dialogue, output, max_turns=1, max_workers=2) == 2
+    assert sorted(record["id"] for record in read_results(output)) == [str(i) for i in range(5)]
+
+
+def test_run_batch_does_not_start_pending_rows_after_cancel(tmp_path):
+    output = str(tmp_path / "results.jsonl")
+    rows = [{"id": str(i), "message": f"message {i}"} for i in range(50)]
+
+    class Cancelled(Exception):
+        pass
+
+    def on_result(record, finished, total):
+        raise Cancelled()
+
+    with pytest.raises(Cancelled):
+        run_batch(rows, make_slow_dialogue, output, max_turns=1, max_workers=1, on_result=on_result)
+    # 이미 실행 중이던 행 말고는 시작하지 않음
+    assert ScriptedAgent.calls <= 2
+    with open(output, encoding="utf-8") as f:
+        assert len([json.loads(line) for line in f]) == 1
+
+
+def test_run_batch_cancel_predicate_leaves_rows_for_resume(tmp_path):
+    output = str(tmp_path / "results.jsonl")
+    rows = [{"id": str(i), "message": f"message {i}"} for i in range(20)]
+    cancelled = threading.Event()
+
+    def on_result(record, finished, total):
+        cancelled.set()
+
+    executed = run_batch(rows, make_slow_dialogue, output, max_turns=2, max_workers=2, on_result=on_result,
+                         should_cancel=cancelled.is_set)
+
+    assert 1 <= executed < len(rows)
+    assert len(read_results(output)) == executed
+
+
+class StopAfter(StopCondition):
+    def __init__(self, turn):
+        self.turn = turn
+
+    def check(self, dialogue, entry):
+        return f"stopped at {entry['turn']}" if entry["turn"] >= self.turn else None
+
+
+def test_summary_reports_rows_that_stopped_early(tmp_path):
+    output = str(tmp_path / "results.jsonl")
+    rows = [{"id": str(i), "message": f"message {i}"} for i in range(4)]
+    run_batch(rows[:1], lambda: LLMDialogue(ScriptedAgent("A"), ScriptedAgent("B"), [StopAfter(1)]), output, 5)
+    run_batch(rows, make_dialogue, output, max_turns=2)
+
+    df = results_frame(output)
+    assert df.set_index("id").loc["0", "stop_reason"] == "stopped at 1"
+    report = summarize(df)
+    assert report["rows"] == 4
+    assert report["stopped_early"] == 1
+    assert report["errors"] == 0
+
+
+def test_results_keep_prompt_cache_tokens(tmp_path):
+    output = tmp_path / "results.jsonl"
+    base = {"message": "m", "conversation": [], "turns": 1, "latency": 1.0, "completion_tokens": 5,
+            "error": None, "stop_reason": None, "finished_at": "2024-01-01T00:00:00"}
+    records = [
+        dict(base, id="1", prompt_tokens=1000, cache_read_tokens=600, cache_write_tokens=0),
+        dict(base, id="2", prompt_tokens=1000, cache_read_tokens=200, cache_write_tokens=800),
+        # 캐시 컬럼이 없던 때의 기록
+        dict(base, id="3", prompt_tokens=200),
+    ]
+    output.write_text("".join(json.dumps(record) + "\n" for record in records), encoding="utf-8")
+
+    df = results_frame(str(output))
+    assert list(df["cache_read_tokens"]) == [600, 200, 0]
+    report = summarize(df)
+    assert report["total_cache_read_tokens"] == 800
+    assert report["total_cache_write_tokens"] == 800
+    assert report["cache_hit_ratio"] == pytest.approx(800 / 2200)
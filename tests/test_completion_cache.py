@@ -0,0 +1,123 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from llm_core.completion_cache import (
+    CompletionCache, acached_completion, cached_completion, chunk_text, is_cacheable, make_cache_key,
+)
+
+PARAMS = {"model": "gpt-4o", "messages": [{"role": "user", "content": "hi"}], "temperature": 0, "api_key": "sk-a"}
+
+
+def response(text):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+
+def chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+def counting(result):
+    calls = []
+
+    def completion(**params):
+        calls.append(params)
+        return result() if callable(result) else result
+    return completion, calls
+
+
+def test_cache_key_ignores_secrets_and_stream_flag():
+    assert make_cache_key(PARAMS) == make_cache_key(dict(PARAMS, api_key="sk-b", stream=True, client=object()))
+    assert make_cache_key(PARAMS) != make_cache_key(dict(PARAMS, model="gpt-4o-mini"))
+
+
+def test_only_deterministic_requests_are_cacheable():
+    assert is_cacheable(PARAMS)
+    assert not is_cacheable(dict(PARAMS, temperature=0.7))
+    assert not is_cacheable(dict(PARAMS, n=2))
+
+
+def test_non_streaming_hit_skips_provider(tmp_path):
+    cache = CompletionCache(str(tmp_path / "cache.sqlite3"))
+    completion, calls = counting(response("hello"))
+
+    assert cached_completion(completion, PARAMS, cache).choices[0].message.content == "hello"
+    assert cached_completion(completion, PARAMS, cache).choices[0].message.content == "hello"
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_stream_is_stored_only_when_fully_consumed(tmp_path):
+    cache = CompletionCache(str(tmp_path / "cache.sqlite3"))
+    completion, calls = counting(lambda: iter([chunk("a"), chunk(None), chunk("b")]))
+    params = dict(PARAMS, stream=True)
+
+    partial = cached_completion(completion, params, cache)
+    next(partial)
+    partial.close()
+    assert "".join(filter(None, map(chunk_text, cached_completion(completion, params, cache)))) == "ab"
+    assert len(calls) == 2
+
+    replayed = [chunk_text(c) for c in cached_completion(completion, params, cache)]
+    assert replayed == ["a", "b"]
+    assert len(calls) == 2
+
+
+def test_disk_tier_survives_a_new_instance_and_expires(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    CompletionCache(path).set("key", ["a", "b"])
+    assert CompletionCache(path).get("key") == ["a", "b"]
+
+    expired = CompletionCache(path, ttl=-1)
+    expired.set("old", ["x"])
+    assert CompletionCache(path).get("old") is None
+
+
+def test_tool_call_responses_are_not_cached(tmp_path):
+    cache = CompletionCache(str(tmp_path / "cache.sqlite3"))
+    tool_call = response(None)
+    completion, calls = counting(tool_call)
+    assert cached_completion(completion, PARAMS, cache) is tool_call
+    assert cached_completion(completion, PARAMS, cache) is tool_call
+    assert len(calls) == 2
+    assert cache.get(make_cache_key(PARAMS)) is None
+
+    async def acompletion(**params):
+        return tool_call
+
+    assert asyncio.run(acached_completion(acompletion, PARAMS, cache)) is tool_call
+    assert cache.get(make_cache_key(PARAMS)) is None
+
+    tool_chunk = SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=None, tool_calls=[{}]))])
+    stream_params = dict(PARAMS, stream=True)
+    list(cached_completion(lambda **params: iter([tool_chunk]), stream_params, cache))
+    assert cache.get(make_cache_key(stream_params)) is None
+
+
+def test_legacy_none_chunks_replay(tmp_path):
+    cache = CompletionCache(str(tmp_path / "cache.sqlite3"))
+    cache.set(make_cache_key(PARAMS), [None])
+    assert cached_completion(None, PARAMS, cache).choices[0].message.content == ""
+    assert list(cached_completion(None, dict(PARAMS, stream=True), cache)) == []
+
+
+def test_async_cache_does_sqlite_work_off_the_event_loop(tmp_path):
+    cache = CompletionCache(str(tmp_path / "cache.sqlite3"))
+    threads = []
+    real_get, real_set = cache.get, cache.set
+    cache.get = lambda key: threads.append(threading.current_thread()) or real_get(key)
+    cache.set = lambda key, chunks: threads.append(threading.current_thread()) or real_set(key, chunks)
+
+    async def acompletion(**params):
+        return response("hello")
+
+    async def run():
+        first = await acached_completion(acompletion, PARAMS, cache)
+        second = await acached_completion(acompletion, PARAMS, cache)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert second.choices[0].message.content == "hello"
+    assert getattr(second, "cached", False)
+    assert len(threads) == 3
+    assert threading.main_thread() not in threads
@@ -0,0 +1,96 @@
+import pytest
+
+from llm_core import context_window
+from llm_core.context_window import (
+    DEFAULT_CONTEXT_WINDOW, TOKENS_PER_MESSAGE, TOKENS_PER_REPLY, TokenCounter, fit_messages, get_context_budget,
+)
+
+
+@pytest.fixture(autouse=True)
+def estimated_counts(monkeypatch):
+    # tiktoken 인코딩 파일 유무와 관계없이 길이 기반 추정((len + 3) // 4)으로 셈
+    monkeypatch.setattr(context_window.token_counter, "_get_encoding", lambda model: False)
+
+
+def message(role, words):
+    # 4글자 단어 → 공백 포함 단어당 5글자
+    return {"role": role, "content": " ".join(["word"] * words)}
+
+
+def test_context_budget():
+    assert get_context_budget("gpt-4", 1000) == 8192 - 1000
+    assert get_context_budget("unknown-model", 192) == DEFAULT_CONTEXT_WINDOW - 192
+    assert get_context_budget("gpt-4o", 1000, limit=4000) == 4000
+    assert get_context_budget("gpt-4", 10000) == 0
+
+
+def test_counter_caches_and_evicts(monkeypatch):
+    counter = TokenCounter(max_cache_size=2)
+    monkeypatch.setattr(counter, "_get_encoding", lambda model: False)
+    assert counter.count_text("abcdefgh") == 2
+    counter.count_text("a")
+    counter.count_text("b")
+    assert ("estimate", "abcdefgh") not in counter._cache
+    assert len(counter._cache) == 2
+
+
+def test_count_message_joins_text_parts():
+    counter = context_window.token_counter
+    parts = {"role": "user", "content": [{"type": "text", "text": "abcd"}, {"type": "image_url"}, {"text": "efgh"}]}
+    assert counter.count_message(parts) == TOKENS_PER_MESSAGE + 2
+    assert counter.count_message({"role": "assistant", "content": None}) == TOKENS_PER_MESSAGE
+
+
+def test_fit_messages_keeps_messages_within_budget():
+    messages = [message("system", 10), message("user", 10), message("assistant", 10)]
+    kept, stats = fit_messages(messages, "gpt-4o", budget=10000)
+    assert kept is messages
+    assert stats["dropped_messages"] == 0
+    assert stats["total_tokens"] == stats["sent_tokens"] == TOKENS_PER_REPLY + 3 * (TOKENS_PER_MESSAGE + 13)
+
+
+def test_fit_messages_drops_oldest_turns_but_keeps_system_and_last():
+    messages = [message("system", 10)] + [message("assistant" if i % 2 else "user", 40) for i in range(6)]
+    per_turn = TOKENS_PER_MESSAGE + 50
+    budget = TOKENS_PER_REPLY + (TOKENS_PER_MESSAGE + 13) + 2 * per_turn
+
+    kept, stats = fit_messages(messages, "gpt-4o", budget)
+    assert kept == [messages[0]] + messages[-2:]
+    assert stats["dropped_messages"] == 4
+    assert stats["sent_tokens"] <= budget
+    assert stats["saved_tokens"] == 4 * per_turn
+
+
+def test_fit_messages_does_not_start_history_with_an_assistant_turn():
+    messages = [message("system", 10)] + [message("assistant" if i % 2 else "user", 40) for i in range(5)]
+    per_turn = TOKENS_PER_MESSAGE + 50
+    # 오래된 턴 두 개(user, assistant)만 빼면 맞지만, 한 개만 빼도 되는 예산이면 잘린 곳이 assistant 턴
+    budget = TOKENS_PER_REPLY + (TOKENS_PER_MESSAGE + 13) + 4 * per_turn
+
+    kept, stats = fit_messages(messages, "gpt-4o", budget)
+    assert kept == [messages[0]] + messages[-3:]
+    assert kept[1]["role"] == "user"
+    assert stats["dropped_messages"] == 2
+    assert stats["saved_tokens"] == 2 * per_turn
+
+
+def test_fit_messages_never_drops_the_last_message():
+    messages = [message("system", 10), message("user", 10), message("user", 1000)]
+    kept, stats = fit_messages(messages, "gpt-4o", budget=10)
+    assert kept == [messages[0], messages[-1]]
+    assert stats["sent_tokens"] > 10
+
+
+def test_fit_messages_summarizes_dropped_turns():
+    messages = [message("system", 10)] + [message("user", 40) for _ in range(4)]
+    summarized = []
+
+    def summarizer(dropped):
+        summarized.extend(dropped)
+        return "short"
+
+    kept, stats = fit_messages(messages, "gpt-4o", budget=150, summarizer=summarizer)
+    assert kept[1] == {"role": "system", "content": "Summary of earlier conversation:\nshort"}
+    assert kept[2:] == messages[-len(kept) + 2:]
+    assert summarized == messages[1:len(messages) - len(kept) + 2]
+    assert stats["dropped_messages"] == len(summarized)
@@ -0,0 +1,68 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from llm_core import context_window, fanout
+from llm_core.fanout import FanoutResult, fan_out
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    monkeypatch.setattr(context_window.token_counter, "_get_encoding", lambda model: False)
+    monkeypatch.setattr(fanout, "estimate_cost", lambda model, prompt_tokens, completion_tokens: None)
+
+
+def chunk(text=None, usage=None):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))], usage=usage)
+
+
+def params(model):
+    return {"model": model, "messages": [{"role": "user", "content": "hello"}]}
+
+
+def test_events_arrive_from_all_targets():
+    release_slow = threading.Event()
+
+    def fast(**kwargs):
+        assert kwargs["stream"] is True
+        yield chunk("fast ")
+        yield chunk("answer")
+        yield chunk(usage=SimpleNamespace(prompt_tokens=7, completion_tokens=2))
+        release_slow.set()
+
+    def slow(**kwargs):
+        # fast가 끝나기 전에는 응답하지 않으므로 이벤트가 도착 순서대로 나와야 함
+        release_slow.wait(5)
+        yield chunk("slow")
+
+    events = list(fan_out([slow, fast], [("A", params("slow-model")), ("B", params("fast-model"))]))
+    done = {index: result for kind, index, result in events if kind == "done"}
+    assert [event[1] for event in events].index(1) < [event[1] for event in events].index(0)
+
+    assert done[1].text == "fast answer"
+    assert (done[1].prompt_tokens, done[1].completion_tokens) == (7, 2)
+    assert done[1].time_to_first_token is not None
+    assert done[0].label == "A" and done[0].text == "slow"
+    # usage가 없으면 직접 셈
+    assert done[0].prompt_tokens > 0 and done[0].completion_tokens == 1
+
+
+def test_errors_are_reported_per_target():
+    def broken(**kwargs):
+        yield chunk("partial")
+        raise RuntimeError("rate limited")
+
+    def ok(**kwargs):
+        yield chunk("fine")
+
+    events = list(fan_out([broken, ok], [("A", params("m1")), ("B", params("m2"))]))
+    done = {index: result for kind, index, result in events if kind == "done"}
+    assert done[0].error == "rate limited" and done[0].text == "partial"
+    assert done[1].error is None and done[1].text == "fine"
+
+
+def test_tokens_per_second():
+    result = FanoutResult("A", "m", latency=3.0, time_to_first_token=1.0, completion_tokens=10)
+    assert result.tokens_per_second == 5.0
+    assert FanoutResult("A", "m").tokens_per_second == 0.0
@@ -0,0 +1,37 @@
+import os
+
+import pytest
+
+from llm_core import fileutil
+from llm_core.fileutil import atomic_write_text
+
+
+def test_writes_new_file_with_default_mode(tmp_path):
+    path = tmp_path / "nested" / "prompt.txt"
+    atomic_write_text(str(path), "안녕하세요")
+    assert path.read_text(encoding="utf-8") == "안녕하세요"
+    assert os.stat(path).st_mode & 0o777 == 0o666 & ~fileutil._UMASK
+    assert os.listdir(path.parent) == ["prompt.txt"]
+
+
+def test_replace_keeps_existing_mode(tmp_path):
+    path = tmp_path / "prompt.txt"
+    path.write_text("old", encoding="utf-8")
+    os.chmod(path, 0o600)
+    atomic_write_text(str(path), "new")
+    assert path.read_text(encoding="utf-8") == "new"
+    assert os.stat(path).st_mode & 0o777 == 0o600
+
+
+def test_failed_write_leaves_original(tmp_path, monkeypatch):
+    path = tmp_path / "prompt.txt"
+    path.write_text("old", encoding="utf-8")
+
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(fileutil.os, "replace", fail)
+    with pytest.raises(OSError):
+        atomic_write_text(str(path), "new")
+    assert path.read_text(encoding="utf-8") == "old"
+    assert os.listdir(tmp_path) == ["prompt.txt"]
@@ -0,0 +1,41 @@
+import json
+import os
+
+from llm_core.history_store import ChatHistoryIndex, delete_chat_history, index_path, save_chat_history
+
+
+def test_index_lives_outside_the_chat_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    save_chat_history([{"role": "user", "content": "hi"}], "chat_1.json")
+
+    assert os.listdir("chat_history") == ["chat_1.json"]
+    assert os.path.exists(index_path("chat_history"))
+    assert index_path("chat_history").startswith(".cache")
+
+
+def test_index_paths_differ_per_directory(tmp_path):
+    assert index_path(str(tmp_path / "a" / "chat_history")) != index_path(str(tmp_path / "b" / "chat_history"))
+
+
+def test_imports_existing_files_and_removes_legacy_index(tmp_path):
+    directory = tmp_path / "chat_history"
+    directory.mkdir()
+    for i, saved_at in enumerate(["2024-01-02T00:00:00", "2024-01-03T00:00:00", "2024-01-01T00:00:00"]):
+        (directory / f"chat_{i}.json").write_text(json.dumps({"messages": [{}] * (i + 1), "saved_at": saved_at}))
+    (directory / ".index.sqlite3").write_bytes(b"")
+    index = ChatHistoryIndex(str(directory), db_path=str(tmp_path / "index.sqlite3"))
+
+    assert index.count() == 3
+    assert [h["filename"] for h in index.list(limit=2)] == ["chat_1.json", "chat_0.json"]
+    assert index.list(offset=2)[0]["message_count"] == 3
+    assert not (directory / ".index.sqlite3").exists()
+
+
+def test_save_and_delete_keep_index_in_sync(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    path = save_chat_history([{"role": "user", "content": "hi"}], "chat_1.json")
+    save_chat_history([{"role": "user", "content": "hi"}] * 2, "chat_2.json")
+
+    delete_chat_history(path)
+    index = ChatHistoryIndex("chat_history")
+    assert [h["filename"] for h in index.list()] == ["chat_2.json"]
@@ -0,0 +1,117 @@
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+
+from llm_core.job_queue import JobQueue
+
+
+def wait_for(job_queue, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = job_queue.get(job_id)
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} still {job['status']}")
+
+
+def make_queue(tmp_path, workers=1):
+    return JobQueue(str(tmp_path / "jobs.sqlite3"), max_workers=workers)
+
+
+def test_job_result_progress_and_events(tmp_path):
+    job_queue = make_queue(tmp_path)
+
+    def run(ctx):
+        for i in range(3):
+            ctx.emit({"step": i})
+            ctx.progress(i + 1, 3, f"step {i}")
+        return {"answer": 42}
+
+    job_id = job_queue.submit("test", "Answer", run, params={"x": 1})
+    job = wait_for(job_queue, job_id)
+
+    assert job["status"] == "done"
+    assert job["result"] == {"answer": 42}
+    assert (job["progress_done"], job["progress_total"], job["message"]) == (3, 3, "step 2")
+    assert job["params"] == {"x": 1}
+    assert [e["step"] for e in job_queue.events(job_id)] == [0, 1, 2]
+    assert job_queue.events(job_id, after=1) == [{"step": 2, "seq": 2}]
+
+
+def test_failed_job_records_error(tmp_path):
+    job_queue = make_queue(tmp_path)
+
+    def run(ctx):
+        raise OSError("disk full")
+
+    job = wait_for(job_queue, job_queue.submit("test", "Broken", run))
+    assert job["status"] == "failed"
+    assert job["error"].startswith("OSError: disk full")
+
+
+def test_cancel_queued_and_running_jobs(tmp_path):
+    job_queue = make_queue(tmp_path)
+    started = threading.Event()
+
+    def run(ctx):
+        started.set()
+        while True:
+            ctx.check_cancelled()
+            time.sleep(0.01)
+
+    running = job_queue.submit("test", "Loop", run)
+    queued = job_queue.submit("test", "Never runs", lambda ctx: "ran")
+    started.wait(5)
+
+    assert job_queue.cancel(queued)
+    assert job_queue.get(queued)["status"] == "cancelled"
+    assert job_queue.cancel(running)
+    assert wait_for(job_queue, running)["status"] == "cancelled"
+    # 취소된 대기 작업은 워커가 꺼내도 실행하지 않음
+    time.sleep(0.1)
+    assert job_queue.get(queued)["result"] is None
+    assert not job_queue.cancel(running)
+
+
+def test_live_state_is_cleared_when_the_job_ends(tmp_path):
+    job_queue = make_queue(tmp_path)
+    seen = threading.Event()
+    release = threading.Event()
+
+    def run(ctx):
+        ctx.live({"parts": ["partial"]})
+        seen.set()
+        release.wait(5)
+
+    job_id = job_queue.submit("test", "Live", run)
+    seen.wait(5)
+    assert job_queue.live(job_id) == {"parts": ["partial"]}
+    release.set()
+    wait_for(job_queue, job_id)
+    assert job_queue.live(job_id) is None
+
+
+def test_list_filters_kinds_newest_first(tmp_path):
+    job_queue = make_queue(tmp_path)
+    ids = [job_queue.submit(kind, kind, lambda ctx: None) for kind in ("a", "b", "a")]
+    for job_id in ids:
+        wait_for(job_queue, job_id)
+
+    assert [job["id"] for job in job_queue.list(kinds=["a"])] == [ids[2], ids[0]]
+    assert all(job["result"] is None for job in job_queue.list())
+
+
+def test_jobs_of_a_dead_process_are_marked_interrupted(tmp_path):
+    job_queue = make_queue(tmp_path)
+    job_id = job_queue.submit("test", "Done", lambda ctx: None)
+    wait_for(job_queue, job_id)
+
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    with sqlite3.connect(job_queue.db_path) as conn:
+        conn.execute("UPDATE jobs SET status = 'running', owner_pid = ? WHERE id = ?", (dead.pid, job_id))
+
+    assert make_queue(tmp_path).get(job_id)["status"] == "interrupted"
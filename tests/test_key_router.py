@@ -0,0 +1,137 @@
+import asyncio
+import gc
+
+import pytest
+from tenacity import wait_none
+
+from llm_core import key_router
+from llm_core.key_router import KeyRouter, arouted_completion, get_key_candidates, is_retryable, provider_family
+
+CANDIDATES = [("OpenAI (Default)", "sk-a"), ("OpenAI (Backup)", "sk-b")]
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+def outstanding(router):
+    return {h["provider"]: h["outstanding"] for h in router.stats()}
+
+
+def test_key_candidates_group_provider_family():
+    keys = {"OpenAI (Default)": "sk-a", "OpenAI (Backup)": "sk-b", "Anthropic": "sk-c", "OpenAI (Spare)": ""}
+    assert provider_family("OpenAI (Backup)") == "OpenAI"
+    assert get_key_candidates("OpenAI (Default)", keys) == CANDIDATES
+
+
+def test_retryable_errors():
+    assert is_retryable(StatusError(429))
+    assert is_retryable(StatusError(503))
+    assert not is_retryable(StatusError(400))
+    assert not is_retryable(ValueError("bad request"))
+
+
+def test_acquire_prefers_least_outstanding_key():
+    router = KeyRouter()
+    first = router.acquire(CANDIDATES)
+    second = router.acquire(CANDIDATES)
+    assert {first, second} == set(CANDIDATES)
+
+    router.release(first)
+    assert router.acquire(CANDIDATES) == first
+
+
+def test_fails_over_to_next_key_and_cools_down_failed_one():
+    router = KeyRouter(wait=wait_none())
+    calls = []
+
+    def completion(**params):
+        calls.append(params["api_key"])
+        if params["api_key"] == "sk-a":
+            raise StatusError(429)
+        return "ok"
+
+    assert router.completion(completion, CANDIDATES, {"model": "gpt-4o"}) == "ok"
+    assert calls == ["sk-a", "sk-b"]
+    # sk-a는 cooldown 중이라 다음 요청은 바로 sk-b로
+    calls.clear()
+    router.completion(completion, CANDIDATES, {"model": "gpt-4o"})
+    assert calls == ["sk-b"]
+    assert outstanding(router) == {"OpenAI (Default)": 0, "OpenAI (Backup)": 0}
+
+
+def test_async_fails_over_and_releases_keys(monkeypatch):
+    router = KeyRouter(wait=wait_none())
+    monkeypatch.setattr(key_router, "_router", router)
+    calls = []
+
+    async def acompletion(**params):
+        calls.append(params["api_key"])
+        assert "client" not in params
+        if params["api_key"] == "sk-a":
+            raise StatusError(429)
+        return "ok"
+
+    call = arouted_completion(acompletion, CANDIDATES)
+    assert asyncio.run(call(model="gpt-4o")) == "ok"
+    assert calls == ["sk-a", "sk-b"]
+    assert outstanding(router) == {"OpenAI (Default)": 0, "OpenAI (Backup)": 0}
+    assert sum(h["failures"] for h in router.stats()) == 1
+
+
+def test_non_retryable_error_is_raised_without_failover():
+    router = KeyRouter(wait=wait_none())
+
+    def completion(**params):
+        raise StatusError(400)
+
+    with pytest.raises(StatusError):
+        router.completion(completion, CANDIDATES, {"model": "gpt-4o"})
+    assert sum(h["failures"] for h in router.stats()) == 1
+
+
+def stream_completion(chunks):
+    def completion(**params):
+        return iter(chunks)
+    return completion
+
+
+def test_stream_releases_key_when_exhausted():
+    router = KeyRouter()
+    stream = router.completion(stream_completion(["a", "b"]), CANDIDATES[:1], {"stream": True})
+    assert outstanding(router) == {"OpenAI (Default)": 1}
+    assert list(stream) == ["a", "b"]
+    assert outstanding(router) == {"OpenAI (Default)": 0}
+
+
+def test_stream_never_iterated_releases_key_on_close():
+    router = KeyRouter()
+    stream = router.completion(stream_completion(["a", "b"]), CANDIDATES[:1], {"stream": True})
+    stream.close()
+    assert outstanding(router) == {"OpenAI (Default)": 0}
+    assert list(stream) == []
+
+
+def test_stream_never_iterated_releases_key_when_dropped():
+    router = KeyRouter()
+    router.completion(stream_completion(["a", "b"]), CANDIDATES[:1], {"stream": True})
+    gc.collect()
+    assert outstanding(router) == {"OpenAI (Default)": 0}
+
+
+def test_stream_error_after_first_chunk_is_recorded_once():
+    router = KeyRouter()
+
+    def chunks():
+        yield "a"
+        raise StatusError(502)
+
+    stream = router.completion(lambda **params: chunks(), CANDIDATES[:1], {"stream": True})
+    assert next(stream) == "a"
+    with pytest.raises(StatusError):
+        next(stream)
+    stream.close()
+    (health,) = router.stats()
+    assert (health["outstanding"], health["failures"], health["successes"]) == (0, 1, 0)
@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+
+import pytest
+
+from llm_core import context_window
+from llm_core.prompt_caching import (
+    CACHE_CONTROL, cache_breakpoints, cache_usage, mark_cache_breakpoints, supports_prompt_cache,
+)
+from llm_core.provider_clients import build_completion_params
+
+
+@pytest.fixture(autouse=True)
+def estimated_counts(monkeypatch):
+    # tiktoken 인코딩 파일 유무와 관계없이 길이 기반 추정((len + 3) // 4)으로 셈
+    monkeypatch.setattr(context_window.token_counter, "_get_encoding", lambda model: False)
+
+
+def message(role, words):
+    return {"role": role, "content": " ".join(["word"] * words)}
+
+
+def conversation():
+    return [message("system", 1000), message("user", 10), message("assistant", 10), message("user", 10)]
+
+
+def test_supports_prompt_cache():
+    assert supports_prompt_cache("Anthropic")
+    assert not supports_prompt_cache("OpenAI")
+
+
+def test_breakpoints_at_system_previous_and_last_turn():
+    messages = conversation()
+    assert cache_breakpoints(messages, "gpt-4") == [0, 2, 3]
+    assert cache_breakpoints(messages, "gpt-4", min_tokens=100000) == []
+    assert cache_breakpoints([], "gpt-4") == []
+
+
+def test_short_system_prompt_is_not_marked():
+    messages = [message("system", 10)] + [message("user", 1000), message("assistant", 10)]
+    # system까지의 prefix는 min_tokens보다 짧아서 제외
+    assert cache_breakpoints(messages, "gpt-4") == [1, 2]
+
+
+def test_mark_cache_breakpoints_copies_messages():
+    messages = conversation()
+    marked = mark_cache_breakpoints(messages, "gpt-4")
+    assert all(isinstance(m["content"], str) for m in messages)
+    assert marked[0]["content"][-1]["cache_control"] == CACHE_CONTROL
+    assert marked[0]["content"][-1]["text"] == messages[0]["content"]
+    assert marked[1] is messages[1]
+
+    blocks = [{"type": "text", "text": "a"}, {"type": "text", "text": " ".join(["word"] * 1000)}]
+    original = [{"role": "system", "content": blocks}]
+    marked = mark_cache_breakpoints(original, "gpt-4")
+    assert "cache_control" not in marked[0]["content"][0]
+    assert marked[0]["content"][1]["cache_control"] == CACHE_CONTROL
+    assert "cache_control" not in blocks[1]
+
+    short = [message("user", 10)]
+    assert mark_cache_breakpoints(short, "gpt-4") is short
+
+
+def test_cache_usage():
+    assert cache_usage(None) == (0, 0)
+    anthropic = SimpleNamespace(cache_read_input_tokens=900, cache_creation_input_tokens=100)
+    assert cache_usage(anthropic) == (900, 100)
+    openai = SimpleNamespace(prompt_tokens_details=SimpleNamespace(cached_tokens=512))
+    assert cache_usage(openai) == (512, 0)
+    assert cache_usage(SimpleNamespace(prompt_tokens=10)) == (0, 0)
+
+
+def test_completion_params_mark_only_supported_providers():
+    messages = conversation()
+    params = build_completion_params("Anthropic", "claude-3-5-sonnet", messages, "key", reuse_client=False)
+    assert params["messages"][0]["content"][-1]["cache_control"] == CACHE_CONTROL
+
+    params = build_completion_params("Anthropic", "claude-3-5-sonnet", messages, "key",
+                                     reuse_client=False, prompt_cache=False)
+    assert params["messages"] is messages
+
+    params = build_completion_params("OpenAI", "gpt-4o", messages, "key", reuse_client=False)
+    assert params["messages"] is messages
@@ -0,0 +1,69 @@
+import json
+import threading
+
+import pytest
+
+from llm_core.prompt_library import PromptLibrary, get_prompt_library
+
+
+@pytest.fixture
+def library(tmp_path):
+    return PromptLibrary(str(tmp_path / "prompts.sqlite3"), legacy_path=None)
+
+
+def test_save_update_delete(library):
+    first = library.save("greeting", "안녕", "인사")
+    second = library.save("farewell", "bye")
+    assert library.count() == 2
+    assert [p["name"] for p in library.list()] == ["greeting", "farewell"]
+    assert [p["id"] for p in library.list(limit=1, offset=1)] == [second]
+
+    assert library.save("greeting", "안녕하세요", prompt_id=first) == first
+    assert library.get(first)["content"] == "안녕하세요"
+    with pytest.raises(KeyError):
+        library.save("missing", "x", prompt_id=999)
+
+    assert library.delete(first)
+    assert not library.delete(first)
+    assert library.get(first) is None
+    assert library.count() == 1
+
+
+def test_legacy_prompts_imported_once(tmp_path):
+    legacy = tmp_path / "prompts.json"
+    legacy.write_text(json.dumps([
+        {"name": "a", "content": "A", "created_at": "2024-01-01T00:00:00"},
+        {"name": "b", "content": "B", "description": "desc"},
+    ]), encoding="utf-8")
+    db_path = str(tmp_path / "prompts.sqlite3")
+
+    library = PromptLibrary(db_path, str(legacy))
+    assert [(p["name"], p["description"]) for p in library.list()] == [("a", ""), ("b", "desc")]
+    assert library.list()[0]["created_at"] == "2024-01-01T00:00:00"
+
+    # 다른 프로세스가 같은 DB를 새로 열어도 다시 가져오지 않음
+    assert PromptLibrary(db_path, str(legacy)).count() == 2
+    assert legacy.exists()
+
+
+def test_concurrent_saves_are_not_lost(tmp_path):
+    db_path = str(tmp_path / "prompts.sqlite3")
+    PromptLibrary(db_path, legacy_path=None).count()
+
+    def worker(n):
+        library = PromptLibrary(db_path, legacy_path=None)
+        for i in range(10):
+            library.save(f"{n}-{i}", "x")
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert PromptLibrary(db_path, legacy_path=None).count() == 40
+
+
+def test_get_prompt_library_is_shared_per_path(tmp_path):
+    db_path = str(tmp_path / "prompts.sqlite3")
+    assert get_prompt_library(db_path, None) is get_prompt_library(db_path, None)
+    assert get_prompt_library(db_path, None) is not get_prompt_library(str(tmp_path / "other.sqlite3"), None)
@@ -0,0 +1,65 @@
+import os
+
+from llm_core.prompt_store import (
+    SystemPromptStore, delete_system_prompt, get_system_prompt_store, parse_system_prompt, save_system_prompt,
+)
+
+
+def test_parse_system_prompt():
+    assert parse_system_prompt("---\ndescription: 번역가\n---\n\n번역하세요.\n") == ("번역하세요.", "번역가")
+    assert parse_system_prompt("  본문만 있음 ") == ("본문만 있음", "")
+
+
+def test_save_refresh_and_delete(tmp_path):
+    directory = str(tmp_path / "system_prompts")
+    path = save_system_prompt("my prompt!", "You are helpful.", "도우미", directory=directory)
+    assert os.path.basename(path) == "my_prompt_.md"
+
+    store = get_system_prompt_store(directory)
+    assert store is get_system_prompt_store(directory)
+    prompts = store.refresh()
+    assert [(p["name"], p["content"], p["description"]) for p in prompts] == [
+        ("my_prompt_", "You are helpful.", "도우미")]
+    assert store.get("my_prompt_")["file_path"] == path
+
+    save_system_prompt("my prompt!", "You are terse.", directory=directory)
+    assert store.refresh()[0]["content"] == "You are terse."
+
+    delete_system_prompt(path)
+    assert store.refresh() == []
+    assert store.get("my_prompt_") is None
+
+
+def test_refresh_rereads_only_changed_files(tmp_path, monkeypatch):
+    directory = tmp_path / "system_prompts"
+    directory.mkdir()
+    (directory / "a.md").write_text("A", encoding="utf-8")
+    (directory / "b.md").write_text("B", encoding="utf-8")
+    (directory / "notes.txt").write_text("ignored", encoding="utf-8")
+    store = SystemPromptStore(str(directory))
+    assert [p["name"] for p in store.refresh()] == ["a", "b"]
+
+    opened = []
+    real_open = open
+
+    def tracking_open(path, *args, **kwargs):
+        opened.append(os.path.basename(path))
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr("builtins.open", tracking_open)
+    assert [p["content"] for p in store.refresh()] == ["A", "B"]
+    assert opened == []
+
+    (directory / "b.md").write_text("B2!", encoding="utf-8")
+    assert [p["content"] for p in store.refresh()] == ["A", "B2!"]
+    assert opened == ["b.md"]
+
+
+def test_unreadable_file_is_reported(tmp_path):
+    directory = tmp_path / "system_prompts"
+    directory.mkdir()
+    (directory / "good.md").write_text("ok", encoding="utf-8")
+    (directory / "bad.md").write_bytes(b"\xff\xfe\xfa")
+    store = SystemPromptStore(str(directory))
+    assert [p["name"] for p in store.refresh()] == ["good"]
+    assert len(store.errors) == 1 and "bad.md" in store.errors[0]
@@ -0,0 +1,54 @@
+import pytest
+
+from llm_core import provider_clients
+from llm_core.provider_clients import build_completion_params, close_clients, get_http_client, get_sdk_client
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+@pytest.fixture(autouse=True)
+def fresh_clients():
+    close_clients()
+    yield
+    close_clients()
+
+
+def test_clients_are_pooled_per_provider_and_key():
+    client = get_http_client("OpenAI (Default)", "key-a")
+    assert get_http_client("OpenAI (Default)", "key-a") is client
+    assert get_http_client("OpenAI (Default)", "key-b") is not client
+
+    sdk_client = get_sdk_client("OpenAI (Default)", "key-a")
+    assert get_sdk_client("OpenAI (Default)", "key-a") is sdk_client
+    assert get_sdk_client("Anthropic", "key-a") is None
+    assert get_sdk_client("OpenAI (Default)", "") is None
+
+    close_clients()
+    assert client.is_closed
+    assert get_http_client("OpenAI (Default)", "key-a") is not client
+
+
+def test_openai_params_reuse_sdk_client():
+    params = build_completion_params("OpenAI (Default)", "gpt-4o", MESSAGES, "key", stream=True, json_format=True)
+    assert params["client"] is get_sdk_client("OpenAI (Default)", "key")
+    assert params["api_key"] == "key"
+    assert params["response_format"] == {"type": "json_object"}
+    assert "stream_options" not in params
+
+    params = build_completion_params("OpenAI (Default)", "gpt-4o", MESSAGES, "key", stream=True,
+                                     reuse_client=False, prompt_cache=True)
+    assert "client" not in params
+    assert params["stream_options"] == {"include_usage": True}
+
+
+def test_other_providers_use_shared_session(monkeypatch):
+    installed = []
+    monkeypatch.setattr(provider_clients, "install_shared_session", lambda: installed.append(True))
+
+    params = build_completion_params("Azure", "gpt-4", MESSAGES, "key", seed=1)
+    assert params["azure"] is True and params["seed"] == 1
+    assert "client" not in params
+
+    params = build_completion_params("Anthropic", "claude-2.1", MESSAGES, "key")
+    assert params["model_name"] == "claude-2.1"
+    assert len(installed) == 2
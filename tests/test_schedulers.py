@@ -0,0 +1,65 @@
+from llm_core.dialogue import LLMAgent, MultiAgentDialogue
+from llm_core.schedulers import ModeratorScheduler, PanelScheduler, RoundRobinScheduler, pick_agent
+
+
+class ScriptedAgent(LLMAgent):
+    """provider 대신 정해진 응답을 순서대로 돌려주는 에이전트. 받은 prompt를 기록합니다."""
+
+    def __init__(self, name, responses=()):
+        super().__init__(name, f"You are {name}.", "mock-model", "OpenAI", "sk-test")
+        self.responses = iter(responses)
+        self.prompts = []
+
+    def get_response(self, max_tokens=None, prompt=None):
+        self.prompts.append(prompt)
+        return next(self.responses, f"{self.name} speaking")
+
+
+def speakers(conversation):
+    return [entry["speaker"] for entry in conversation]
+
+
+def test_round_robin_cycles_through_agents():
+    agents = [ScriptedAgent(name) for name in ("A", "B", "C")]
+    conversation = MultiAgentDialogue(agents, RoundRobinScheduler()).conduct_dialogue("hi", 4)
+    assert speakers(conversation) == ["user", "A", "B", "C", "A"]
+    assert [entry["turn"] for entry in conversation] == [0, 1, 2, 3, 4]
+
+
+def test_round_robin_restarts_after_a_user_message():
+    dialogue = MultiAgentDialogue([ScriptedAgent("A"), ScriptedAgent("B")])
+    dialogue.conduct_dialogue("first", 1)
+    conversation = dialogue.conduct_dialogue("second", 1)
+    assert speakers(conversation) == ["user", "A", "user", "A"]
+
+
+def test_panel_answers_the_same_message_in_one_round():
+    dialogue = MultiAgentDialogue([ScriptedAgent("A"), ScriptedAgent("B")], PanelScheduler())
+    conversation = dialogue.conduct_dialogue("question", 2)
+
+    assert speakers(conversation) == ["user", "A", "B", "A", "B"]
+    assert [entry["turn"] for entry in conversation] == [0, 1, 1, 2, 2]
+
+
+def test_pick_agent_prefers_first_and_longest_name():
+    agents = [ScriptedAgent(name) for name in ("Agent 1", "Agent 10", "Critic")]
+    assert pick_agent("Agent 10 should answer", agents).name == "Agent 10"
+    assert pick_agent("the critic, then agent 1", agents).name == "Critic"
+    assert pick_agent("nobody", agents) is None
+
+
+def test_moderator_picks_speakers_and_falls_back_to_round_robin():
+    moderator = ScriptedAgent("Moderator", ["B", "I am not sure", "A"])
+    dialogue = MultiAgentDialogue([ScriptedAgent("A"), ScriptedAgent("B")], ModeratorScheduler(moderator))
+    conversation = dialogue.conduct_dialogue("go", 3)
+
+    assert speakers(conversation) == ["user", "B", "A", "A"]
+    assert "A, B" in moderator.prompts[0]
+    assert dialogue.all_agents == dialogue.agents + [moderator]
+    # 모더레이터는 transcript를 보지만 transcript에 발화를 남기지 않음
+    assert "Moderator" not in speakers(conversation)
+
+
+def test_helper_agents_default_to_none():
+    assert RoundRobinScheduler().helper_agents() == []
+    assert PanelScheduler().helper_agents() == []
@@ -0,0 +1,84 @@
+import json
+
+from llm_core.search_index import SearchIndex, build_match_query
+
+
+def system_prompt(name, content, created_at="2024-01-01T00:00:00"):
+    return {"name": name, "content": content, "description": "", "created_at": created_at}
+
+
+def user_prompt(prompt_id, name, content, updated_at="2024-01-01T00:00:00"):
+    return {"id": prompt_id, "name": name, "content": content, "description": "", "updated_at": updated_at}
+
+
+def make_index(tmp_path):
+    index = SearchIndex(str(tmp_path / "search.sqlite3"))
+    index.index_system_prompt(system_prompt("reviewer", "Review the pull request carefully."))
+    index.index_prompt(user_prompt(1, "summary", "Summarize the pull request in Korean."))
+    return index
+
+
+def test_build_match_query_prefix_terms():
+    assert build_match_query("프롬프트 cache") == '{title body} : ("프롬프트"* "cache"*)'
+    assert build_match_query("  ?! ") is None
+
+
+def test_search_filters_by_exact_kind(tmp_path):
+    index = make_index(tmp_path)
+
+    total, results = index.search("pull", kinds=["prompt"])
+    assert total == 1
+    assert [(r["kind"], r["ref"]) for r in results] == [("prompt", "1")]
+
+    total, results = index.search("pull", kinds=["system_prompt"])
+    assert [(r["kind"], r["ref"]) for r in results] == [("system_prompt", "reviewer")]
+
+    total, _ = index.search("pull", kinds=["prompt", "system_prompt"])
+    assert total == 2
+
+
+def test_search_does_not_match_kind_names(tmp_path):
+    index = make_index(tmp_path)
+    assert index.search("system") == (0, [])
+
+
+def test_korean_prefix_match(tmp_path):
+    index = SearchIndex(str(tmp_path / "search.sqlite3"))
+    index.index_prompt(user_prompt(1, "번역", "이 프롬프트를 영어로 번역하세요."))
+
+    total, results = index.search("프롬프트")
+    assert total == 1
+    assert "**프롬프트를**" in results[0]["snippet"]
+
+
+def test_remove_document(tmp_path):
+    index = make_index(tmp_path)
+    index.remove_document("prompt", "1")
+    assert [r["kind"] for r in index.search("pull")[1]] == ["system_prompt"]
+
+
+def test_reconcile_reindexes_changed_and_drops_missing(tmp_path):
+    chat_dir = tmp_path / "chat_history"
+    chat_dir.mkdir()
+    (chat_dir / "chat_1.json").write_text(json.dumps({"messages": [{"role": "user", "content": "hello pipeline"}]}))
+    index = SearchIndex(str(tmp_path / "search.sqlite3"))
+    prompts = [system_prompt("reviewer", "Review the pipeline.")]
+
+    assert index.reconcile(prompts, [], str(chat_dir)) == 2
+    assert index.reconcile(prompts, [], str(chat_dir)) == 0
+    assert index.search("pipeline")[0] == 2
+
+    (chat_dir / "chat_1.json").unlink()
+    index.reconcile([system_prompt("reviewer", "Review the build.", created_at="2024-02-01T00:00:00")], [], str(chat_dir))
+    assert index.search("pipeline") == (0, [])
+    assert index.search("build")[0] == 1
+
+
+def test_pagination_reports_total(tmp_path):
+    index = SearchIndex(str(tmp_path / "search.sqlite3"))
+    for i in range(5):
+        index.index_prompt(user_prompt(i, f"p{i}", "shared word"))
+
+    total, page = index.search("shared", limit=2, offset=2)
+    assert total == 5
+    assert len(page) == 2
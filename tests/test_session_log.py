@@ -0,0 +1,100 @@
+import json
+import os
+
+from llm_core.session_log import ChatSession, PartialCheckpoint, SessionLogWriter, list_sessions, rebuild_session
+
+
+def read_records(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def new_session(tmp_path, writer, session_id="s1"):
+    return ChatSession(session_id, str(tmp_path / "sessions"), writer)
+
+
+def test_sync_appends_only_new_messages(tmp_path):
+    writer = SessionLogWriter()
+    session = new_session(tmp_path, writer)
+    messages = [{"role": "user", "content": "안녕"}]
+    session.sync(messages)
+    messages.append({"role": "assistant", "content": "반가워요", "name": "Bot"})
+    session.sync(messages)
+    session.sync(messages)
+    assert writer.flush(5)
+
+    records = read_records(session.path)
+    assert [r["type"] for r in records] == ["start", "message", "message"]
+    assert records[2]["name"] == "Bot"
+    assert rebuild_session(session.path) == (messages, False)
+
+
+def test_replaced_messages_are_reset(tmp_path):
+    writer = SessionLogWriter()
+    session = new_session(tmp_path, writer)
+    session.sync([{"role": "user", "content": "a"}, {"role": "assistant", "content": "b"}])
+    loaded = [{"role": "user", "content": "other"}]
+    session.sync(loaded)
+    assert writer.flush(5)
+    assert [r["type"] for r in read_records(session.path)][-2:] == ["reset", "message"]
+    assert rebuild_session(session.path) == (loaded, False)
+
+
+def test_empty_session_writes_nothing(tmp_path):
+    writer = SessionLogWriter()
+    session = new_session(tmp_path, writer)
+    session.sync([])
+    assert writer.flush(5)
+    assert not os.path.exists(session.path)
+
+
+def test_interrupted_stream_is_recovered_and_resumed(tmp_path):
+    writer = SessionLogWriter()
+    session = new_session(tmp_path, writer)
+    session.sync([{"role": "user", "content": "질문"}])
+    now = [0.0]
+    checkpoint = PartialCheckpoint(session, 1, "assistant", interval=1.0, clock=lambda: now[0])
+    checkpoint.write("부분 ")
+    checkpoint.write(None)
+    now[0] = 1.5
+    checkpoint.write("응답")
+    checkpoint.write(" 유실")  # 다음 체크포인트 전에 프로세스가 죽음
+    assert writer.flush(5)
+
+    messages, interrupted = rebuild_session(session.path)
+    assert interrupted
+    assert messages[-1] == {"role": "assistant", "content": "부분 응답"}
+
+    resumed, resumed_messages = ChatSession.resume(session.path, writer)
+    assert resumed_messages == messages
+    resumed_messages.append({"role": "user", "content": "계속"})
+    resumed.sync(resumed_messages)
+    assert writer.flush(5)
+    assert rebuild_session(session.path) == (resumed_messages, False)
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    writer = SessionLogWriter()
+    session = new_session(tmp_path, writer)
+    session.sync([{"role": "user", "content": "a"}])
+    assert writer.flush(5)
+    with open(session.path, "a", encoding="utf-8") as f:
+        f.write('{"type": "message", "seq": 1, "ro')
+    assert rebuild_session(session.path) == ([{"role": "user", "content": "a"}], False)
+
+
+def test_list_sessions(tmp_path):
+    writer = SessionLogWriter()
+    directory = str(tmp_path / "sessions")
+    assert list_sessions(directory) == []
+    first = new_session(tmp_path, writer, "first")
+    first.sync([{"role": "user", "content": "a"}])
+    second = new_session(tmp_path, writer, "second")
+    second.sync([{"role": "user", "content": "a"}, {"role": "assistant", "content": "b"}])
+    assert writer.flush(5)
+    os.utime(first.path, ns=(1, 1))
+
+    sessions = list_sessions(directory)
+    assert [(s["session_id"], s["message_count"]) for s in sessions] == [("second", 2), ("first", 1)]
+    assert [s["session_id"] for s in list_sessions(directory, exclude="second")] == ["first"]
+    assert len(list_sessions(directory, limit=1)) == 1
@@ -0,0 +1,69 @@
+import json
+import os
+
+import pytest
+
+from llm_core.config import providers
+from llm_core.settings import ChatSettings, ConfigService, get_config_service
+
+
+@pytest.fixture(autouse=True)
+def clean_env(monkeypatch):
+    # set_api_key가 바꾸는 환경 변수도 테스트 뒤에 원래대로 돌아가도록 먼저 기록해 둠
+    for env_var in providers.values():
+        monkeypatch.setenv(env_var, "")
+        monkeypatch.delenv(env_var)
+
+
+def test_from_dict_drops_unknown_and_invalid_values():
+    settings = ChatSettings.from_dict({"temperature": "0.2", "max_tokens": "abc", "streaming": "no", "extra": 1})
+    assert settings == ChatSettings(temperature=0.2)
+
+
+def test_api_keys_are_cached_until_invalidated(monkeypatch):
+    lookups = []
+
+    def secret_lookup(env_var):
+        lookups.append(env_var)
+        return "secret-key" if env_var == "ANTHROPIC_API_KEY" else None
+
+    monkeypatch.setenv("OPENAI_API_KEY", "env-key")
+    service = ConfigService("unused.json", secret_lookup)
+    assert service.api_keys() == {"OpenAI (Default)": "env-key", "Anthropic": "secret-key"}
+    assert service.api_key("Azure") is None
+    assert len(lookups) == len(providers)
+
+    service.set_api_key("Azure", "typed-key")
+    assert os.environ["AZURE_API_KEY"] == "typed-key"
+    assert service.api_key("Azure") == "typed-key"
+    assert len(lookups) == 2 * len(providers)
+
+
+def test_settings_round_trip(tmp_path):
+    path = str(tmp_path / "settings.json")
+    service = ConfigService(path)
+    assert service.settings() == ChatSettings()
+
+    service.save_settings(ChatSettings(temperature=0.1, max_tokens=512, streaming=False))
+    assert ConfigService(path).settings() == ChatSettings(temperature=0.1, max_tokens=512, streaming=False)
+    assert service.settings() is service.settings()
+
+
+def test_settings_reloaded_when_file_changes(tmp_path):
+    path = tmp_path / "settings.json"
+    service = ConfigService(str(path))
+    service.save_settings(ChatSettings(temperature=0.1))
+
+    path.write_text(json.dumps({"chat": {"temperature": 0.9}}), encoding="utf-8")
+    os.utime(path, ns=(1, 1))
+    assert service.settings().temperature == 0.9
+
+    path.write_text("{broken", encoding="utf-8")
+    os.utime(path, ns=(2, 2))
+    assert service.settings() == ChatSettings()
+
+
+def test_get_config_service_is_shared_per_path(tmp_path):
+    path = str(tmp_path / "settings.json")
+    assert get_config_service(path) is get_config_service(path)
+    assert get_config_service(path) is not get_config_service(str(tmp_path / "other.json"))
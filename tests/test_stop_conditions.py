@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+
+from llm_core.dialogue import LLMAgent, MultiAgentDialogue
+from llm_core.schedulers import ModeratorScheduler, PanelScheduler
+from llm_core.stop_conditions import (
+    DeadlineStop, RepetitionStop, TokenBudgetStop, build_stop_conditions, ngrams, similarity,
+)
+
+
+class ScriptedAgent(LLMAgent):
+    """provider 대신 정해진 응답을 순서대로 돌려주고 턴마다 토큰 사용량을 기록하는 에이전트."""
+
+    def __init__(self, name, responses, tokens_per_call=0):
+        super().__init__(name, f"You are {name}.", "mock-model", "OpenAI", "sk-test")
+        self.responses = iter(responses)
+        self.tokens_per_call = tokens_per_call
+
+    def get_response(self, max_tokens=None, prompt=None):
+        self.add_usage(SimpleNamespace(prompt_tokens=self.tokens_per_call, completion_tokens=0))
+        return next(self.responses)
+
+
+def test_similarity_of_ngrams():
+    a = ngrams("the quick brown fox jumps")
+    assert similarity(a, a) == 1.0
+    assert similarity(a, ngrams("something else entirely here")) == 0.0
+    assert similarity(a, frozenset()) == 0.0
+    assert ngrams("hi there") == frozenset({("hi",), ("there",)})
+
+
+def test_repetition_stops_when_a_speaker_repeats_itself():
+    same = "I think we should ship the release on Friday afternoon"
+    dialogue = MultiAgentDialogue(
+        [ScriptedAgent("A", [same, same]), ScriptedAgent("B", ["What about the tests?", "And the docs?"])],
+        stop_conditions=[RepetitionStop(0.8)],
+    )
+    conversation = dialogue.conduct_dialogue("plan?", 6)
+
+    assert dialogue.stop_reason == "repetition: turn 3 is 100% similar to turn 1"
+    assert len(conversation) == 4
+
+
+def test_repetition_ignores_other_speakers_in_a_panel():
+    answer = "The answer is to cache the system prompt prefix"
+    dialogue = MultiAgentDialogue(
+        [ScriptedAgent("A", [answer, "first follow-up"]), ScriptedAgent("B", [answer, "second follow-up"])],
+        PanelScheduler(), [RepetitionStop(0.8)],
+    )
+    dialogue.conduct_dialogue("How do we cut latency?", 2)
+
+    assert dialogue.stop_reason is None
+    assert len(dialogue.conversation_history) == 5
+
+
+def test_token_budget_counts_moderator_requests():
+    moderator = ScriptedAgent("Moderator", ["A"] * 5, tokens_per_call=60)
+    dialogue = MultiAgentDialogue(
+        [ScriptedAgent("A", ["one", "two", "three"], tokens_per_call=10), ScriptedAgent("B", [])],
+        ModeratorScheduler(moderator), [TokenBudgetStop(100)],
+    )
+    dialogue.conduct_dialogue("go", 3)
+
+    # 모더레이터 60×2 + A 10×2 = 140 ≥ 100 (발화자만 세면 20)
+    assert dialogue.stop_reason == "token budget: 140 / 100 tokens used"
+    assert dialogue.all_agents[-1] is moderator
+
+
+def test_deadline_uses_dialogue_start():
+    now = [100.0]
+    condition = DeadlineStop(5, clock=lambda: now[0])
+    dialogue = SimpleNamespace(started_at=98.0)
+    assert condition.check(dialogue, {}) is None
+    now[0] = 103.5
+    assert condition.check(dialogue, {}) == "deadline: 5.5s elapsed (limit 5s)"
+
+
+def test_build_stop_conditions_skips_unset_options():
+    assert build_stop_conditions() == []
+    conditions = build_stop_conditions(repetition_threshold=0.9, token_budget=0, deadline=30)
+    assert [type(c) for c in conditions] == [RepetitionStop, DeadlineStop]
@@ -0,0 +1,49 @@
+from stream_renderer import StreamRenderer
+
+
+class FakeContainer:
+    def __init__(self):
+        self.rendered = []
+
+    def markdown(self, text):
+        self.rendered.append(text)
+
+
+def make_renderer(**kwargs):
+    now = [0.0]
+    container = FakeContainer()
+    renderer = StreamRenderer(container, clock=lambda: now[0], **kwargs)
+    return renderer, container, now
+
+
+def test_renders_only_after_interval():
+    renderer, container, now = make_renderer(interval=0.05)
+    renderer.write("안녕")
+    renderer.write("")
+    renderer.write("하세요")
+    assert container.rendered == []
+
+    now[0] = 0.1
+    renderer.write("!")
+    assert container.rendered == ["안녕하세요!▌"]
+
+    assert renderer.close() == "안녕하세요!"
+    assert container.rendered[-1] == "안녕하세요!"
+    assert renderer.render_calls == 2
+    assert renderer.bytes_pushed == sum(len(text.encode("utf-8")) for text in container.rendered)
+
+
+def test_flushes_when_enough_bytes_pending():
+    renderer, container, _ = make_renderer(interval=10, flush_bytes=5)
+    renderer.write("abc")
+    assert container.rendered == []
+    renderer.write("de")
+    assert container.rendered == ["abcde▌"]
+    renderer.write("f")
+    assert len(container.rendered) == 1
+
+
+def test_close_without_content():
+    renderer, container, _ = make_renderer()
+    assert renderer.close() == ""
+    assert container.rendered == [""]
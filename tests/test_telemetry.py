@@ -0,0 +1,76 @@
+import json
+import os
+import time
+
+from llm_core import telemetry as telemetry_module
+from llm_core.telemetry import CompletionEvent, Telemetry, read_events
+
+
+def event(timestamp, model="gpt-4o"):
+    return CompletionEvent(timestamp=timestamp, source="chat", provider="OpenAI", model=model,
+                           stream=False, latency=0.5, prompt_tokens=10, completion_tokens=5)
+
+
+def test_log_rotates_and_keeps_backups(tmp_path):
+    log_path = str(tmp_path / "telemetry.jsonl")
+    telemetry = Telemetry(log_path, log_max_bytes=2000, log_backups=2)
+    for i in range(100):
+        telemetry.record(event(1000.0 + i))
+
+    files = sorted(p.name for p in tmp_path.iterdir())
+    assert files == ["telemetry.jsonl", "telemetry.jsonl.1", "telemetry.jsonl.2"]
+    assert all(p.stat().st_size < 2000 + 500 for p in tmp_path.iterdir())
+    timestamps = [e["timestamp"] for e in read_events(log_path, backups=2)]
+    # 가장 오래된 것부터 버려지고, 남은 것은 순서대로
+    assert timestamps == sorted(timestamps)
+    assert timestamps[-1] == 1099.0
+    assert 0 < len(timestamps) < 100
+
+
+def test_read_events_parses_only_appended_lines(tmp_path, monkeypatch):
+    log_path = str(tmp_path / "telemetry.jsonl")
+    telemetry = Telemetry(log_path)
+    for i in range(3):
+        telemetry.record(event(1000.0 + i))
+    assert len(read_events(log_path)) == 3
+
+    parsed = []
+    real_loads = json.loads
+    monkeypatch.setattr(telemetry_module.json, "loads", lambda line: parsed.append(line) or real_loads(line))
+    telemetry.record(event(1003.0))
+    assert [e["timestamp"] for e in read_events(log_path)] == [1000.0, 1001.0, 1002.0, 1003.0]
+    assert len(parsed) == 1
+
+
+def test_read_events_waits_for_a_complete_last_line(tmp_path):
+    log_path = tmp_path / "telemetry.jsonl"
+    line = json.dumps({"timestamp": 1.0})
+    log_path.write_text(line + "\n" + line[:5], encoding="utf-8")
+    assert len(read_events(str(log_path))) == 1
+
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write(line[5:] + "\n")
+    assert len(read_events(str(log_path))) == 2
+
+
+def test_read_events_filters_by_since(tmp_path):
+    log_path = str(tmp_path / "telemetry.jsonl")
+    telemetry = Telemetry(log_path, log_max_bytes=500, log_backups=3)
+    now = time.time()
+    for i in range(10):
+        telemetry.record(event(now - 3600 + i))
+    telemetry.record(event(now))
+
+    recent = read_events(log_path, since=now - 60, backups=3)
+    assert [e["timestamp"] for e in recent] == [now]
+
+
+def test_read_events_since_does_not_open_rotated_files_last_written_before_it(tmp_path):
+    log_path = tmp_path / "telemetry.jsonl"
+    now = time.time()
+    (tmp_path / "telemetry.jsonl.1").write_text(json.dumps({"timestamp": now}) + "\n", encoding="utf-8")
+    os.utime(tmp_path / "telemetry.jsonl.1", (now - 7200, now - 7200))
+    log_path.write_text("", encoding="utf-8")
+
+    assert read_events(str(log_path), since=now - 3600) == []
+    assert len(read_events(str(log_path))) == 1
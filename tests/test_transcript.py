@@ -0,0 +1,64 @@
+import pytest
+
+from llm_core.transcript import Transcript, TranscriptView
+
+ENTRIES = [
+    {"turn": 0, "speaker": "user", "message": "Let's begin."},
+    {"turn": 1, "speaker": "Agent 1", "message": "Hello."},
+    {"turn": 2, "speaker": "Agent 2", "message": "Hi there."},
+    {"turn": 3, "speaker": "Agent 1", "message": "Shall we plan?"},
+]
+
+
+def test_round_trips_entries():
+    transcript = Transcript(ENTRIES)
+    assert len(transcript) == 4
+    assert transcript.to_list() == ENTRIES
+    assert transcript[-1] == ENTRIES[-1]
+    assert transcript[1:3] == ENTRIES[1:3]
+    assert list(transcript) == ENTRIES
+
+
+def test_accessors_and_speaker_ids():
+    transcript = Transcript(ENTRIES)
+    assert (transcript.turn(-1), transcript.speaker(-1), transcript.message(-1)) == (3, "Agent 1", "Shall we plan?")
+    assert transcript.speaker_id("Agent 1") == transcript.speaker_id("Agent 1") == 1
+    assert transcript.speaker_id("Agent 3") == 3
+
+
+def test_add_is_visible_to_existing_views():
+    transcript = Transcript(ENTRIES[:1])
+    view = TranscriptView(transcript, "Agent 1", "You are Agent 1.")
+    assert len(view) == 2
+
+    transcript.add(1, "Agent 1", "Hello.")
+    assert len(view) == 3
+    assert view[-1] == {"role": "assistant", "content": "Hello."}
+
+
+def test_view_maps_roles_by_speaker():
+    view = TranscriptView(Transcript(ENTRIES), "Agent 2", "You are Agent 2.")
+    assert list(view) == [
+        {"role": "system", "content": "You are Agent 2."},
+        {"role": "user", "content": "Let's begin."},
+        {"role": "user", "content": "Hello."},
+        {"role": "assistant", "content": "Hi there."},
+        {"role": "user", "content": "Shall we plan?"},
+    ]
+    assert view[:] == list(view)
+
+
+def test_view_start_and_labels():
+    view = TranscriptView(Transcript(ENTRIES), "Agent 2", "sys", start=1, label_others=True)
+    assert [m["content"] for m in view] == ["sys", "[Agent 1] Hello.", "Hi there.", "[Agent 1] Shall we plan?"]
+    # 사용자 메시지에는 접두어를 붙이지 않음
+    labeled = TranscriptView(Transcript(ENTRIES), "Agent 2", "sys", label_others=True)
+    assert labeled[1] == {"role": "user", "content": "Let's begin."}
+
+
+def test_view_indexing_bounds():
+    view = TranscriptView(Transcript(ENTRIES), "Agent 1", "sys", start=10)
+    assert len(view) == 1
+    assert view[-1] == {"role": "system", "content": "sys"}
+    with pytest.raises(IndexError):
+        view[1]
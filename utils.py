@@ -3,24 +3,48 @@ import streamlit as st
 import dotenv
 from datetime import datetime
 import json
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+from llm_core import history_store, prompt_store, session_log
+from llm_core.config import providers, provider_models
+from llm_core.prompt_store import get_system_prompt_store
+from llm_core.prompt_library import get_prompt_library
+from llm_core.search_index import get_search_index
+from llm_core.history_store import get_chat_history_index
+from llm_core.context_window import fit_messages, get_context_budget
+from llm_core.completion_cache import cached_completion, chunk_text, get_completion_cache
+from llm_core.provider_clients import build_completion_params, completion
+from llm_core.prompt_caching import cache_usage
+from llm_core.key_router import get_key_candidates, get_key_router, routed_completion
+from llm_core.fanout import FanoutResult, fan_out
+from llm_core.telemetry import get_telemetry, instrumented_completion
+from llm_core.settings import ChatSettings, ConfigService, get_config_service
+from stream_renderer import StreamRenderer
 
 # Load environment variables from .env file
 dotenv.load_dotenv()
 
+def _read_secret(env_var: str) -> Optional[str]:
+    """Streamlit Cloud에서는 st.secrets에서 키를 찾습니다."""
+    if "streamlit" not in os.environ.get("HOME", ""):
+        return None
+    try:
+        return st.secrets.get(env_var)
+    except Exception:
+        return None
+
+def get_config() -> ConfigService:
+    """키와 기본 파라미터를 캐시하는 프로세스 공용 설정 서비스를 반환합니다."""
+    return get_config_service(secret_lookup=_read_secret)
+
 def get_api_key(provider: str, env_var: str, key_suffix: str = "") -> str:
-    # 1. Try to get the API key from st.secrets (for Streamlit Cloud)
-    api_key = st.secrets.get(env_var) if "streamlit" in os.environ.get("HOME", "") else None
-    
-    # 2. If not found, try to get it from environment variables (for local)
-    if not api_key:
-        api_key = os.getenv(env_var)
-    
-    # 3. If not found, check session state
+    # 1. secrets/환경 변수에서 찾은 키 (설정 서비스가 한 번만 읽고 캐시)
+    api_key = get_config().api_key(provider)
+
+    # 2. If not found, check session state
     if not api_key:
         api_key = st.session_state.get(env_var)
-    
-    # 4. If still not found, prompt the user for input
+
+    # 3. If still not found, prompt the user for input
     if not api_key:
         key_id = f"{provider}_{key_suffix}_key" if key_suffix else f"{provider}_key"
         api_key = st.text_input(
@@ -29,214 +53,314 @@ def get_api_key(provider: str, env_var: str, key_suffix: str = "") -> str:
             key=key_id
         )
         if api_key:
-            os.environ[env_var] = api_key  # Save to environment variable
+            get_config().set_api_key(provider, api_key)  # 환경 변수에 넣고 키 캐시 무효화
             st.session_state[env_var] = api_key  # Save to session state
 
     return api_key
 
-# 공통으로 사용할 설정들
-providers = {
-    "OpenAI (Default)": "OPENAI_API_KEY",
-    "OpenAI (Backup)": "OPENAI_API_KEY_BACKUP",
-    "Anthropic": "ANTHROPIC_API_KEY",
-    "Azure": "AZURE_API_KEY",
-}
-
-provider_models = {
-    "OpenAI (Default)": ["gpt-4o", "gpt-4o-mini", "gpt-3.5-turbo"],
-    "OpenAI (Backup)": ["gpt-4o", "gpt-4o-mini", "gpt-3.5-turbo"],
-    "Anthropic": ["claude-3-opus-20240229", "claude-3-sonnet-20240229", "claude-2.1"],
-    "Azure": ["gpt-4", "gpt-3.5-turbo"],
-}
+def get_configured_api_keys() -> Dict[str, str]:
+    """입력창을 띄우지 않고, 이미 설정된 provider별 API 키만 반환합니다."""
+    api_keys = get_config().api_keys()
+    for provider, env_var in providers.items():
+        if provider not in api_keys and st.session_state.get(env_var):
+            api_keys[provider] = st.session_state[env_var]
+    return api_keys
+
+def get_chat_settings() -> ChatSettings:
+    """Settings 페이지에서 저장한 기본 파라미터를 반환합니다."""
+    return get_config().settings()
+
+def save_chat_settings(settings: ChatSettings) -> bool:
+    """기본 파라미터를 settings.json에 저장합니다."""
+    try:
+        get_config().save_settings(settings)
+        return True
+    except Exception as e:
+        st.error(f"설정 저장 중 오류가 발생했습니다: {str(e)}")
+        return False
+
+def format_context_stats(stats: Dict) -> str:
+    """요청에 보낸 토큰과 컨텍스트 정리로 절약한 토큰을 표시용 문자열로 만듭니다."""
+    text = f"📨 보낸 토큰: {stats['sent_tokens']:,}"
+    if stats["saved_tokens"]:
+        text += f" · ✂️ 절약: {stats['saved_tokens']:,} (이전 메시지 {stats['dropped_messages']}개 제외)"
+    return text + format_prompt_cache(stats.get("cache_read_tokens", 0), stats.get("cache_write_tokens", 0))
+
+def format_prompt_cache(cache_read_tokens: int, cache_write_tokens: int) -> str:
+    """provider 프롬프트 캐시에서 읽은/쓴 토큰 수를 표시용 문자열로 만듭니다. 둘 다 0이면 빈 문자열."""
+    if not cache_read_tokens and not cache_write_tokens:
+        return ""
+    return f" · ♻️ 프롬프트 캐시 읽기 {cache_read_tokens:,} / 쓰기 {cache_write_tokens:,}"
+
+def format_token_usage(usage: Dict) -> str:
+    """에이전트의 누적 토큰 사용량을 표시용 문자열로 만듭니다."""
+    text = f"토큰 {usage['prompt_tokens']:,} + {usage['completion_tokens']:,}"
+    return text + format_prompt_cache(usage.get("cache_read_tokens", 0), usage.get("cache_write_tokens", 0))
+
+def format_cache_stats(stats: Dict) -> str:
+    """응답 캐시 hit/miss 통계를 표시용 문자열로 만듭니다."""
+    total = stats["hits"] + stats["misses"]
+    hit_rate = stats["hits"] / total * 100 if total else 0
+    return f"🗄️ 캐시 hit {stats['hits']} / miss {stats['misses']} ({hit_rate:.0f}%)"
+
+def format_key_health(health: Dict) -> str:
+    """키 라우터의 키별 상태를 표시용 문자열로 만듭니다."""
+    status = "🟢" if not health["cooling_down_for"] else f"🔴 {health['cooling_down_for']:.0f}s 대기"
+    return (f"{status} {health['provider']}: 진행 {health['outstanding']} · "
+            f"성공 {health['successes']} · 실패 {health['failures']}")
+
+def format_fanout_metrics(result: FanoutResult) -> str:
+    """모델 비교 결과의 지연 시간, 처리량, 비용을 표시용 문자열로 만듭니다."""
+    ttft = f"{result.time_to_first_token:.2f}s" if result.time_to_first_token is not None else "-"
+    cost = f"${result.cost:.5f}" if result.cost is not None else "-"
+    return (f"⏱️ 첫 토큰 {ttft} · 전체 {result.latency:.2f}s · "
+            f"{result.tokens_per_second:.1f} tok/s · 토큰 {result.prompt_tokens}+{result.completion_tokens} · 💵 {cost}")
 
 def get_completion_params(selected_model, selected_provider, api_keys, temperature, max_tokens, top_p, use_streaming, use_json_format, system_prompt, user_message):
-    completion_params = {
-        "model": selected_model,
-        "messages": [
+    return build_completion_params(
+        selected_provider,
+        selected_model,
+        [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_message}
         ],
-        "temperature": temperature,
-        "max_tokens": max_tokens,
-        "top_p": top_p,
-        "stream": use_streaming
-    }
-
-    if selected_provider == "Anthropic":
-        completion_params["api_key"] = api_keys[selected_provider]
-        completion_params["model_name"] = selected_model
-
-    if selected_provider == "Azure":
-        completion_params["api_key"] = api_keys[selected_provider]
-        completion_params["azure"] = True
-
-    if use_json_format:
-        completion_params["response_format"] = {"type": "json_object"}
-        
-    return completion_params 
-
-def load_prompts() -> List[Dict]:
-    try:
-        with open("prompts.json", "r", encoding='utf-8') as f:
-            return json.load(f)
-    except FileNotFoundError:
+        api_keys[selected_provider],
+        temperature=temperature,
+        max_tokens=max_tokens,
+        top_p=top_p,
+        stream=use_streaming,
+        json_format=use_json_format,
+    )
+
+def load_prompts(limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+    """프롬프트 라이브러리에서 유저 프롬프트를 저장 순서대로 불러옵니다."""
+    try:
+        return get_prompt_library().list(limit=limit, offset=offset)
+    except Exception as e:
+        st.error(f"Error loading prompts: {str(e)}")
         return []
 
-def save_prompt(name: str, content: str, description: str = "") -> None:
-    prompts = load_prompts()
-    prompt = {
-        "name": name,
-        "content": content,
-        "description": description,
-        "created_at": datetime.now().isoformat()
-    }
-    prompts.append(prompt)
-    with open("prompts.json", "w", encoding='utf-8') as f:
-        json.dump(prompts, f, ensure_ascii=False, indent=2)
-
-def delete_prompt(index: int) -> None:
-    prompts = load_prompts()
-    if 0 <= index < len(prompts):
-        prompts.pop(index)
-        with open("prompts.json", "w", encoding='utf-8') as f:
-            json.dump(prompts, f, ensure_ascii=False, indent=2)
+def count_prompts() -> int:
+    """저장된 유저 프롬프트 개수를 반환합니다."""
+    try:
+        return get_prompt_library().count()
+    except Exception as e:
+        st.error(f"Error loading prompts: {str(e)}")
+        return 0
+
+def save_prompt(name: str, content: str, description: str = "", prompt_id: Optional[int] = None) -> Optional[int]:
+    """유저 프롬프트 하나를 추가하거나 수정하고 id를 반환합니다."""
+    try:
+        library = get_prompt_library()
+        prompt_id = library.save(name, content, description, prompt_id)
+    except Exception as e:
+        st.error(f"Error saving prompt: {str(e)}")
+        return None
+    _update_search_index(lambda index: index.index_prompt(library.get(prompt_id)))
+    return prompt_id
+
+def delete_prompt(prompt_id: int) -> bool:
+    """유저 프롬프트 하나를 삭제합니다."""
+    try:
+        deleted = get_prompt_library().delete(prompt_id)
+    except Exception as e:
+        st.error(f"Error deleting prompt: {str(e)}")
+        return False
+    _update_search_index(lambda index: index.remove_document("prompt", prompt_id))
+    return deleted
 
 def load_system_prompts() -> List[Dict]:
-    """시스템 프롬프트 마크다운 파일들을 로드합니다."""
-    prompts = []
-    system_prompts_dir = "system_prompts"
-    
-    # system_prompts 디렉토리가 없으면 생성
-    if not os.path.exists(system_prompts_dir):
-        os.makedirs(system_prompts_dir)
-    
-    # .md 파일들을 찾아서 로드
-    for filename in os.listdir(system_prompts_dir):
-        if filename.endswith('.md'):
-            file_path = os.path.join(system_prompts_dir, filename)
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    
-                # 파일명에서 확장자를 제거하여 이름으로 사용
-                name = os.path.splitext(filename)[0]
-                
-                # 파일의 수정 시간을 생성일로 사용
-                created_at = datetime.fromtimestamp(os.path.getmtime(file_path)).isoformat()
-                
-                # frontmatter에서 설명 추출
-                description = ""
-                if content.startswith('---'):
-                    try:
-                        _, frontmatter, content = content.split('---', 2)
-                        for line in frontmatter.strip().split('\n'):
-                            if line.startswith('description:'):
-                                description = line.replace('description:', '').strip()
-                    except:
-                        pass
-                
-                prompts.append({
-                    "name": name,
-                    "content": content.strip(),
-                    "description": description,
-                    "created_at": created_at,
-                    "file_path": file_path
-                })
-            except Exception as e:
-                st.error(f"Error loading {filename}: {str(e)}")
-    
+    """시스템 프롬프트 마크다운 파일들을 로드합니다. 변경된 파일만 다시 읽습니다."""
+    store = get_system_prompt_store()
+    prompts = store.refresh()
+    for error in store.errors:
+        st.error(error)
     return prompts
 
+def get_system_prompt(name: str) -> Optional[Dict]:
+    """이름으로 시스템 프롬프트를 조회합니다."""
+    store = get_system_prompt_store()
+    prompt = store.get(name)
+    if prompt is None:
+        store.refresh()
+        prompt = store.get(name)
+    return prompt
+
+def get_system_prompt_content(name: str, default: str) -> str:
+    """선택한 시스템 프롬프트의 본문을 반환합니다. 그사이 삭제되거나 이름이 바뀌었으면 경고 후 default를 씁니다."""
+    prompt = get_system_prompt(name)
+    if prompt is None:
+        st.warning(f"시스템 프롬프트 '{name}'을(를) 찾을 수 없어 기본 프롬프트를 사용합니다.")
+        return default
+    return prompt['content']
+
 def save_system_prompt(name: str, content: str, description: str = "") -> bool:
     """시스템 프롬프트를 마크다운 파일로 저장합니다."""
-    system_prompts_dir = "system_prompts"
-    
-    # system_prompts 디렉토리가 없으면 생성
-    if not os.path.exists(system_prompts_dir):
-        os.makedirs(system_prompts_dir)
-    
-    # 특수문자 제거하고 공백을 언더스코어로 변경하여 파일명 생성
-    safe_name = "".join(c if c.isalnum() or c in ['-', '_'] else '_' for c in name)
-    file_path = os.path.join(system_prompts_dir, f"{safe_name}.md")
-    
-    try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            if description:
-                f.write(f"---\ndescription: {description}\n---\n\n")
-            f.write(content)
-        return True
+    try:
+        file_path = prompt_store.save_system_prompt(name, content, description)
     except Exception as e:
         st.error(f"Error saving prompt: {str(e)}")
         return False
+    saved_name = os.path.splitext(os.path.basename(file_path))[0]
+    _update_search_index(lambda index: index.index_system_prompt(get_system_prompt(saved_name)))
+    return True
 
 def delete_system_prompt(file_path: str) -> bool:
     """시스템 프롬프트 마크다운 파일을 삭제합니다."""
     try:
-        os.remove(file_path)
-        return True
+        prompt_store.delete_system_prompt(file_path)
     except Exception as e:
         st.error(f"Error deleting prompt: {str(e)}")
-        return False 
+        return False
+    deleted_name = os.path.splitext(os.path.basename(file_path))[0]
+    _update_search_index(lambda index: index.remove_document("system_prompt", deleted_name))
+    return True
 
 def save_chat_history(messages: List[Dict], filename: str = None) -> str:
     """채팅 히스토리를 JSON 파일로 저장합니다."""
-    chat_history_dir = "chat_history"
-    
-    # 디렉토리가 없으면 생성
-    if not os.path.exists(chat_history_dir):
-        os.makedirs(chat_history_dir)
-    
-    # 파일명이 지정되지 않은 경우 현재 시간으로 생성
-    if not filename:
-        filename = f"chat_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    
-    file_path = os.path.join(chat_history_dir, filename)
-    
-    try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump({
-                "messages": messages,
-                "saved_at": datetime.now().isoformat(),
-            }, f, ensure_ascii=False, indent=2)
-        return file_path
+    try:
+        file_path = history_store.save_chat_history(messages, filename)
     except Exception as e:
         st.error(f"채팅 저장 중 오류 발생: {str(e)}")
         return None
+    _update_search_index(lambda index: index.index_chat_history(file_path, messages))
+    return file_path
 
 def load_chat_history(file_path: str) -> List[Dict]:
     """저장된 채팅 히스토리를 불러옵니다."""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return data.get("messages", [])
+        return history_store.load_chat_history(file_path)
     except Exception as e:
         st.error(f"채팅 불러오기 중 오류 발생: {str(e)}")
         return []
 
-def list_chat_histories() -> List[Dict]:
-    """저장된 채팅 히스토리 목록을 반환합니다."""
-    chat_history_dir = "chat_history"
-    histories = []
-    
-    if not os.path.exists(chat_history_dir):
-        return histories
-    
-    for filename in os.listdir(chat_history_dir):
-        if filename.endswith('.json'):
-            file_path = os.path.join(chat_history_dir, filename)
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    histories.append({
-                        "filename": filename,
-                        "file_path": file_path,
-                        "saved_at": data.get("saved_at", "Unknown"),
-                        "message_count": len(data.get("messages", []))
-                    })
-            except:
-                continue
-    
-    return sorted(histories, key=lambda x: x["saved_at"], reverse=True) 
+def list_chat_histories(limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+    """저장된 채팅 히스토리 목록을 최신순으로 반환합니다. 메시지 본문은 읽지 않습니다."""
+    try:
+        return get_chat_history_index().list(limit=limit, offset=offset)
+    except Exception as e:
+        st.error(f"채팅 목록 조회 중 오류 발생: {str(e)}")
+        return []
+
+def count_chat_histories() -> int:
+    """저장된 채팅 히스토리 개수를 반환합니다."""
+    try:
+        return get_chat_history_index().count()
+    except Exception as e:
+        st.error(f"채팅 목록 조회 중 오류 발생: {str(e)}")
+        return 0
+
+def delete_chat_history(file_path: str) -> bool:
+    """저장된 채팅 히스토리 파일을 삭제합니다."""
+    try:
+        history_store.delete_chat_history(file_path)
+    except Exception as e:
+        st.error(f"삭제 중 오류 발생: {str(e)}")
+        return False
+    _update_search_index(lambda index: index.remove_document("chat", os.path.basename(file_path)))
+    return True
+
+def _update_search_index(update) -> None:
+    """검색 인덱스 갱신이 실패해도 저장/삭제는 유지하고 경고만 표시합니다."""
+    try:
+        update(get_search_index())
+    except Exception as e:
+        st.warning(f"검색 인덱스 갱신 중 오류 발생: {str(e)}")
+
+def reindex_search() -> int:
+    """원본(프롬프트 파일, 프롬프트 라이브러리, chat_history)과 검색 인덱스를 맞추고 다시 색인한 문서 수를 반환합니다."""
+    try:
+        return get_search_index().reconcile(get_system_prompt_store().refresh(), get_prompt_library().list())
+    except Exception as e:
+        st.error(f"검색 인덱스 갱신 중 오류 발생: {str(e)}")
+        return 0
+
+def search_library(query: str, kinds: Optional[List[str]] = None, limit: int = 20, offset: int = 0) -> Tuple[int, List[Dict]]:
+    """프롬프트와 저장된 채팅 메시지를 검색해 (전체 결과 수, 결과 페이지)를 반환합니다."""
+    index = get_search_index()
+    # 앱이 꺼져 있는 동안 바뀐 파일은 프로세스에서 처음 검색할 때 한 번 반영
+    if not index.reconciled:
+        reindex_search()
+    try:
+        return index.search(query, kinds, limit, offset)
+    except Exception as e:
+        st.error(f"검색 중 오류 발생: {str(e)}")
+        return 0, []
+
+def select_page(total: int, page_size: int, label: str = "페이지", key: Optional[str] = None, container=st) -> int:
+    """항목이 한 페이지를 넘으면 페이지 번호 입력을 그리고, 현재 페이지의 offset을 반환합니다."""
+    pages = max(1, (total + page_size - 1) // page_size)
+    if pages == 1:
+        return 0
+    page = container.number_input(f"{label} (총 {total:,}개):", min_value=1, max_value=pages, value=1, step=1, key=key)
+    return (page - 1) * page_size
+
+def to_api_messages(messages: List[Dict]) -> List[Dict]:
+    """화면 표시용 필드(페르소나 이름 등)를 빼고 role/content만 남긴 메시지 목록을 반환합니다."""
+    return [{"role": message["role"], "content": message["content"]} for message in messages]
+
+def render_chat_window(messages: List[Dict], key: str = "chat", window: int = 20) -> None:
+    """최근 window개 메시지만 그리고, 그보다 이전 메시지는 '이전 메시지 더 보기'로 펼칩니다.
+
+    대화가 길어져도 rerun마다 그리는 메시지 수가 일정하게 유지됩니다.
+    """
+    visible_key = f"{key}_visible_messages"
+    visible = st.session_state.get(visible_key, window)
+    hidden = max(0, len(messages) - visible)
+    if hidden:
+        if st.button(f"⬆️ 이전 메시지 더 보기 ({hidden}개 숨김)", key=f"{key}_load_earlier"):
+            st.session_state[visible_key] = visible + window
+            st.rerun()
+    for message in messages[hidden:]:
+        with st.chat_message(message["role"]):
+            if message.get("name"):
+                st.caption(message["name"])
+            st.markdown(message["content"])
+
+def reset_chat_window(key: str = "chat") -> None:
+    """불러오기/초기화 후 다시 최근 메시지만 보이도록 합니다."""
+    st.session_state.pop(f"{key}_visible_messages", None)
+
+def get_chat_export_json(messages: List[Dict]) -> str:
+    """현재 채팅 내보내기 JSON을 메시지가 추가되거나 바뀔 때만 다시 직렬화합니다."""
+    cache_key = (id(messages), len(messages))
+    cached = st.session_state.get("_chat_export_json")
+    if cached is None or cached[0] != cache_key:
+        cached = (cache_key, json.dumps({
+            "messages": messages,
+            "exported_at": datetime.now().isoformat()
+        }, ensure_ascii=False, indent=2))
+        st.session_state["_chat_export_json"] = cached
+    return cached[1]
+
+def get_chat_session() -> session_log.ChatSession:
+    """현재 Streamlit 세션의 채팅 로그를 반환합니다."""
+    if "chat_session" not in st.session_state:
+        st.session_state.chat_session = session_log.ChatSession()
+    return st.session_state.chat_session
+
+def persist_chat_messages() -> None:
+    """st.session_state.messages에 새로 추가된 턴을 세션 로그에 기록합니다 (백그라운드 쓰기)."""
+    get_chat_session().sync(st.session_state.messages)
+
+def list_chat_sessions(limit: int = 20) -> List[Dict]:
+    """현재 세션을 제외한 최근 세션 로그 목록을 반환합니다."""
+    try:
+        return session_log.list_sessions(limit=limit, exclude=get_chat_session().session_id)
+    except Exception as e:
+        st.error(f"세션 목록 조회 중 오류 발생: {str(e)}")
+        return []
+
+def resume_chat_session(file_path: str) -> bool:
+    """세션 로그에서 대화를 복구하고, 이후 턴은 같은 로그에 이어서 기록합니다."""
+    try:
+        session, messages = session_log.ChatSession.resume(file_path)
+    except Exception as e:
+        st.error(f"세션 복구 중 오류 발생: {str(e)}")
+        return False
+    st.session_state.chat_session = session
+    st.session_state.messages = messages
+    return True
 
 def get_available_models() -> list:
     """사용 가능한 모델 목록을 반환합니다."""